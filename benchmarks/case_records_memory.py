@@ -0,0 +1,93 @@
+"""
+Memory usage of recorded test cases - junit_xml TestCase with dataclass based per-case state (previous
+representation) against the slotted CaseRecord and TestCaseData records.
+
+Usage: PYTHONPATH=src python benchmarks/case_records_memory.py [--cases 100000 1000000]
+"""
+import argparse
+import gc
+import time
+import tracemalloc
+from dataclasses import dataclass
+from typing import Any, Callable, List, Tuple, Union
+
+from junit_xml import TestCase
+
+from junit_report.utils import CaseFailure, CaseRecord, TestCaseCategories, TestCaseData
+
+CLASSNAMES = [f"tests.module_{i}.TestClass{i}" for i in range(50)]
+FAILURE_RATE = 100
+
+
+@dataclass
+class DataclassCaseFailure:
+    message: str
+    output: str = ""
+    type: str = ""
+
+
+@dataclass
+class DataclassTestCaseData:
+    case: TestCase
+    _func: Callable
+    _start_time: float
+    parametrize: Union[None, List[Tuple[str, Any]]] = None
+
+
+def case_function():
+    pass
+
+
+def get_classname(index: int) -> str:
+    """ New string object for each case, as classnames are built per case by the decorators """
+    return ".".join(CLASSNAMES[index % len(CLASSNAMES)].split("."))
+
+
+def build_dataclass_records(count: int) -> list:
+    records = list()
+    for i in range(count):
+        case = TestCase(name=f"test_case_{i}", classname=get_classname(i),
+                        category=TestCaseCategories.FUNCTION.value, elapsed_sec=0.001)
+        if i % FAILURE_RATE == 0:
+            case.failures.append(DataclassCaseFailure("failure", "traceback", "AssertionError"))
+        records.append(DataclassTestCaseData(case=case, _func=case_function, _start_time=0.0))
+    return records
+
+
+def build_slotted_records(count: int) -> list:
+    records = list()
+    for i in range(count):
+        case = CaseRecord(name=f"test_case_{i}", classname=get_classname(i),
+                          category=TestCaseCategories.FUNCTION.value, elapsed_sec=0.001)
+        if i % FAILURE_RATE == 0:
+            case.add_failure(CaseFailure("failure", "traceback", "AssertionError"))
+        records.append(TestCaseData(case=case, _func=case_function, _start_time=0.0))
+    return records
+
+
+def measure(build: Callable[[int], list], count: int) -> Tuple[float, float]:
+    gc.collect()
+    tracemalloc.start()
+    start = time.perf_counter()
+    records = build(count)
+    elapsed = time.perf_counter() - start
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del records
+    return current / 1024 / 1024, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--cases", type=int, nargs="+", default=[100_000, 1_000_000])
+    args = parser.parse_args()
+
+    print(f"{'cases':>10} {'representation':>16} {'memory MiB':>12} {'bytes/case':>12} {'build sec':>10}")
+    for count in args.cases:
+        for name, build in (("dataclass", build_dataclass_records), ("slotted", build_slotted_records)):
+            memory, elapsed = measure(build, count)
+            print(f"{count:>10} {name:>16} {memory:>12.1f} {memory * 1024 * 1024 / count:>12.0f} {elapsed:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
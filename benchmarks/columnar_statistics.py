@@ -0,0 +1,48 @@
+"""
+Aggregation time of ColumnarResults - per-suite totals, percentiles and top N slowest cases.
+Uses NumPy when installed, run with and without it to compare the fallback.
+
+Usage: PYTHONPATH=src python benchmarks/columnar_statistics.py [--cases 1000000] [--suites 1000]
+"""
+import argparse
+import random
+import time
+
+from junit_report import columnar
+from junit_report.columnar import ColumnarResults
+
+
+def build(cases: int, suites: int) -> ColumnarResults:
+    results = ColumnarResults()
+    generator = random.Random(0)
+    for i in range(cases):
+        outcome = ColumnarResults.FAILURE if i % 100 == 0 else ColumnarResults.PASSED
+        results.append(f"suite_{i % suites}", f"Class{i % suites}", f"test_{i}", generator.expovariate(10), outcome)
+    return results
+
+
+def timed(name: str, function, *args, repeat: int = 5) -> None:
+    timings = list()
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function(*args)
+        timings.append(time.perf_counter() - start)
+    print(f"{name:>18}: {min(timings) * 1000:10.2f} ms (best of {repeat})")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--cases", type=int, default=1_000_000)
+    parser.add_argument("--suites", type=int, default=1000)
+    args = parser.parse_args()
+
+    results = build(args.cases, args.suites)
+    print(f"{args.cases} cases, {args.suites} suites, numpy: {columnar.numpy is not None}")
+    timed("suite totals", results.get_suite_totals)
+    timed("percentiles", results.get_percentiles, [50, 90, 99])
+    timed("suite percentiles", results.get_percentiles, [50, 90, 99], "suite_1")
+    timed("top 10 slowest", results.get_slowest, 10)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+"""
+Startup cost of the package entry points, each measured in a fresh interpreter - the exporter path must not import
+pytest (exits with status 1 if it does), the decorators path imports it.
+
+Usage: PYTHONPATH=src python benchmarks/import_time.py [--repeat 10]
+"""
+import argparse
+import os
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+SRC_DIR = Path(__file__).resolve().parent.parent.joinpath("src")
+
+ENTRY_POINTS = {
+    "package": "import junit_report",
+    "exporter": "from junit_report import JsonJunitExporter",
+    "report summary": "from junit_report import ReportSummaryScanner",
+    "decorators": "from junit_report import JunitTestSuite",
+}
+
+# Entry points that must stay free of pytest
+PYTEST_FREE = ("package", "exporter", "report summary")
+
+CHECK_CODE = "{statement}; import sys; print('pytest' in sys.modules)"
+
+
+def run(statement: str) -> str:
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, (str(SRC_DIR), os.getenv("PYTHONPATH")))))
+    return subprocess.run([sys.executable, "-c", CHECK_CODE.format(statement=statement)], env=env, check=True,
+                          stdout=subprocess.PIPE, universal_newlines=True).stdout.strip()
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--repeat", type=int, default=10)
+    args = parser.parse_args()
+
+    baseline = min(timed("pass") for _ in range(args.repeat))
+    print(f"{'interpreter':>15}: {baseline * 1000:8.1f} ms")
+    status = 0
+    for name, statement in ENTRY_POINTS.items():
+        elapsed = min(timed(statement) for _ in range(args.repeat)) - baseline
+        pytest_imported = run(statement) == "True"
+        print(f"{name:>15}: {elapsed * 1000:8.1f} ms (pytest imported: {pytest_imported})")
+        if pytest_imported and name in PYTEST_FREE:
+            print(f"{name} entry point must not import pytest", file=sys.stderr)
+            status = 1
+    return status
+
+
+def timed(statement: str) -> float:
+    start = time.perf_counter()
+    run(statement)
+    return time.perf_counter() - start
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,78 @@
+"""
+Decoration (collection) and call overhead of the signature preserving wrappers used by the decorators, compared
+with decorator.decorator when the decorator package is installed.
+
+Usage: PYTHONPATH=src python benchmarks/wrapper_overhead.py [--functions 2000] [--calls 200000]
+"""
+import argparse
+import time
+
+from junit_report.decorators._junit_decorator import JunitDecorator
+
+try:
+    import decorator
+except ImportError:  # decorator is not a dependency anymore, compared only when installed
+    decorator = None
+
+
+def make_function(index: int):
+    def function(request, value=index, *args, flag: bool = False, **kwargs):
+        return value
+
+    function.__name__ = f"test_{index}"
+    return function
+
+
+def wrap_with_decorator(function):
+    def caller(func, *args, **kwargs):
+        return func(*args, **kwargs)
+
+    return decorator.decorator(caller, function)
+
+
+def wrap_with_wraps(function):
+    @JunitDecorator._wraps(function)
+    def wrapper(*args, **kwargs):
+        return function(*args, **kwargs)
+
+    return wrapper
+
+
+def timed(function, *args) -> float:
+    start = time.perf_counter()
+    function(*args)
+    return time.perf_counter() - start
+
+
+def decorate_all(wrap, functions) -> None:
+    for function in functions:
+        wrap(function)
+
+
+def call(wrapped, calls: int) -> None:
+    for _ in range(calls):
+        wrapped(None, value=1)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--functions", type=int, default=2000)
+    parser.add_argument("--calls", type=int, default=200000)
+    args = parser.parse_args()
+
+    functions = [make_function(i) for i in range(args.functions)]
+    wrappers = {"functools.wraps": wrap_with_wraps}
+    if decorator is not None:
+        wrappers["decorator.decorator"] = wrap_with_decorator
+
+    direct = min(timed(call, functions[0], args.calls) for _ in range(3))
+    print(f"{'direct call':>20}: {direct / args.calls * 1e9:8.1f} ns/call")
+    for name, wrap in wrappers.items():
+        decoration = min(timed(decorate_all, wrap, functions) for _ in range(3))
+        calls = min(timed(call, wrap(functions[0]), args.calls) for _ in range(3))
+        print(f"{name:>20}: {decoration / args.functions * 1e6:8.1f} us/decoration, "
+              f"{(calls - direct) / args.calls * 1e9:8.1f} ns/call overhead")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,26 @@
-from .decorators import JunitFixtureTestCase, DuplicateSuiteError, JunitTestCase, JunitTestSuite, TestCaseCategories
-from .json_junit_exporter import JsonJunitExporter, CaseFormatKeys
-from .utils import CaseFailure
+import importlib
+from typing import TYPE_CHECKING, Any, List
+
+if TYPE_CHECKING:
+    from .decorators import (JunitFixtureTestCase, DuplicateSuiteError, JunitTestCase, JunitTestSuite,
+                             JunitBenchmarkCase)
+    from .case_channel import CaseChannel
+    from .collector import ReportCollector
+    from .columnar import ColumnarResults
+    from .history import HistoryStore
+    from .incremental_report import IncrementalSuiteReport
+    from .instrumentation import Instrumentation
+    from .journal import CaseJournal
+    from .json_junit_exporter import JsonJunitExporter, CaseFormatKeys
+    from .payload_store import PayloadStore
+    from .performance_budget import PerformanceBudget, PerformanceBudgetExceeded
+    from .regression import RegressionDetector
+    from .report_manifest import ReportManifest
+    from .report_summary import ReportSummary, ReportSummaryScanner
+    from .report_writer import ReportWriter
+    from .shard_planner import ShardPlanner
+    from .watchdog import HangWatchdog
+    from .utils import CaseFailure, TestCaseCategories
 
 __all__ = [
     "JunitTestCase",
@@ -11,4 +31,67 @@ __all__ = [
     "JsonJunitExporter",
     "CaseFormatKeys",
     "DuplicateSuiteError",
+    "JunitBenchmarkCase",
+    "IncrementalSuiteReport",
+    "ReportWriter",
+    "Instrumentation",
+    "PerformanceBudget",
+    "PerformanceBudgetExceeded",
+    "HistoryStore",
+    "ShardPlanner",
+    "RegressionDetector",
+    "ReportSummary",
+    "ReportSummaryScanner",
+    "ReportManifest",
+    "ColumnarResults",
+    "CaseChannel",
+    "ReportCollector",
+    "CaseJournal",
+    "HangWatchdog",
+    "PayloadStore",
 ]
+
+# Submodules are imported on first attribute access, so using the exporter (or any other non-decorator API)
+# doesn't import pytest, which is required only by the decorators
+_LAZY_ATTRIBUTES = {
+    "JunitTestCase": ".decorators",
+    "JunitFixtureTestCase": ".decorators",
+    "JunitTestSuite": ".decorators",
+    "DuplicateSuiteError": ".decorators",
+    "JunitBenchmarkCase": ".decorators",
+    "CaseFailure": ".utils",
+    "TestCaseCategories": ".utils",
+    "JsonJunitExporter": ".json_junit_exporter",
+    "CaseFormatKeys": ".json_junit_exporter",
+    "IncrementalSuiteReport": ".incremental_report",
+    "ReportWriter": ".report_writer",
+    "Instrumentation": ".instrumentation",
+    "PerformanceBudget": ".performance_budget",
+    "PerformanceBudgetExceeded": ".performance_budget",
+    "HistoryStore": ".history",
+    "ShardPlanner": ".shard_planner",
+    "RegressionDetector": ".regression",
+    "ReportSummary": ".report_summary",
+    "ReportSummaryScanner": ".report_summary",
+    "ReportManifest": ".report_manifest",
+    "ColumnarResults": ".columnar",
+    "CaseChannel": ".case_channel",
+    "ReportCollector": ".collector",
+    "CaseJournal": ".journal",
+    "HangWatchdog": ".watchdog",
+    "PayloadStore": ".payload_store",
+}
+
+
+def __getattr__(name: str) -> Any:
+    module_name = _LAZY_ATTRIBUTES.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+    value = getattr(importlib.import_module(module_name, __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__() -> List[str]:
+    return sorted(set(globals()) | set(__all__))
@@ -0,0 +1,158 @@
+import os
+import threading
+import time
+from multiprocessing import AuthenticationError
+from multiprocessing.connection import Client, Connection, Listener
+from typing import Any, Callable, ClassVar, Dict, List, Optional, Tuple
+
+from .utils import CaseRecord, TestCaseData
+
+ChildCase = Tuple[Dict[str, Any], Optional[List[Tuple[str, Any]]]]
+
+
+class CaseChannel:
+    """
+    Cross-process channel that reports cases executed by child processes back to the suite that started them.
+    The parent listens on a local socket (Unix domain socket where available) authenticated with a random key.
+    Its address and key are exported as environment variables, so both forked and spawned child processes
+    (multiprocessing, ProcessPoolExecutor) inherit them. A child process connects on its first finished case and
+    streams each case record through the connection, the parent registers the received cases on a listener thread.
+    When the suite function finishes, the channel is drained - cases are received until all the children
+    connections are closed (children exited) or drain_timeout seconds have passed.
+    Child processes that run suites of their own (e.g. a subprocess running its own tests) report the cases of those
+    suites themselves, JunitTestSuite sends only the cases of suites started by another process.
+    """
+
+    ADDRESS_KEY = "JUNIT_REPORT_CHANNEL_ADDRESS"
+    AUTHKEY_KEY = "JUNIT_REPORT_CHANNEL_AUTHKEY"
+    OWNER_KEY = "JUNIT_REPORT_CHANNEL_OWNER"
+    DEFAULT_DRAIN_TIMEOUT = 5.0
+
+    _client: ClassVar[Optional[Connection]] = None
+    _client_pid: ClassVar[Optional[int]] = None
+    _client_lock: ClassVar[threading.Lock] = threading.Lock()
+
+    def __init__(self, handler: Callable[[CaseRecord, Optional[List[Tuple[str, Any]]]], None],
+                 drain_timeout: float = DEFAULT_DRAIN_TIMEOUT):
+        """
+        :param handler: Called with each received case record and its parametrize values, on a listener thread
+        :param drain_timeout: Max seconds to wait on stop for children connections to close
+        """
+        self._handler = handler
+        self._drain_timeout = drain_timeout
+        self._listener: Optional[Listener] = None
+        self._authkey = b""
+        self._closing = False
+        self._readers: List[threading.Thread] = list()
+        self._environ: Dict[str, Optional[str]] = dict()
+        self._accept_thread: Optional[threading.Thread] = None
+
+    @property
+    def address(self) -> Optional[str]:
+        return self._listener.address if self._listener else None
+
+    def start(self) -> None:
+        """
+        Start listening and export the channel address to the environment of child processes
+        :return: None
+        """
+        self._authkey = os.urandom(32)
+        self._listener = Listener(authkey=self._authkey)
+        self._closing = False
+        environ = {self.ADDRESS_KEY: self._listener.address, self.AUTHKEY_KEY: self._authkey.hex(),
+                   self.OWNER_KEY: str(os.getpid())}
+        for key, value in environ.items():
+            self._environ[key] = os.environ.get(key)
+            os.environ[key] = value
+
+        self._accept_thread = threading.Thread(target=self._accept, name="junit-report-channel", daemon=True)
+        self._accept_thread.start()
+
+    def stop(self) -> None:
+        """
+        Stop accepting children, drain the connected children cases and restore the environment
+        :return: None
+        """
+        if self._listener is None:
+            return
+
+        for key, value in self._environ.items():
+            if value is None:
+                os.environ.pop(key, None)
+            else:
+                os.environ[key] = value
+        self._environ = dict()
+
+        self._closing = True
+        try:
+            Client(self._listener.address, authkey=self._authkey).close()  # wake up the blocking accept
+        except OSError:
+            pass
+        self._accept_thread.join()
+        self._listener.close()
+        self._listener = None
+
+        deadline = time.monotonic() + self._drain_timeout
+        for reader in self._readers:
+            reader.join(max(deadline - time.monotonic(), 0))
+        self._readers = list()
+
+    def _accept(self) -> None:
+        while not self._closing:
+            try:
+                connection = self._listener.accept()
+            except (OSError, EOFError, AuthenticationError):
+                continue
+            if self._closing:
+                connection.close()
+                return
+            reader = threading.Thread(target=self._read, args=(connection,), name="junit-report-channel-reader",
+                                      daemon=True)
+            self._readers.append(reader)
+            reader.start()
+
+    def _read(self, connection: Connection) -> None:
+        with connection:
+            while True:
+                try:
+                    record, parametrize = connection.recv()
+                except (EOFError, OSError):
+                    return
+                self._handler(CaseRecord.from_dict(record), parametrize)
+
+    @classmethod
+    def is_child(cls) -> bool:
+        """
+        :return: Whether the current process is a child process of a suite with an open channel
+        """
+        owner = os.environ.get(cls.OWNER_KEY)
+        return owner is not None and owner != str(os.getpid())
+
+    @classmethod
+    def _connect(cls) -> Connection:
+        pid = os.getpid()
+        if cls._client is None or cls._client_pid != pid:
+            # connections inherited from a forked parent process are never used
+            cls._client = Client(os.environ[cls.ADDRESS_KEY], authkey=bytes.fromhex(os.environ[cls.AUTHKEY_KEY]))
+            cls._client_pid = pid
+        return cls._client
+
+    @classmethod
+    def send(cls, test_data: TestCaseData) -> bool:
+        """
+        Send finished case to the parent process suite
+        :param test_data: Finished case data
+        :return: True if the case was sent, False if the current process is not a channel child or the channel
+                 is not available (the case should be registered locally)
+        """
+        if not cls.is_child():
+            return False
+
+        message: ChildCase = (test_data.case.to_dict(), test_data.parametrize)
+        with cls._client_lock:
+            try:
+                cls._connect().send(message)
+            except (OSError, ValueError, KeyError, EOFError):
+                cls._client = None
+                return False
+        return True
@@ -0,0 +1,326 @@
+import argparse
+import json
+import os
+import signal
+import threading
+import time
+from multiprocessing.connection import Client, Connection, Listener
+from pathlib import Path
+from typing import Any, ClassVar, Dict, List, Optional, Sequence, Set, Union
+
+from junit_xml import TestCase, TestSuite, to_xml_report_string
+
+from .report_manifest import ReportManifest
+from .report_writer import ReportWriter
+from .utils import CaseFailure, ReportTestCase, ReportTestSuite
+
+CASE_VALUES = ("classname", "elapsed_sec", "timestamp", "stdout", "stderr", "category")
+CASE_RESULTS = ("failures", "errors", "skipped")
+
+
+def case_to_dict(case: TestCase) -> Dict[str, Any]:
+    """
+    :param case: junit_xml TestCase
+    :return: Compact representation of the case (built-in types only), unset values are omitted
+    """
+    record = {"name": case.name}
+    for key in CASE_VALUES:
+        value = getattr(case, key, None)
+        if value is not None:
+            record[key] = value if isinstance(value, (int, float)) else str(value)
+    for key in CASE_RESULTS:
+        results = getattr(case, key)
+        if results:
+            record[key] = [[str(result["message"] or ""), str(result["output"] or ""), str(result["type"] or "")]
+                           for result in results]
+    properties = getattr(case, "properties", None)
+    if properties:
+        record["properties"] = {str(name): str(value) for name, value in properties.items()}
+    return record
+
+
+def case_from_dict(record: Dict[str, Any]) -> ReportTestCase:
+    """
+    :param record: Case representation created by case_to_dict
+    :return: ReportTestCase
+    """
+    case = ReportTestCase(name=record["name"], properties=record.get("properties"),
+                          **{key: record.get(key) for key in CASE_VALUES})
+    case.failures.extend(CaseFailure(message=message, output=output, type=failure_type)
+                         for message, output, failure_type in record.get("failures", ()))
+    for key in ("errors", "skipped"):
+        getattr(case, key).extend({"message": message, "output": output, "type": result_type}
+                                  for message, output, result_type in record.get(key, ()))
+    return case
+
+
+def suite_to_dict(suite: TestSuite) -> Dict[str, Any]:
+    record = {"name": suite.name, "cases": [case_to_dict(case) for case in suite.test_cases]}
+    if suite.timestamp is not None:
+        record["timestamp"] = str(suite.timestamp)
+    if suite.properties:
+        record["properties"] = {str(name): str(value) for name, value in suite.properties.items()}
+    return record
+
+
+def suite_from_dict(record: Dict[str, Any]) -> ReportTestSuite:
+    return ReportTestSuite(name=record["name"], test_cases=[case_from_dict(case) for case in record["cases"]],
+                           timestamp=record.get("timestamp"), properties=record.get("properties"))
+
+
+class ReportCollector:
+    """
+    Long-lived local process that writes the reports of many concurrent reporting processes.
+    Producers (JunitTestSuite and JsonJunitExporter) send their suites as compact json messages over a Unix domain
+    socket instead of rendering and writing the reports themselves. The collector merges the suites sent to the same
+    report file (suites are replaced by name, suites with different names are kept side by side in the report),
+    and writes the changed reports in batches every flush_interval seconds, so a report that's updated many times
+    between flushes is rendered and written once.
+    The suites of a written report are kept for merging until no suite was sent to it for idle_timeout seconds,
+    a suite sent to a report after it was evicted replaces the report.
+    Producers use the collector when JUNIT_REPORT_COLLECTOR environment variable is set to its socket path,
+    and fall back to direct export if it isn't reachable.
+    Run it using: python -m junit_report.collector --socket <path>
+    """
+
+    DEFAULT_FLUSH_INTERVAL = 1.0
+    DEFAULT_IDLE_TIMEOUT = 300.0
+    POLL_INTERVAL = 0.1
+
+    def __init__(self, address: Union[Path, str], report_writer: ReportWriter = None,
+                 flush_interval: float = DEFAULT_FLUSH_INTERVAL, idle_timeout: float = DEFAULT_IDLE_TIMEOUT):
+        """
+        :param address: Unix domain socket path
+        :param report_writer: Writer used to write the reports
+        :param flush_interval: Seconds between writes of the changed reports
+        :param idle_timeout: Seconds a written report suites are kept in memory after its last update
+        """
+        self._address = str(address)
+        self._report_writer = report_writer or ReportWriter()
+        self._flush_interval = flush_interval
+        self._idle_timeout = idle_timeout
+        self._reports: Dict[Path, Dict[str, ReportTestSuite]] = dict()
+        self._report_options: Dict[Path, Dict[str, Any]] = dict()
+        self._dirty: Set[Path] = set()
+        self._updated: Dict[Path, float] = dict()
+        self._lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._listener: Optional[Listener] = None
+        self._threads: List[threading.Thread] = list()
+        self._readers: List[threading.Thread] = list()
+
+    @property
+    def address(self) -> str:
+        return self._address
+
+    def start(self) -> None:
+        """
+        Start accepting producers and flushing reports on background threads
+        :return: None
+        """
+        if os.path.exists(self._address) and not CollectorClient.is_available(self._address):
+            os.unlink(self._address)  # stale socket of a collector that didn't exit cleanly
+        self._listener = Listener(self._address, family="AF_UNIX")
+        os.chmod(self._address, 0o600)
+        self._stop_event.clear()
+        targets = ((self._accept, "junit-report-collector"), (self._flush_periodically, "junit-report-collector-flush"))
+        for target, name in targets:
+            thread = threading.Thread(target=target, name=name, daemon=True)
+            self._threads.append(thread)
+            thread.start()
+
+    def stop(self) -> List[Path]:
+        """
+        Stop accepting producers, receive the messages already sent and write all changed reports
+        :return: Written reports paths
+        """
+        if self._listener is None:
+            return list()
+
+        self._stop_event.set()
+        try:
+            Client(self._address, family="AF_UNIX").close()  # wake up the blocking accept
+        except OSError:
+            pass
+        for thread in self._threads:
+            thread.join()
+        # the accept thread exited, no more readers are added
+        for reader in self._readers:
+            reader.join()
+        self._threads, self._readers = list(), list()
+        self._listener.close()
+        self._listener = None
+        return self.flush()
+
+    def serve(self, stop_event: threading.Event = None) -> None:
+        """
+        Serve until stop_event is set (or forever if not set), then stop
+        :return: None
+        """
+        self.start()
+        try:
+            (stop_event or threading.Event()).wait()
+        finally:
+            self.stop()
+
+    def _accept(self) -> None:
+        while not self._stop_event.is_set():
+            try:
+                connection = self._listener.accept()
+            except (OSError, EOFError):
+                continue
+            reader = threading.Thread(target=self._read, args=(connection,), name="junit-report-collector-reader",
+                                      daemon=True)
+            self._readers = [thread for thread in self._readers if thread.is_alive()] + [reader]
+            reader.start()
+
+    def _read(self, connection: Connection) -> None:
+        """ Receive producer messages, after stop messages already sent are received before returning """
+        with connection:
+            while True:
+                try:
+                    if not connection.poll(self.POLL_INTERVAL):
+                        if self._stop_event.is_set():
+                            return
+                        continue
+                    data = connection.recv_bytes()
+                except (EOFError, OSError):
+                    return
+                try:
+                    self.submit(json.loads(data))
+                except (ValueError, KeyError, TypeError):
+                    continue  # invalid message
+
+    def _flush_periodically(self) -> None:
+        while not self._stop_event.wait(self._flush_interval):
+            self.flush()
+
+    def submit(self, message: Dict[str, Any]) -> None:
+        """
+        Merge producer message into the pending reports
+        :param message: {"path": report path, "suites": [suite_to_dict], "manifest": bool, "parametrize": str}
+        :return: None
+        """
+        path = Path(message["path"])
+        suites = [suite_from_dict(suite) for suite in message["suites"]]
+        with self._lock:
+            report = self._reports.setdefault(path, dict())
+            for suite in suites:
+                report[suite.name] = suite
+            options = self._report_options.setdefault(path, {"manifest": False})
+            options["manifest"] = options["manifest"] or message.get("manifest", False)
+            options["parametrize"] = message.get("parametrize", "")
+            self._dirty.add(path)
+            self._updated[path] = time.monotonic()
+
+    def _evict_idle_reports(self) -> None:
+        """ Drop the suites of written reports that weren't updated for idle_timeout seconds, lock must be held """
+        idle_since = time.monotonic() - self._idle_timeout
+        for path in [path for path, updated in self._updated.items() if updated <= idle_since]:
+            if path not in self._dirty:
+                del self._reports[path], self._report_options[path], self._updated[path]
+
+    def flush(self) -> List[Path]:
+        """
+        Write the reports changed since the last flush, and evict the written reports that are idle
+        :return: Written reports paths
+        """
+        with self._lock:
+            dirty, self._dirty = self._dirty, set()
+            reports = {path: list(self._reports[path].values()) for path in dirty}
+            options = {path: self._report_options[path] for path in dirty}
+            self._evict_idle_reports()
+
+        written = list()
+        for path, suites in sorted(reports.items()):
+            xml_string = to_xml_report_string(suites)
+            os.makedirs(path.parent, exist_ok=True)
+            if self._report_writer.write(path, xml_string):
+                written.append(path)
+                if options[path]["manifest"]:
+                    suite = suites[0] if len(suites) == 1 else TestSuite(
+                        name=",".join(suite.name for suite in suites),
+                        test_cases=[case for suite in suites for case in suite.test_cases])
+                    manifest = ReportManifest(path.parent, self._report_writer)
+                    manifest.update(path, suite, xml_string, options[path]["parametrize"])
+        return written
+
+
+class CollectorClient:
+    """ Producer side of the ReportCollector, one connection per process """
+
+    COLLECTOR_KEY = "JUNIT_REPORT_COLLECTOR"
+
+    _connection: ClassVar[Optional[Connection]] = None
+    _connection_key: ClassVar[Optional[tuple]] = None
+    _lock: ClassVar[threading.Lock] = threading.Lock()
+
+    @classmethod
+    def get_address(cls) -> Optional[str]:
+        return os.getenv(cls.COLLECTOR_KEY) or None
+
+    @classmethod
+    def is_available(cls, address: str) -> bool:
+        try:
+            Client(address, family="AF_UNIX").close()
+        except OSError:
+            return False
+        return True
+
+    @classmethod
+    def _connect(cls, address: str) -> Connection:
+        key = (address, os.getpid())
+        if cls._connection is None or cls._connection_key != key:
+            cls._connection = Client(address, family="AF_UNIX")
+            cls._connection_key = key
+        return cls._connection
+
+    @classmethod
+    def submit(cls, path: Union[Path, str], suites: Sequence[TestSuite], parametrize: str = "",
+               manifest: bool = False) -> bool:
+        """
+        Send report suites to the collector
+        :param path: Report path
+        :param suites: Report suites
+        :param parametrize: Suite parametrize values, used for the manifest
+        :param manifest: Update the reports directory manifest once the report is written
+        :return: True if sent, False if no collector is configured or it isn't reachable (export directly)
+        """
+        address = cls.get_address()
+        if address is None:
+            return False
+
+        message = {"path": str(Path(path).absolute()), "suites": [suite_to_dict(suite) for suite in suites],
+                   "manifest": manifest, "parametrize": parametrize}
+        data = json.dumps(message, separators=(",", ":")).encode()
+        with cls._lock:
+            try:
+                cls._connect(address).send_bytes(data)
+            except OSError:
+                cls._connection = None
+                return False
+        return True
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m junit_report.collector",
+                                     description="Collect and write reports of local reporting processes")
+    parser.add_argument("--socket", type=Path, required=True, help="Unix domain socket path")
+    parser.add_argument("--flush-interval", type=float, default=ReportCollector.DEFAULT_FLUSH_INTERVAL,
+                        help="Seconds between reports writes")
+    parser.add_argument("--idle-timeout", type=float, default=ReportCollector.DEFAULT_IDLE_TIMEOUT,
+                        help="Seconds a written report is kept for merging after its last update")
+    args = parser.parse_args(argv)
+
+    stop_event = threading.Event()
+    for signum in (signal.SIGINT, signal.SIGTERM):
+        signal.signal(signum, lambda *_: stop_event.set())
+
+    collector = ReportCollector(args.socket, flush_interval=args.flush_interval, idle_timeout=args.idle_timeout)
+    print(f"Collecting reports on {collector.address}", flush=True)
+    collector.serve(stop_event)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
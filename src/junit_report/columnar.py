@@ -0,0 +1,213 @@
+import heapq
+import math
+import threading
+from array import array
+from typing import Dict, List, Optional, Sequence, Tuple, Union
+
+from junit_xml import TestCase, TestSuite
+
+try:
+    import numpy
+except ImportError:  # numpy is optional, pure python aggregations are used without it
+    numpy = None
+
+
+class ColumnarResults:
+    """
+    Test cases results stored as columns instead of objects: suite, classname and name as ids of interned strings,
+    durations as float array and outcomes as byte array.
+    Aggregations (per-suite totals, percentiles, top N slowest) are vectorized using NumPy when it's installed,
+    columns are shared with NumPy without copying. Without NumPy, aggregations fall back to pure python.
+    Populated by JunitTestSuite and JsonJunitExporter (results argument) on each export, or using add_suite.
+    Cases without duration are stored as NaN and ignored by the durations statistics.
+    """
+
+    PASSED = 0
+    FAILURE = 1
+    ERROR = 2
+    SKIPPED = 3
+    OUTCOMES = ("passed", "failure", "error", "skipped")
+
+    def __init__(self):
+        self._strings: List[str] = list()
+        self._string_ids: Dict[str, int] = dict()
+        self._suites = array("I")
+        self._classnames = array("I")
+        self._names = array("I")
+        self._durations = array("d")
+        self._outcomes = array("B")
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._durations)
+
+    def _get_id(self, value: Optional[str]) -> int:
+        value = value or ""
+        string_id = self._string_ids.get(value)
+        if string_id is None:
+            string_id = self._string_ids[value] = len(self._strings)
+            self._strings.append(value)
+        return string_id
+
+    @classmethod
+    def get_outcome(cls, case: TestCase) -> int:
+        if case.is_error():
+            return cls.ERROR
+        if case.is_failure():
+            return cls.FAILURE
+        if case.is_skipped():
+            return cls.SKIPPED
+        return cls.PASSED
+
+    def append(self, suite: str, classname: str, name: str, elapsed_sec: Optional[float], outcome: int) -> None:
+        """
+        Add a single case result
+        :param suite: Suite name
+        :param classname: Case classname
+        :param name: Case name
+        :param elapsed_sec: Case duration, None if unknown
+        :param outcome: Outcome code - PASSED, FAILURE, ERROR or SKIPPED
+        :return: None
+        """
+        with self._lock:
+            self._suites.append(self._get_id(suite))
+            self._classnames.append(self._get_id(classname))
+            self._names.append(self._get_id(name))
+            self._durations.append(math.nan if elapsed_sec is None else elapsed_sec)
+            self._outcomes.append(outcome)
+
+    def add_suite(self, suite: TestSuite) -> None:
+        """
+        Add all test cases of an exported suite
+        :param suite: junit_xml TestSuite
+        :return: None
+        """
+        with self._lock:
+            suite_id = self._get_id(suite.name)
+            for case in suite.test_cases:
+                self._suites.append(suite_id)
+                self._classnames.append(self._get_id(case.classname))
+                self._names.append(self._get_id(case.name))
+                self._durations.append(math.nan if case.elapsed_sec is None else case.elapsed_sec)
+                self._outcomes.append(self.get_outcome(case))
+
+    def _get_suite_mask(self, suite: Optional[str]):
+        """ NumPy mask of the cases of the given suite, None for all suites """
+        if suite is None:
+            return None
+        suite_id = self._string_ids.get(suite)
+        suites = numpy.frombuffer(self._suites, dtype=numpy.uint32)
+        return suites == suite_id if suite_id is not None else numpy.zeros(len(suites), dtype=bool)
+
+    def _get_durations(self, suite: Optional[str]) -> Union["numpy.ndarray", List[float]]:
+        """ Known durations of the given suite cases, all cases if suite is not set """
+        if numpy is not None and len(self):
+            durations = numpy.frombuffer(self._durations, dtype=numpy.float64)
+            mask = self._get_suite_mask(suite)
+            if mask is not None:
+                durations = durations[mask]
+            return durations[~numpy.isnan(durations)]
+
+        suite_id = self._string_ids.get(suite, -1) if suite is not None else None
+        return [d for s, d in zip(self._suites, self._durations) if not math.isnan(d) and suite_id in (None, s)]
+
+    def get_suite_totals(self) -> Dict[str, Dict[str, Union[int, float]]]:
+        """
+        :return: Totals by suite name - {suite: {"tests", "failures", "errors", "skipped", "time"}}
+        """
+        with self._lock:
+            return self._get_suite_totals()
+
+    def _get_suite_totals(self) -> Dict[str, Dict[str, Union[int, float]]]:
+        if numpy is not None and len(self):
+            suites = numpy.frombuffer(self._suites, dtype=numpy.uint32).astype(numpy.intp)
+            outcomes = numpy.frombuffer(self._outcomes, dtype=numpy.uint8)
+            durations = numpy.nan_to_num(numpy.frombuffer(self._durations, dtype=numpy.float64))
+            size = int(suites.max()) + 1
+            time = numpy.bincount(suites, weights=durations, minlength=size)
+            counts = numpy.bincount(suites * len(self.OUTCOMES) + outcomes,
+                                    minlength=size * len(self.OUTCOMES)).reshape(size, len(self.OUTCOMES))
+            tests = counts.sum(axis=1)
+            suite_ids = numpy.flatnonzero(tests)
+            columns = zip(suite_ids.tolist(), tests[suite_ids].tolist(), counts[suite_ids].tolist(),
+                          time[suite_ids].tolist())
+            return {
+                self._strings[suite_id]: {
+                    "tests": suite_tests,
+                    "failures": suite_counts[self.FAILURE],
+                    "errors": suite_counts[self.ERROR],
+                    "skipped": suite_counts[self.SKIPPED],
+                    "time": suite_time,
+                } for suite_id, suite_tests, suite_counts, suite_time in columns
+            }
+
+        totals: Dict[int, list] = dict()
+        for suite_id, outcome, duration in zip(self._suites, self._outcomes, self._durations):
+            suite_totals = totals.get(suite_id)
+            if suite_totals is None:
+                suite_totals = totals[suite_id] = [0, 0, 0, 0, 0.0]
+            suite_totals[0] += 1
+            if outcome != self.PASSED:
+                suite_totals[outcome] += 1
+            if not math.isnan(duration):
+                suite_totals[4] += duration
+        return {
+            self._strings[suite_id]: dict(zip(("tests", "failures", "errors", "skipped", "time"), totals[suite_id]))
+            for suite_id in sorted(totals)
+        }
+
+    def get_percentiles(self, percentiles: Sequence[float], suite: str = None) -> List[float]:
+        """
+        :param percentiles: Percentiles to compute, between 0 and 100
+        :param suite: Suite name, all cases if not set
+        :return: Durations percentiles (linear interpolation), NaN if there are no durations
+        """
+        with self._lock:
+            return self._get_percentiles(percentiles, suite)
+
+    def _get_percentiles(self, percentiles: Sequence[float], suite: Optional[str]) -> List[float]:
+        durations = self._get_durations(suite)
+        if len(durations) == 0:
+            return [math.nan] * len(percentiles)
+        if numpy is not None:
+            return [float(value) for value in numpy.percentile(durations, percentiles)]
+
+        durations = sorted(durations)
+        values = list()
+        for percentile in percentiles:
+            position = percentile / 100 * (len(durations) - 1)
+            lower = math.floor(position)
+            upper = min(lower + 1, len(durations) - 1)
+            values.append(durations[lower] + (durations[upper] - durations[lower]) * (position - lower))
+        return values
+
+    def get_slowest(self, top_n: int, suite: str = None) -> List[Tuple[str, str, str, float]]:
+        """
+        :param top_n: Number of cases
+        :param suite: Suite name, all cases if not set
+        :return: Slowest cases, slowest first - (suite, classname, name, elapsed seconds)
+        """
+        with self._lock:
+            return self._get_slowest(top_n, suite)
+
+    def _get_slowest(self, top_n: int, suite: Optional[str]) -> List[Tuple[str, str, str, float]]:
+        if len(self) == 0 or top_n <= 0:
+            return list()
+        if numpy is not None:
+            durations = numpy.frombuffer(self._durations, dtype=numpy.float64)
+            candidates = ~numpy.isnan(durations)
+            mask = self._get_suite_mask(suite)
+            if mask is not None:
+                candidates &= mask
+            indexes = numpy.flatnonzero(candidates)
+            if len(indexes) > top_n:
+                indexes = indexes[numpy.argpartition(durations[indexes], -top_n)[-top_n:]]
+            indexes = indexes[numpy.argsort(-durations[indexes], kind="stable")]
+        else:
+            suite_id = self._string_ids.get(suite, -1) if suite is not None else None
+            indexes = heapq.nlargest(top_n, (i for i, (s, d) in enumerate(zip(self._suites, self._durations))
+                                             if not math.isnan(d) and suite_id in (None, s)),
+                                     key=self._durations.__getitem__)
+
+        return [(self._strings[self._suites[i]], self._strings[self._classnames[i]], self._strings[self._names[i]],
+                 self._durations[i]) for i in map(int, indexes)]
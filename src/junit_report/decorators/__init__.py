@@ -1,3 +1,4 @@
+from ._junit_benchmark_case import JunitBenchmarkCase
 from ._junit_fixture_test_case import JunitFixtureTestCase
 from ._junit_test_case import CaseFailure, JunitTestCase, TestCaseCategories
 from ._junit_test_suite import DuplicateSuiteError, JunitTestSuite
@@ -9,4 +10,5 @@ __all__ = [
     "JunitFixtureTestCase",
     "JunitTestSuite",
     "DuplicateSuiteError",
+    "JunitBenchmarkCase",
 ]
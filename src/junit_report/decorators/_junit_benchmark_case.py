@@ -0,0 +1,75 @@
+import statistics
+import time
+from typing import Any, Callable, Dict, List
+
+from ._junit_test_case import JunitTestCase
+
+
+class JunitBenchmarkCase(JunitTestCase):
+    """
+    JunitBenchmarkCase is a JunitTestCase that executes the decorated function repeatedly and records its timing
+    statistics (min, max, mean, median, stddev and operations per second) as testcase properties.
+    The function is executed warmup times without measuring and then measured up to iterations times, or until
+    time_budget seconds are exhausted (at least one measured execution is always done).
+    The case is registered to the relevant JunitTestSuite as any other JunitTestCase, its elapsed time includes
+    all executions. The value returned by the last execution is returned.
+    """
+
+    PROPERTY_PREFIX = "benchmark"
+
+    def __init__(self,
+                 iterations: int = 10,
+                 warmup: int = 1,
+                 time_budget: float = None,
+                 timer: Callable[[], float] = time.perf_counter,
+                 **kwargs) -> None:
+        """
+        :param iterations: Max number of measured executions
+        :param warmup: Number of executions before measuring
+        :param time_budget: Max seconds for all measured executions
+        :param timer: Clock function used for measuring
+        :param kwargs: JunitTestCase arguments
+        """
+        super().__init__(**kwargs)
+        self._iterations = max(iterations, 1)
+        self._warmup = warmup
+        self._time_budget = time_budget
+        self._timer = timer
+
+    def _execute_wrapped_function(self, *args, **kwargs) -> Any:
+        value = None
+        for _ in range(self._warmup):
+            value = super()._execute_wrapped_function(*args, **kwargs)
+
+        timings = list()
+        try:
+            deadline = None if self._time_budget is None else self._timer() + self._time_budget
+            while len(timings) < self._iterations and (not timings or deadline is None or self._timer() < deadline):
+                start = self._timer()
+                value = super()._execute_wrapped_function(*args, **kwargs)
+                timings.append(self._timer() - start)
+        finally:
+            for name, stat in self.get_statistics(timings).items():
+                self._case_data.case.add_property(f"{self.PROPERTY_PREFIX}.{name}", stat)
+
+        return value
+
+    def get_statistics(self, timings: List[float]) -> Dict[str, Any]:
+        """
+        :param timings: Measured execution durations in seconds
+        :return: Timing statistics by name
+        """
+        if not timings:
+            return dict()
+
+        mean = statistics.mean(timings)
+        return {
+            "iterations": len(timings),
+            "warmup": self._warmup,
+            "min_sec": round(min(timings), 9),
+            "max_sec": round(max(timings), 9),
+            "mean_sec": round(mean, 9),
+            "median_sec": round(statistics.median(timings), 9),
+            "stddev_sec": round(statistics.stdev(timings), 9) if len(timings) > 1 else 0.0,
+            "ops_per_sec": round(1 / mean, 3) if mean > 0 else float("inf"),
+        }
@@ -1,3 +1,4 @@
+import functools
 import inspect
 import re
 import time
@@ -5,7 +6,7 @@ from abc import ABC, abstractmethod
 from contextlib import suppress
 from typing import Any, Callable, Union, List, Dict
 
-import decorator
+from ..instrumentation import Instrumentation
 
 
 class JunitDecorator(ABC):
@@ -27,10 +28,29 @@ class JunitDecorator(ABC):
         self._func = function
         self._on_call()
 
-        def wrapper(_, *args, **kwargs):
+        @self._wraps(function)
+        def wrapper(*args, **kwargs):
             return self._wrapper(function, *args, **kwargs)
 
-        return decorator.decorator(wrapper, function)
+        return wrapper
+
+    @staticmethod
+    def _wraps(function: Callable) -> Callable[[Callable], Callable]:
+        """
+        Signature preserving wrapper factory, pytest resolves the wrapper arguments (fixtures and parameters) from
+        the decorated function signature. Unlike decorator.decorator, no function is compiled per decorated function
+        and the wrapper is called directly, without an extra call layer.
+        :param function: Decorated function
+        :return: Decorator that copies the function metadata and signature to the wrapper
+        """
+
+        def update_wrapper(wrapper: Callable) -> Callable:
+            wrapper = functools.wraps(function)(wrapper)
+            with suppress(TypeError, ValueError):
+                wrapper.__signature__ = inspect.signature(function)
+            return wrapper
+
+        return update_wrapper
 
     def __str__(self) -> str:
         return f"{self.__class__.__name__} {self.name}"
@@ -106,4 +126,5 @@ class JunitDecorator(ABC):
         :return: None
         """
         self._start_time = time.time()
-        self._stack_locals = [frame_info.frame.f_locals for frame_info in inspect.stack()]
+        with Instrumentation.measure(Instrumentation.STACK_INTROSPECTION):
+            self._stack_locals = [frame_info.frame.f_locals for frame_info in inspect.stack()]
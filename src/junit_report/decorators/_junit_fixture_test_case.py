@@ -1,8 +1,6 @@
 from types import GeneratorType
 from typing import Callable, Union
 
-import decorator
-
 from ._junit_test_case import JunitTestCase, TestCaseCategories
 from ._junit_test_suite import JunitTestSuite
 from ..utils import Utils
@@ -21,15 +19,19 @@ class JunitFixtureTestCase(JunitTestCase):
     _generator: Union[GeneratorType, None]
     _inner_test_case_exception: bool
 
-    def __init__(self) -> None:
-        super().__init__()
+    def __init__(self, **kwargs) -> None:
+        """
+        :param kwargs: JunitTestCase arguments
+        """
+        super().__init__(**kwargs)
         self._generator = None
         self._inner_test_case_exception = False
 
     def __call__(self, function: Callable) -> Callable:
         self._func = function
 
-        def wrapper(_, *args, **kwargs):
+        @self._wraps(function)
+        def wrapper(*args, **kwargs):
             value = self._wrapper(function, *args, **kwargs)
             yield value
             try:
@@ -42,7 +44,7 @@ class JunitFixtureTestCase(JunitTestCase):
             finally:
                 JunitTestSuite.fixture_cleanup(self._case_data, self.get_suite_key())
 
-        return decorator.decorator(wrapper, function)
+        return wrapper
 
     @classmethod
     def _teardown_yield_fixture(cls, it) -> None:
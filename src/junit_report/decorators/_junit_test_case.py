@@ -1,4 +1,3 @@
-import traceback
 from contextlib import suppress
 from typing import Any, Callable, Dict, List, Union
 
@@ -6,7 +5,13 @@ import pytest
 
 from ._junit_decorator import JunitDecorator
 from ._junit_test_suite import JunitTestSuite
+from ..instrumentation import Instrumentation
+from ..output_capture import CaseOutputCapture
+from ..performance_budget import PerformanceBudget
+from ..profiler import CaseProfiler
+from ..resource_usage import CaseResourceUsage
 from ..utils import TestCaseCategories, TestCaseData, CaseFailure, Utils, PytestUtils
+from ..watchdog import HangWatchdog
 
 
 class JunitTestCase(JunitDecorator):
@@ -19,12 +24,44 @@ class JunitTestCase(JunitDecorator):
     _stack_locals: List[Dict[str, Any]]
     _case_data: Union[TestCaseData, None]
     _pytest_function: Union[pytest.Function, None]
-
-    def __init__(self) -> None:
+    _output_capture: Union[CaseOutputCapture, None]
+
+    def __init__(self,
+                 capture_output: bool = False,
+                 export_output_on_success: bool = False,
+                 output_max_bytes: int = CaseOutputCapture.DEFAULT_MAX_BYTES,
+                 profile: bool = None,
+                 profile_threshold: float = None,
+                 resource_usage: bool = None,
+                 trace_memory: bool = None,
+                 max_duration: float = None,
+                 max_cpu_time: float = None,
+                 max_memory_kb: float = None,
+                 budget_warn_only: bool = False) -> None:
+        """
+        :param capture_output: Capture case stdout, stderr and logging records into system-out and system-err
+        :param export_output_on_success: Export captured output also when the case succeeded
+        :param output_max_bytes: Max bytes kept for each of system-out and system-err
+        :param profile: Run the case under cProfile, see CaseProfiler
+        :param profile_threshold: Profile only the next execution after the case took longer than threshold seconds
+        :param resource_usage: Attach case resource usage (getrusage deltas) as properties, see CaseResourceUsage
+        :param trace_memory: Attach case tracemalloc peak as property
+        :param max_duration: Duration budget in seconds, see PerformanceBudget
+        :param max_cpu_time: CPU time budget in seconds
+        :param max_memory_kb: Memory budget (tracemalloc peak) in kilobytes
+        :param budget_warn_only: Record budget measured values as properties without failing the case
+        """
         super().__init__()
         self._stack_locals = list()
         self._case_data = None
         self._pytest_function = None
+        self._capture_output = capture_output
+        self._export_output_on_success = export_output_on_success
+        self._output_max_bytes = output_max_bytes
+        self._output_capture = None
+        self._profiler = CaseProfiler(profile, profile_threshold)
+        self._resource_usage = CaseResourceUsage(resource_usage, trace_memory)
+        self._budget = PerformanceBudget(max_duration, max_cpu_time, max_memory_kb, budget_warn_only)
 
     @property
     def name(self):
@@ -34,14 +71,51 @@ class JunitTestCase(JunitDecorator):
         super()._on_wrapper_start(function)
         case = Utils.get_new_test_case(function, self._get_class_name(), TestCaseCategories.FUNCTION)
         self._case_data = TestCaseData(_start_time=self._start_time, case=case, _func=function)
+        if HangWatchdog.is_active():
+            HangWatchdog.case_started(case, self._get_running_suite())
+        self._start_output_capture()
+        if self._resource_usage.enabled:
+            self._resource_usage.start()
+        if self._budget.enabled:
+            self._budget.start()
+        self._profiler.start(self._func)
         self._pytest_function = [
             stack_local for stack_local in self._stack_locals
             if "self" in stack_local and isinstance(stack_local["self"], pytest.Function)][0]["self"]
 
+    def _get_running_suite(self) -> Union[JunitTestSuite, None]:
+        """ Nearest suite in the case call stack, None if the case isn't called from a suite function """
+        for f_locals in self._stack_locals:
+            if "function" in f_locals and isinstance(f_locals.get("self"), JunitTestSuite):
+                return f_locals["self"]
+        return None
+
+    def _start_output_capture(self):
+        if self._capture_output:
+            self._output_capture = CaseOutputCapture(max_bytes=self._output_max_bytes)
+            self._output_capture.start()
+
+    def _stop_output_capture(self):
+        """
+        Stop output capture and set the captured output to the case. Output (and log records formatting)
+        is collected only for failed cases unless export_output_on_success is set
+        :return: None
+        """
+        if self._output_capture is None:
+            return
+
+        capture, self._output_capture = self._output_capture, None
+        capture.stop()
+        case = self._case_data.case
+        if case.failures or self._export_output_on_success:
+            case.stdout = capture.get_stdout() or None
+            case.stderr = capture.get_stderr() or None
+
     def _add_failure(self, e: BaseException, message_prefix: str = ""):
         message = f"{message_prefix} {str(e)}" if message_prefix else str(e)
-        failure = CaseFailure(message=message, output=traceback.format_exc(), type=e.__class__.__name__)
-        self._case_data.case.failures.append(failure)
+        with Instrumentation.measure(Instrumentation.TRACEBACK_CAPTURE):
+            failure = CaseFailure.from_exception(e, message)
+        self._case_data.case.add_failure(failure)
 
     def _on_exception(self, e: BaseException):
         if Utils.is_case_exception_already_raised(e):
@@ -50,9 +124,47 @@ class JunitTestCase(JunitDecorator):
         self._add_failure(e)
         raise e
 
+    def _export_profile(self, stats, suite_key: Union[Callable, None]):
+        """
+        Save case profile into the suite report directory and attach it to the case
+        :param stats: Collected pstats.Stats
+        :param suite_key: Suite function key
+        :return: None
+        """
+        suite = JunitTestSuite.get_suite(suite_key)
+        report_dir = suite.report_dir if suite else Utils.get_report_dir(None)
+        case = self._case_data.case
+        properties = self._profiler.export(stats, f"{case.classname}.{case.name}", report_dir)
+        for name, value in properties.items():
+            case.add_property(name, value)
+        case.stdout = "\n".join(output for output in (case.stdout, self._profiler.get_attachment(properties)) if output)
+
+    def _check_budget(self):
+        case = self._case_data.case
+        failure = self._budget.check(case.elapsed_sec)
+        if failure is not None:
+            case.add_failure(failure)
+        for name, value in self._budget.get_properties().items():
+            case.add_property(name, value)
+
     def _on_wrapper_end(self):
+        HangWatchdog.case_finished(self._case_data.case)
+        stats = self._profiler.stop()
+        self._budget.stop()
+        if self._resource_usage.enabled:
+            self._resource_usage.stop()
+            for name, value in self._resource_usage.get_properties().items():
+                self._case_data.case.add_property(name, value)
         self._case_data.set_fin_time()
-        JunitTestSuite.register_case(self._case_data, self.get_suite_key())
+        if self._budget.enabled:
+            self._check_budget()
+        self._stop_output_capture()
+        self._profiler.update_threshold(self._func, self._case_data.case.elapsed_sec, stats is not None)
+
+        suite_key = self.get_suite_key()
+        if stats is not None:
+            self._export_profile(stats, suite_key)
+        JunitTestSuite.register_case(self._case_data, suite_key)
 
     def get_suite_key(self) -> Union[Callable, None]:
         """
@@ -61,7 +173,7 @@ class JunitTestCase(JunitDecorator):
         collect its parameters and record them into the test case.
         :return: Wrapped Suite function instance
         """
-        with suppress(AttributeError):
+        with suppress(AttributeError), Instrumentation.measure(Instrumentation.SUITE_LOOKUP):
             suite_func = self.get_suite()
             return suite_func
 
@@ -1,13 +1,31 @@
 import datetime
 import os
-import traceback
+import threading
+import time
+from contextlib import suppress
 from pathlib import Path
-from typing import Callable, ClassVar, Dict, List, Union
+from typing import TYPE_CHECKING, Callable, ClassVar, Dict, List, Optional, Tuple, Union
 
-from junit_xml import TestCase, TestSuite, to_xml_report_string
+from junit_xml import to_xml_report_string
 
 from ._junit_decorator import JunitDecorator
-from ..utils import Utils, TestCaseCategories, TestCaseData, CaseFailure, PytestUtils
+from ..case_channel import CaseChannel
+from ..collector import CollectorClient
+from ..incremental_report import IncrementalSuiteReport
+from ..instrumentation import Instrumentation
+from ..journal import CaseJournal
+from ..payload_store import PayloadStore
+from ..performance_budget import PerformanceBudget
+from ..profiler import CaseProfiler
+from ..report_manifest import ReportManifest
+from ..report_writer import ReportWriter
+from ..utils import (Utils, TestCaseCategories, TestCaseData, CaseFailure, CaseRecord, PytestUtils, ReportTestSuite,
+                     ReportTestCase)
+from ..watchdog import CaseHang, HangWatchdog
+
+if TYPE_CHECKING:  # avoid importing numpy and sqlite3 with the decorators unless results or history are collected
+    from ..columnar import ColumnarResults
+    from ..history import HistoryStore
 
 
 class DuplicateSuiteError(KeyError):
@@ -27,18 +45,68 @@ class JunitTestSuite(JunitDecorator):
 
     _junit_suites: ClassVar[Dict[Callable, "JunitTestSuite"]] = dict()
     _report_dir: Path
-    _cases = List[TestCase]
+    _cases = List[TestCaseData]
     _func: Union[Callable, None]
-    suite: Union[TestSuite, None]
+    suite: Union[ReportTestSuite, None]
 
     XML_REPORT_FORMAT = "junit_{suite_name}_report{args}.xml"
+    HISTORY_DB_KEY = "JUNIT_REPORT_HISTORY_DB"  # HistoryStore.HISTORY_DB_KEY, read without importing the history module
 
-    def __init__(self, report_dir: Path = None, custom_filename: str = None):
+    def __init__(self,
+                 report_dir: Path = None,
+                 custom_filename: str = None,
+                 report_writer: ReportWriter = None,
+                 profile: bool = None,
+                 profile_threshold: float = None,
+                 max_duration: float = None,
+                 max_cpu_time: float = None,
+                 max_memory_kb: float = None,
+                 budget_warn_only: bool = False,
+                 history_db: Path = None,
+                 manifest: bool = None,
+                 results: "ColumnarResults" = None,
+                 collect_child_processes: bool = False,
+                 journal: bool = None,
+                 hang_timeout: float = None,
+                 flush_every_cases: int = None,
+                 flush_interval: float = None,
+                 payload_threshold: int = None):
         """
         :param report_dir: Target directory, created if not exists
         :param custom_filename: If set, xml report will set to <exported_filename>.xml
+        :param report_writer: Writer used to export the report, default writer skips unchanged reports and
+                              replaces changed reports atomically
+        :param profile: Run the suite under cProfile, see CaseProfiler
+        :param profile_threshold: Profile only the next execution after the suite took longer than threshold seconds
+        :param max_duration: Suite duration budget in seconds, see PerformanceBudget. When exceeded, a suite
+                             test case with PerformanceBudgetExceeded failure is added to the report
+        :param max_cpu_time: Suite CPU time budget in seconds
+        :param max_memory_kb: Suite memory budget (tracemalloc peak) in kilobytes
+        :param budget_warn_only: Record budget measured values as suite properties without failing
+        :param history_db: Store exported results in the given HistoryStore database, if not set
+                           JUNIT_REPORT_HISTORY_DB environment variable is used
+        :param manifest: Maintain the reports directory manifest (see ReportManifest), if not set
+                         JUNIT_REPORT_MANIFEST environment variable is used
+        :param results: Columnar results container populated with the exported cases
+        :param collect_child_processes: Register cases executed by child processes started during the suite,
+                                        see CaseChannel
+        :param journal: Journal registered cases for recovering the report if the process dies before the suite
+                        is exported (see CaseJournal), if not set JUNIT_REPORT_JOURNAL environment variable is used
+        :param hang_timeout: Write a partial report with the stacks of all threads once a case runs for longer than
+                             hang_timeout seconds (see HangWatchdog), if not set JUNIT_REPORT_HANG_TIMEOUT environment
+                             variable is used
+        :param flush_every_cases: Export an interim report every flush_every_cases registered cases while the suite
+                                  is running, only the cases registered since the previous flush are rendered and
+                                  appended to the report (see IncrementalSuiteReport)
+        :param flush_interval: Export an interim report on case registration if flush_interval seconds passed since
+                               the previous flush
+        :param payload_threshold: Failure messages, outputs and captured output larger than payload_threshold bytes
+                                  are stored in the reports directory and replaced by a truncated preview with a
+                                  reference (see PayloadStore), if not set JUNIT_REPORT_PAYLOAD_THRESHOLD environment
+                                  variable is used
         """
         super().__init__()
+        self._report_writer = report_writer or ReportWriter()
         self._report_dir = Utils.get_report_dir(report_dir)
         self._cases = list()
         self.suite = None
@@ -46,15 +114,102 @@ class JunitTestSuite(JunitDecorator):
         self._has_uncollected_fixtures = False
         self._self_test_case = None
         self._custom_filename = custom_filename
+        self._tracebacks = dict()
+        self._profiler = CaseProfiler(profile, profile_threshold)
+        self._budget = PerformanceBudget(max_duration, max_cpu_time, max_memory_kb, budget_warn_only)
+        self._budget_test_case = None
+        self._properties = dict()
+        self._is_running = False
+        self._owner_pid = None
+        self._history = self._get_history_store(history_db or os.getenv(self.HISTORY_DB_KEY))
+        self._results = results
+        self._manifest = None
+        if ReportManifest.is_enabled(manifest):
+            self._manifest = ReportManifest(self._report_dir, self._report_writer)
+        self._channel = CaseChannel(self._add_child_case) if collect_child_processes else None
+        self._journal = CaseJournal(self._report_dir) if CaseJournal.is_enabled(journal) else None
+        hang_timeout = HangWatchdog.get_timeout(hang_timeout)
+        self._watchdog = HangWatchdog(hang_timeout, self._export_partial, owner=self) if hang_timeout else None
+        self._flush_every_cases = flush_every_cases
+        self._flush_interval = flush_interval
+        self._interim_report = None
+        self._flushed_cases = 0
+        self._last_flush = time.monotonic()
+        # cases are also added by the child processes channel readers and partially exported by the watchdog
+        self._lock = threading.RLock()
+        self._payload_store = PayloadStore.from_threshold(self._report_dir, payload_threshold, self._report_writer)
+
+    @staticmethod
+    def _get_history_store(history_db: Union[Path, str, None]) -> Optional["HistoryStore"]:
+        """ HistoryStore of the given database, the history module (and sqlite3) is imported only if it's set """
+        if not history_db:
+            return None
+
+        from ..history import HistoryStore
+        return HistoryStore(history_db)
+
+    @property
+    def report_dir(self) -> Path:
+        return self._report_dir
 
     def _on_call(self):
         self._register()
 
+    def _on_wrapper_start(self, function):
+        super()._on_wrapper_start(function)
+        self._is_running = True
+        self._owner_pid = os.getpid()
+        self._last_flush = time.monotonic()
+        if self._channel is not None:
+            self._channel.start()
+        if self._watchdog is not None:
+            self._watchdog.start()
+        if self._budget.enabled:
+            self._budget.start()
+        self._profiler.start(self._func)
+
     def _on_wrapper_end(self, force=False):
-        self.suite = TestSuite(
-            name=f"{self._get_class_name()}_{self.name}", test_cases=self._get_cases(), timestamp=self._timestamp
+        if self._is_running:
+            self._on_suite_end()
+        self.suite = ReportTestSuite(
+            name=f"{self._get_class_name()}_{self.name}",
+            test_cases=self._get_cases(),
+            timestamp=self._timestamp,
+            properties=self._properties or None,
         )
-        self._export(self.suite, force)
+        with Instrumentation.measure(Instrumentation.EXPORT):
+            self._export(self.suite, force)
+
+    def _on_suite_end(self):
+        """
+        Executed once the suite function finished its execution (unlike _on_wrapper_end that is also executed when
+        the suite is collected externally)
+        :return: None
+        """
+        self._is_running = False
+        if self._watchdog is not None:
+            self._watchdog.stop()
+        if self._channel is not None:
+            self._channel.stop()
+        stats = self._profiler.stop()
+        self._budget.stop()
+        elapsed_sec = time.time() - self._start_time
+
+        self._profiler.update_threshold(self._func, elapsed_sec, stats is not None)
+        if stats is not None:
+            suite_name = f"{self._get_class_name()}.{self.name}"
+            self._properties.update(self._profiler.export(stats, suite_name, self._report_dir))
+        if self._budget.enabled:
+            self._check_budget(elapsed_sec)
+
+    def _check_budget(self, elapsed_sec: float):
+        failure = self._budget.check(elapsed_sec)
+        self._properties.update(self._budget.get_properties())
+        if failure is not None:
+            self._budget_test_case = Utils.get_new_test_case(self._func, self._get_class_name(),
+                                                             TestCaseCategories.SUITE)
+            self._budget_test_case.elapsed_sec = elapsed_sec
+            self._budget_test_case.add_failure(failure)
 
     @classmethod
     def get_report_file_name(cls, suite_name: str, args: str = None, custom_filename: str = None):
@@ -96,23 +251,68 @@ class JunitTestSuite(JunitDecorator):
         :param suite_func: Wrapped function as cases key
         :return: None
         """
-        if cls.is_suite_exist(suite_func):
-            cls._add_case(cls.get_suite(suite_func), test_data)
+        with Instrumentation.measure(Instrumentation.REGISTER_CASE):
+            suite = cls._junit_suites.get(suite_func)
+            # a process that runs the suite itself (e.g. a subprocess running its own tests) reports its cases
+            # locally, only cases of suites started by another process are sent to the parent
+            is_local_suite = suite is not None and suite._owner_pid == os.getpid()
+            if not is_local_suite and CaseChannel.send(test_data):
+                return
+            if suite is not None:
+                cls._add_case(suite, test_data)
 
     def _register(self):
         if self._func in JunitTestSuite._junit_suites:
             raise DuplicateSuiteError(f"Suite {self.name} already exist")
         JunitTestSuite._junit_suites[self._func] = self
 
-    def _get_cases(self):
-        if self._self_test_case:
-            return [data.case for data in self._cases] + [self._self_test_case]
-        return [data.case for data in self._cases]
+    def _get_cases(self) -> List[ReportTestCase]:
+        """ Convert the registered case records into the exported format """
+        suite_cases = [case for case in (self._self_test_case, self._budget_test_case) if case]
+        return [data.case.to_test_case() for data in self._cases] + [case.to_test_case() for case in suite_cases]
 
     def _add_case(self, test_data):
         if test_data.case.category == "fixture":
             self._has_uncollected_fixtures = True
-        return self._cases.append(test_data)
+        if self._journal is not None:
+            self._journal.append_case(f"{self._get_class_name()}_{self.name}", test_data, self._custom_filename)
+        with self._lock:
+            self._cases.append(test_data)
+            if self._is_flush_required():
+                self._flush()
+
+    def _is_flush_required(self) -> bool:
+        pending = len(self._cases) - self._flushed_cases
+        if pending <= 0:
+            return False
+        if self._flush_every_cases and pending >= self._flush_every_cases:
+            return True
+        return bool(self._flush_interval) and time.monotonic() - self._last_flush >= self._flush_interval
+
+    def _flush(self) -> None:
+        """
+        Append the cases registered since the previous flush to the interim report, the cases already flushed
+        are not rendered again. The interim report is replaced by the full report once the suite is exported
+        :return: None
+        """
+        with self._lock, Instrumentation.measure(Instrumentation.EXPORT):
+            cases = [data.case.to_test_case() for data in self._cases[self._flushed_cases:]]
+            if self._interim_report is None:
+                suite_name = f"{self._get_class_name()}_{self.name}"
+                path = self._report_dir.joinpath(self.get_report_file_name(
+                    suite_name=suite_name, args=self._get_parametrize_as_str(), custom_filename=self._custom_filename))
+                os.makedirs(self._report_dir, exist_ok=True)
+                self._interim_report = IncrementalSuiteReport(path, suite_name, str(self._timestamp),
+                                                              self._report_writer)
+
+            Utils.resolve_tracebacks(cases, self._tracebacks)
+            self._interim_report.append(self._externalize_payloads(cases))
+            self._flushed_cases += len(cases)
+            self._last_flush = time.monotonic()
+
+    def _add_child_case(self, case: CaseRecord, parametrize: List = None):
+        """ Register case received from a child process """
+        self._add_case(TestCaseData(case=case, _func=self._func, _start_time=self._start_time, parametrize=parametrize))
 
     def _get_parametrize_as_str(self) -> str:
         """
@@ -124,7 +324,7 @@ class JunitTestSuite(JunitDecorator):
             return "_".join(str(tup[1]) for tup in parameterize)
         return ""
 
-    def _export(self, suite: TestSuite, force=False) -> None:
+    def _export(self, suite: ReportTestSuite, force=False) -> None:
         """
         Export test suite to JUnit xml file
         :param suite: TestSuite to export
@@ -138,18 +338,91 @@ class JunitTestSuite(JunitDecorator):
             path = self._report_dir.joinpath(
                 self.get_report_file_name(suite_name=suite.name, args=values, custom_filename=self._custom_filename)
             )
-            xml_string = to_xml_report_string([suite])
+            if Instrumentation.export_properties:
+                suite.properties = dict(suite.properties or dict(), **Instrumentation.get_properties())
+
+            # the cases are cleared even if a side effect failed (e.g. unavailable history database), otherwise
+            # they would be exported again with the cases of the next run
+            try:
+                Utils.resolve_tracebacks(suite.test_cases, self._tracebacks)
+                self._externalize_payloads(suite.test_cases)
+                if not CollectorClient.submit(path, [suite], values, self._manifest is not None):
+                    with Instrumentation.measure(Instrumentation.RENDER):
+                        xml_string = to_xml_report_string([suite])
+
+                    os.makedirs(self._report_dir, exist_ok=True)
+                    written = self._report_writer.write(path, xml_string)
+                    if self._manifest is not None and written:
+                        self._manifest.update(path, suite, xml_string, values)
+                self._on_suite_exported(suite, path)
+            finally:
+                self.clear_cases()
+
+    def _on_suite_exported(self, suite: ReportTestSuite, path: Path) -> None:
+        """
+        Update the journal, sidecar, results and history with the exported suite
+        :param suite: Exported suite
+        :param path: Report path
+        :return: None
+        """
+        if self._journal is not None:
+            self._journal.suite_exported(suite.name)
+        if Instrumentation.export_sidecar:
+            Instrumentation.write_sidecar(self._report_dir, self._report_writer)
+        if self._results is not None:
+            self._results.add_suite(suite)
+        if self._history is not None:
+            with Instrumentation.measure(Instrumentation.HISTORY):
+                self._history.ingest_suite(suite, source=path)
 
+    def _export_partial(self, hanging_cases: List[Tuple[CaseRecord, float]], stacks: str) -> None:
+        """
+        Export the completed cases and the hanging cases (as errors with the threads stacks) while the suite is
+        still running, the report is replaced when the suite finishes
+        :param hanging_cases: Hanging cases and their elapsed seconds
+        :param stacks: Formatted stacks of all threads
+        :return: None
+        """
+        with self._lock:
+            test_cases = self._get_cases()
+            for case, elapsed_sec in hanging_cases:
+                test_case = case.to_test_case()
+                test_case.elapsed_sec = elapsed_sec
+                test_case.add_error_info(message=f"Case is still running after {elapsed_sec:.1f} seconds",
+                                         output=stacks, error_type=CaseHang.__name__)
+                test_cases.append(test_case)
+
+            properties = {**self._properties, HangWatchdog.PARTIAL_PROPERTY: "true"}
+            suite = ReportTestSuite(name=f"{self._get_class_name()}_{self.name}", test_cases=test_cases,
+                                    timestamp=self._timestamp, properties=properties)
+            path = self._report_dir.joinpath(self.get_report_file_name(
+                suite_name=suite.name, args=self._get_parametrize_as_str(), custom_filename=self._custom_filename))
+            Utils.resolve_tracebacks(suite.test_cases, dict())
+            self._externalize_payloads(suite.test_cases)
             os.makedirs(self._report_dir, exist_ok=True)
-            with open(path, "w") as f:
-                f.write(xml_string)
+            self._report_writer.write(path, to_xml_report_string([suite]))
+            # the partial report replaced the interim report, the next flush rewrites it from the first case
+            self._interim_report, self._flushed_cases = None, 0
 
-            self.clear_cases()
+    def _externalize_payloads(self, test_cases: List[ReportTestCase]) -> List[ReportTestCase]:
+        """ Replace large payloads of the given cases with references to the payload store, if enabled """
+        if self._payload_store is None:
+            return test_cases
+        return self._payload_store.externalize(test_cases)
 
     def clear_cases(self):
         """ Delete all cases from suite """
-        self._cases = list()
-        self.suite.test_cases = list()
+        with self._lock:
+            if self._interim_report is not None:
+                with suppress(OSError):
+                    os.unlink(self._interim_report.checkpoint_path)
+                self._interim_report = None
+            self._flushed_cases = 0
+            self._cases = list()
+            self.suite.test_cases = list()
+            self._tracebacks = dict()
+            self._budget_test_case = None
+            self._properties = dict()
 
     @classmethod
     def fixture_cleanup(cls, test_data, suite_func: Callable):
@@ -171,6 +444,8 @@ class JunitTestSuite(JunitDecorator):
         :return:
         """
         self._has_uncollected_fixtures = False
+        if self.suite:
+            self.suite.test_cases = self._get_cases()
         self._export(self.suite)
 
     def _on_exception(self, e: BaseException):
@@ -183,6 +458,6 @@ class JunitTestSuite(JunitDecorator):
         self._self_test_case = Utils.get_new_test_case(self._func, self._get_class_name(), TestCaseCategories.SUITE)
 
         case_data = TestCaseData(_start_time=self._start_time, case=self._self_test_case, _func=self._func)
-        failure = CaseFailure(message=str(exception), output=traceback.format_exc(), type=exception.__class__.__name__)
-        case_data.case.failures.append(failure)
+        failure = CaseFailure.from_exception(exception)
+        case_data.case.add_failure(failure)
         raise exception
@@ -0,0 +1,306 @@
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from contextlib import closing, contextmanager
+from pathlib import Path
+from typing import ClassVar, Dict, Iterator, List, Optional, Set, Tuple, Union
+from xml.etree import ElementTree
+
+from junit_xml import TestCase, TestSuite
+
+CaseResults = Tuple[str, str, Optional[str], Optional[float], str]
+ReportSuiteResults = Tuple[str, Optional[str], float, List[CaseResults]]
+
+
+class HistoryStore:
+    """
+    SQLite database of test suites and cases results, used for duration trends across runs.
+    Each suite is stored with its cases (classname, name, parametrize key, elapsed time and outcome) under a run,
+    by default all suites exported by the same process belong to the same run.
+    Suites can be ingested at export time (JunitTestSuite history_db argument or JUNIT_REPORT_HISTORY_DB
+    environment variable) or from a directory of existing reports.
+    The database is opened in WAL mode, so concurrent writers (e.g. pytest-xdist workers) and readers are supported.
+    """
+
+    HISTORY_DB_KEY = "JUNIT_REPORT_HISTORY_DB"
+    RUN_KEY = "JUNIT_REPORT_RUN"
+    DEFAULT_TIMEOUT = 30.0
+
+    PASSED = "passed"
+    FAILURE = "failure"
+    ERROR = "error"
+    SKIPPED = "skipped"
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS runs (
+            id INTEGER PRIMARY KEY,
+            name TEXT NOT NULL UNIQUE,
+            created REAL NOT NULL
+        );
+        CREATE TABLE IF NOT EXISTS suites (
+            id INTEGER PRIMARY KEY,
+            run_id INTEGER NOT NULL REFERENCES runs(id),
+            name TEXT NOT NULL,
+            timestamp TEXT,
+            elapsed_sec REAL NOT NULL,
+            tests INTEGER NOT NULL,
+            failures INTEGER NOT NULL,
+            errors INTEGER NOT NULL,
+            skipped INTEGER NOT NULL,
+            source TEXT
+        );
+        CREATE TABLE IF NOT EXISTS cases (
+            id INTEGER PRIMARY KEY,
+            run_id INTEGER NOT NULL REFERENCES runs(id),
+            suite_id INTEGER NOT NULL REFERENCES suites(id),
+            suite TEXT NOT NULL,
+            classname TEXT NOT NULL,
+            name TEXT NOT NULL,
+            parametrize TEXT NOT NULL,
+            category TEXT,
+            elapsed_sec REAL,
+            outcome TEXT NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS suites_name_idx ON suites (name, run_id);
+        CREATE INDEX IF NOT EXISTS cases_key_idx ON cases (suite, classname, name, parametrize, run_id);
+        CREATE INDEX IF NOT EXISTS cases_run_idx ON cases (run_id);
+    """
+
+    _run_name: ClassVar[Optional[str]] = None
+    _initialized: ClassVar[Set[Path]] = set()
+    _lock: ClassVar[threading.Lock] = threading.Lock()
+
+    def __init__(self, path: Union[Path, str], timeout: float = DEFAULT_TIMEOUT):
+        """
+        :param path: SQLite database file, created if not exists
+        :param timeout: Seconds to wait for a locked database
+        """
+        self._path = Path(path).absolute()
+        self._timeout = timeout
+
+    @property
+    def path(self) -> Path:
+        return self._path
+
+    @classmethod
+    def from_env(cls) -> Optional["HistoryStore"]:
+        """
+        :return: HistoryStore of JUNIT_REPORT_HISTORY_DB environment variable, None if not set
+        """
+        path = os.getenv(cls.HISTORY_DB_KEY)
+        return cls(path) if path else None
+
+    @classmethod
+    def get_run_name(cls) -> str:
+        """
+        :return: Current run name - JUNIT_REPORT_RUN environment variable if set, otherwise generated once per process
+        """
+        run_name = os.getenv(cls.RUN_KEY)
+        if run_name:
+            return run_name
+        if cls._run_name is None:
+            cls._run_name = f"{time.strftime('%Y%m%dT%H%M%S')}-{uuid.uuid4().hex[:8]}"
+        return cls._run_name
+
+    @staticmethod
+    def split_case_name(name: str) -> Tuple[str, str]:
+        """
+        Split parametrized case name into name and parametrize key, e.g. "test[a=1, b=2]" -> ("test", "a=1, b=2")
+        :param name: Case name as exported to the report
+        :return: Case name and parametrize key (empty if not parametrized)
+        """
+        if name.endswith("]") and "[" in name:
+            index = name.index("[")
+            return name[:index], name[index + 1:-1]
+        return name, ""
+
+    @classmethod
+    def get_outcome(cls, case: TestCase) -> str:
+        if case.is_error():
+            return cls.ERROR
+        if case.is_failure():
+            return cls.FAILURE
+        if case.is_skipped():
+            return cls.SKIPPED
+        return cls.PASSED
+
+    @contextmanager
+    def connect(self) -> Iterator[sqlite3.Connection]:
+        """
+        Open a connection to the database, committed on exit or rolled back on exception
+        :return: Connection context manager
+        """
+        with self._lock:
+            if self._path not in self._initialized or not self._path.exists():
+                os.makedirs(self._path.parent, exist_ok=True)
+                with closing(sqlite3.connect(str(self._path), timeout=self._timeout)) as connection:
+                    connection.execute("PRAGMA journal_mode=WAL")
+                    connection.executescript(self.SCHEMA)
+                self._initialized.add(self._path)
+
+        with closing(sqlite3.connect(str(self._path), timeout=self._timeout)) as connection:
+            with connection:
+                yield connection
+
+    def ingest_suite(self, suite: TestSuite, run: str = None, source: Union[Path, str] = None) -> int:
+        """
+        Store exported test suite and its cases
+        :param suite: junit_xml TestSuite
+        :param run: Run name, current run if not set
+        :param source: Report path
+        :return: Stored suite id
+        """
+        timestamp = suite.timestamp.isoformat() if hasattr(suite.timestamp, "isoformat") else suite.timestamp
+        cases = [(case.classname or "", case.name, case.category, case.elapsed_sec, self.get_outcome(case))
+                 for case in suite.test_cases]
+        elapsed_sec = sum(case[3] or 0 for case in cases)
+        return self._insert(run, suite.name, timestamp, elapsed_sec, cases, source)
+
+    @classmethod
+    def read_report(cls, path: Union[Path, str]) -> Iterator[ReportSuiteResults]:
+        """
+        Parse the suites results of a JUnit xml report
+        :param path: Report path
+        :return: Iterator of (suite name, timestamp, elapsed seconds, cases) of each test suite, each case is
+                 (classname, name, category, elapsed seconds, outcome)
+        """
+        root = ElementTree.parse(str(path)).getroot()
+        suites = [root] if root.tag == "testsuite" else root.iter("testsuite")
+        for suite in suites:
+            cases = list()
+            for case in suite.iter("testcase"):
+                if case.find("error") is not None:
+                    outcome = cls.ERROR
+                elif case.find("failure") is not None:
+                    outcome = cls.FAILURE
+                elif case.find("skipped") is not None:
+                    outcome = cls.SKIPPED
+                else:
+                    outcome = cls.PASSED
+                elapsed_sec = float(case.get("time")) if case.get("time") else None
+                cases.append((case.get("classname", ""), case.get("name", ""), case.get("class"), elapsed_sec,
+                              outcome))
+
+            elapsed_sec = float(suite.get("time")) if suite.get("time") else sum(case[3] or 0 for case in cases)
+            yield suite.get("name", ""), suite.get("timestamp"), elapsed_sec, cases
+
+    def ingest_report(self, path: Union[Path, str], run: str = None) -> List[int]:
+        """
+        Store all test suites of a JUnit xml report
+        :param path: Report path
+        :param run: Run name, current run if not set
+        :return: Stored suites ids
+        """
+        return [self._insert(run, name, timestamp, elapsed_sec, cases, path)
+                for name, timestamp, elapsed_sec, cases in self.read_report(path)]
+
+    def ingest_reports(self, report_dir: Union[Path, str], run: str = None, pattern: str = "*.xml") -> List[int]:
+        """
+        Store all reports of a directory, ingested as a single run
+        :param report_dir: Reports directory
+        :param run: Run name, new run if not set
+        :param pattern: Reports glob pattern
+        :return: Stored suites ids
+        """
+        run = run or f"{Path(report_dir).name}-{uuid.uuid4().hex[:8]}"
+        suite_ids = list()
+        for path in sorted(Path(report_dir).glob(pattern)):
+            suite_ids.extend(self.ingest_report(path, run))
+        return suite_ids
+
+    def _insert(self, run: Optional[str], suite_name: str, timestamp: Optional[str], elapsed_sec: float,
+                cases: List[CaseResults],
+                source: Union[Path, str, None]) -> int:
+        counts = {outcome: 0 for outcome in (self.FAILURE, self.ERROR, self.SKIPPED)}
+        for case in cases:
+            if case[4] in counts:
+                counts[case[4]] += 1
+
+        with self.connect() as connection:
+            run_id = self._get_run_id(connection, run or self.get_run_name())
+            cursor = connection.execute(
+                "INSERT INTO suites (run_id, name, timestamp, elapsed_sec, tests, failures, errors, skipped, source) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (run_id, suite_name, timestamp, elapsed_sec, len(cases), counts[self.FAILURE], counts[self.ERROR],
+                 counts[self.SKIPPED], str(source) if source else None)
+            )
+            suite_id = cursor.lastrowid
+            connection.executemany(
+                "INSERT INTO cases (run_id, suite_id, suite, classname, name, parametrize, category, elapsed_sec, "
+                "outcome) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                [(run_id, suite_id, suite_name, classname) + self.split_case_name(name) + (category, elapsed, outcome)
+                 for classname, name, category, elapsed, outcome in cases]
+            )
+        return suite_id
+
+    @staticmethod
+    def _get_run_id(connection: sqlite3.Connection, run: str) -> int:
+        connection.execute("INSERT OR IGNORE INTO runs (name, created) VALUES (?, ?)", (run, time.time()))
+        return connection.execute("SELECT id FROM runs WHERE name = ?", (run,)).fetchone()[0]
+
+    def get_runs(self, limit: int = None) -> List[str]:
+        """
+        :param limit: Max number of runs, latest runs first
+        :return: Run names, latest first
+        """
+        with self.connect() as connection:
+            rows = connection.execute("SELECT name FROM runs ORDER BY id DESC LIMIT ?", (limit or -1,)).fetchall()
+        return [row[0] for row in rows]
+
+    def get_case_history(self, suite: str, classname: str, name: str, parametrize: str = "",
+                         limit: int = None) -> List[Tuple[str, Optional[float], str]]:
+        """
+        Get case durations time series
+        :param suite: Suite name
+        :param classname: Case classname
+        :param name: Case name, without the parametrize key
+        :param parametrize: Case parametrize key
+        :param limit: Max number of runs, latest runs are returned
+        :return: (run name, elapsed seconds, outcome) of each stored execution, oldest first
+        """
+        with self.connect() as connection:
+            rows = connection.execute(
+                "SELECT runs.name, cases.elapsed_sec, cases.outcome FROM cases JOIN runs ON runs.id = cases.run_id "
+                "WHERE cases.suite = ? AND cases.classname = ? AND cases.name = ? AND cases.parametrize = ? "
+                "ORDER BY cases.run_id DESC, cases.id DESC LIMIT ?",
+                (suite, classname, name, parametrize, limit or -1)
+            ).fetchall()
+        return rows[::-1]
+
+    def get_cases_durations(self, runs: int = None) -> Dict[Tuple[str, str, str, str], List[float]]:
+        """
+        Get durations of all cases
+        :param runs: Number of latest runs to include, all runs if not set
+        :return: Durations by case key - (suite, classname, name, parametrize), oldest first
+        """
+        durations = dict()
+        with self.connect() as connection:
+            rows = connection.execute(
+                "SELECT suite, classname, name, parametrize, elapsed_sec FROM cases "
+                "WHERE elapsed_sec IS NOT NULL AND run_id IN (SELECT id FROM runs ORDER BY id DESC LIMIT ?) "
+                "ORDER BY run_id, id",
+                (runs or -1,)
+            )
+            for suite, classname, name, parametrize, elapsed_sec in rows:
+                durations.setdefault((suite, classname, name, parametrize), list()).append(elapsed_sec)
+        return durations
+
+    def get_suites_durations(self, runs: int = None) -> Dict[str, List[float]]:
+        """
+        Get durations of all suites
+        :param runs: Number of latest runs to include, all runs if not set
+        :return: Durations by suite name, oldest first. Durations of a suite exported multiple times in the same
+                 run (e.g. parametrized suites) are summed.
+        """
+        durations = dict()
+        with self.connect() as connection:
+            rows = connection.execute(
+                "SELECT name, SUM(elapsed_sec) FROM suites "
+                "WHERE run_id IN (SELECT id FROM runs ORDER BY id DESC LIMIT ?) GROUP BY name, run_id ORDER BY run_id",
+                (runs or -1,)
+            )
+            for name, elapsed_sec in rows:
+                durations.setdefault(name, list()).append(elapsed_sec)
+        return durations
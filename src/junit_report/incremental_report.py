@@ -0,0 +1,244 @@
+import datetime
+import hashlib
+import json
+import os
+from pathlib import Path
+from typing import Any, Dict, List
+from xml.sax.saxutils import quoteattr
+
+from junit_xml import TestCase, to_xml_report_string
+
+from .report_writer import ReportWriter
+from .utils import ReportTestSuite
+
+
+class IncrementalSuiteReport:
+    """
+    Single suite JUnit xml report that grows by appending new test cases to an existing file.
+    Only the newly added cases are rendered, the cases already written are never re-read or re-rendered.
+    The suite header is written into a fixed size slot (padded with whitespace inside the tag), which allows
+    rewriting the totals in place without shifting the rest of the file.
+    The report state (totals, file offsets and owner defined values) is persisted as json checkpoint next
+    to the report: <report_file>.checkpoint
+    The report digest is chained over the appended cases (the digest of the previous digest and the rendered new
+    cases), so it changes on every append without re-reading the report. Unlike a content hash, it doesn't cover
+    the header, and two reports with the same cases appended in different batches have different digests.
+    """
+
+    CHECKPOINT_SUFFIX = ".checkpoint"
+    HEADER_RESERVED_BYTES = 64
+    FOOTER = "\t</testsuite>\n</testsuites>\n"
+    TOTAL_KEYS = ("disabled", "errors", "failures", "skipped", "tests")
+    DIGEST_SIZE = 16
+
+    def __init__(self, path: Path, name: str, timestamp: str = None, report_writer: ReportWriter = None):
+        """
+        :param path: Report file path
+        :param name: Test suite name
+        :param timestamp: Test suite timestamp, if not set the first appended case timestamp is used (or the time
+                          of the first append if it has none), like a full report
+        :param report_writer: Writer used for atomic replacement of the report and its checkpoint
+        """
+        self._writer = report_writer or ReportWriter()
+        self._path = Path(path)
+        self._name = name
+        self._timestamp = timestamp
+        self._initial_timestamp = timestamp
+        self._totals = {key: 0 for key in self.TOTAL_KEYS}
+        self._time = 0.0
+        self._header_size = 0
+        self._body_end = 0
+        self._digest = ""
+        self.state: Dict[str, Any] = dict()
+
+    @property
+    def path(self) -> Path:
+        return self._path
+
+    @property
+    def checkpoint_path(self) -> Path:
+        return self._path.with_name(self._path.name + self.CHECKPOINT_SUFFIX)
+
+    @property
+    def tests(self) -> int:
+        return self._totals["tests"]
+
+    @property
+    def name(self) -> str:
+        return self._name
+
+    @property
+    def totals(self) -> Dict[str, int]:
+        """ Suite totals - disabled, errors, failures, skipped and tests counts """
+        return dict(self._totals)
+
+    @property
+    def time(self) -> float:
+        return self._time
+
+    @property
+    def digest(self) -> str:
+        """ Hex digest chained over the appended cases, empty if no case was appended """
+        return self._digest
+
+    @classmethod
+    def load(cls, path: Path, name: str, timestamp: str = None,
+             report_writer: ReportWriter = None) -> "IncrementalSuiteReport":
+        """
+        Load report state from its checkpoint.
+        If the checkpoint is missing, corrupted or doesn't match the report file, a new empty report is returned
+        and the existing report file (if any) will be overwritten on the next append.
+        :param path: Report file path
+        :param name: Test suite name
+        :param timestamp: Test suite timestamp for new reports
+        :param report_writer: Writer used for atomic replacement of the report and its checkpoint
+        :return: IncrementalSuiteReport instance
+        """
+        report = cls(path, name, timestamp, report_writer)
+        try:
+            with open(report.checkpoint_path) as f:
+                checkpoint = json.load(f)
+            if checkpoint["name"] != name or os.path.getsize(path) != checkpoint["body_end"] + len(cls.FOOTER):
+                return report
+
+            report._timestamp = checkpoint["timestamp"]
+            report._totals = {key: checkpoint["totals"][key] for key in cls.TOTAL_KEYS}
+            report._time = checkpoint["time"]
+            report._header_size = checkpoint["header_size"]
+            report._body_end = checkpoint["body_end"]
+            report._digest = checkpoint.get("digest", "")
+            report.state = checkpoint["state"]
+        except (OSError, ValueError, KeyError, TypeError):
+            return cls(path, name, timestamp, report_writer)
+
+        return report
+
+    def append(self, test_cases: List[TestCase], atomic: bool = False, **state) -> None:
+        """
+        Append test cases to the report, update the suite totals and save checkpoint.
+        :param test_cases: New test cases
+        :param atomic: If set, the updated report replaces the old one at once so readers never see partially
+                       written report, at the cost of copying the already written cases
+        :param state: Owner values to persist in the checkpoint (e.g. source offset)
+        :return: None
+        """
+        self.state.update(state)
+        if self._timestamp is None:
+            self._timestamp = self.get_suite_timestamp(test_cases)
+        self._update_totals(test_cases)
+
+        body = self._render_cases(test_cases).encode()
+        self._digest = hashlib.blake2b(bytes.fromhex(self._digest) + body, digest_size=self.DIGEST_SIZE).hexdigest()
+        header = self._render_header()
+        if self._header_size == 0 or len(header) + 2 > self._header_size:
+            self._rewrite(header, body, len(header) + self.HEADER_RESERVED_BYTES)
+        elif atomic:
+            self._rewrite(header, body, self._header_size)
+        else:
+            self._append_in_place(header, body)
+
+        self._save_checkpoint()
+
+    @classmethod
+    def get_suite_timestamp(cls, test_cases: List[TestCase]) -> str:
+        """ Timestamp of a suite without explicit timestamp - its first case timestamp, or now if not set """
+        return str(test_cases[0].timestamp) if test_cases and test_cases[0].timestamp else str(datetime.datetime.now())
+
+    def _update_totals(self, test_cases: List[TestCase]) -> None:
+        for case in test_cases:
+            self._totals["disabled"] += 0 if case.is_enabled else 1
+            self._totals["errors"] += 1 if case.is_error() else 0
+            self._totals["failures"] += 1 if case.is_failure() else 0
+            self._totals["skipped"] += 1 if case.is_skipped() else 0
+            self._totals["tests"] += 1
+            self._time += case.elapsed_sec or 0
+
+    def _append_in_place(self, header: bytes, body: bytes) -> None:
+        with open(self._path, "r+b") as f:
+            f.seek(self._body_end)
+            f.write(body)
+            f.write(self.FOOTER.encode())
+            f.truncate()
+            f.seek(0)
+            f.write(self._pad_header(header, self._header_size))
+        self._body_end += len(body)
+
+    def _rewrite(self, header: bytes, body: bytes, header_size: int) -> None:
+        """
+        Write the report into a temporary file and replace the existing one, already written cases (if any)
+        are copied as-is
+        """
+        with self._writer.atomic_open(self._path) as f:
+            f.write(self._pad_header(header, header_size))
+            if self._header_size:
+                self._copy_body(f)
+            f.write(body)
+            f.write(self.FOOTER.encode())
+
+        self._body_end = header_size + (self._body_end - self._header_size if self._header_size else 0) + len(body)
+        self._header_size = header_size
+
+    def _copy_body(self, target, chunk_size: int = 1024 * 1024) -> None:
+        with open(self._path, "rb") as f:
+            f.seek(self._header_size)
+            remaining = self._body_end - self._header_size
+            while remaining > 0:
+                chunk = f.read(min(chunk_size, remaining))
+                if not chunk:
+                    break
+                target.write(chunk)
+                remaining -= len(chunk)
+
+    def _render_header(self) -> bytes:
+        totals = {key: str(value) for key, value in self._totals.items()}
+        suite_attributes = dict(totals, name=self._name, time=str(self._time))
+        if self._timestamp:
+            suite_attributes["timestamp"] = self._timestamp
+
+        suites_attributes = {key: totals[key] for key in ("disabled", "errors", "failures", "tests")}
+        suites_attributes["time"] = str(float(self._time))
+
+        return (
+            '<?xml version="1.0" ?>\n'
+            f"<testsuites {self._render_attributes(suites_attributes)}>\n"
+            f"\t<testsuite {self._render_attributes(suite_attributes)}"
+        ).encode()
+
+    @classmethod
+    def _pad_header(cls, header: bytes, size: int) -> bytes:
+        """ Pad the open testsuite tag with whitespaces, which is valid xml, so the header size stays constant """
+        return header + b" " * (size - len(header) - 2) + b">\n"
+
+    @classmethod
+    def _render_attributes(cls, attributes: Dict[str, str]) -> str:
+        return " ".join(f"{key}={quoteattr(value)}" for key, value in sorted(attributes.items()))
+
+    @classmethod
+    def _render_cases(cls, test_cases: List[TestCase]) -> str:
+        """
+        Render test cases using junit_xml in order to keep the exact format of a full report
+        :param test_cases: Test cases to render
+        :return: Rendered testcase elements
+        """
+        if not test_cases:
+            return ""
+        xml_string = to_xml_report_string([ReportTestSuite(name="", test_cases=test_cases)])
+        start = xml_string.index("\n", xml_string.index("<testsuite ")) + 1
+        return xml_string[start:xml_string.rindex(cls.FOOTER)]
+
+    def _save_checkpoint(self) -> None:
+        checkpoint = {
+            "name": self._name,
+            "timestamp": self._timestamp,
+            "totals": self._totals,
+            "time": self._time,
+            "header_size": self._header_size,
+            "body_end": self._body_end,
+            "digest": self._digest,
+            "state": self.state,
+        }
+        self._writer.write(self.checkpoint_path, json.dumps(checkpoint))
+
+    def reset(self) -> None:
+        """ Drop all written cases, the report will be rewritten from scratch on the next append """
+        self.__init__(self._path, self._name, self._initial_timestamp, self._writer)
@@ -0,0 +1,145 @@
+import json
+import os
+import threading
+import time
+from pathlib import Path
+from typing import ClassVar, Dict, List, Union
+
+
+class _PhaseTimer:
+    """
+    Reusable context manager that counts and times a single phase, does nothing while disabled.
+    Phases are measured from several threads (follow, collector, child processes channel, watchdog), so each thread
+    keeps its own start times and the totals are updated under a lock
+    """
+
+    __slots__ = ("count", "total_sec", "_local", "_lock")
+
+    def __init__(self):
+        self.count = 0
+        self.total_sec = 0.0
+        self._local = threading.local()
+        self._lock = threading.Lock()
+
+    def __enter__(self):
+        if Instrumentation.enabled:
+            starts = getattr(self._local, "starts", None)
+            if starts is None:
+                starts = self._local.starts = list()
+            starts.append(time.perf_counter())
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        starts: List[float] = getattr(self._local, "starts", None)
+        if starts:
+            elapsed_sec = time.perf_counter() - starts.pop()
+            with self._lock:
+                self.total_sec += elapsed_sec
+                self.count += 1
+        return False
+
+    def reset(self) -> None:
+        with self._lock:
+            self.count, self.total_sec = 0, 0.0
+
+
+class Instrumentation:
+    """
+    Counters and cumulative timers of junit-report internal phases (stack introspection, suite lookup,
+    rendering, file writes, etc.), used to measure the reporting layer overhead.
+    Disabled by default, can be enabled using Instrumentation.enable or JUNIT_REPORT_INSTRUMENTATION environment
+    variable. The variable value is a comma separated list of: true - collect only, properties - add the counters
+    to each exported suite as properties, sidecar - write the counters as json next to the exported reports.
+    """
+
+    INSTRUMENTATION_KEY = "JUNIT_REPORT_INSTRUMENTATION"
+    SIDECAR_FILE_NAME = "junit_report_instrumentation.json"
+    PROPERTY_PREFIX = "junit_report"
+    EXPORT_PROPERTIES = "properties"
+    EXPORT_SIDECAR = "sidecar"
+    TRUE_VALUES = ("1", "true", "yes", "on")
+
+    STACK_INTROSPECTION = "stack_introspection"
+    SUITE_LOOKUP = "suite_lookup"
+    REGISTER_CASE = "register_case"
+    TRACEBACK_CAPTURE = "traceback_capture"
+    RENDER = "render"
+    WRITE = "write"
+    EXPORT = "export"
+    HISTORY = "history"
+
+    enabled: ClassVar[bool] = False
+    export_properties: ClassVar[bool] = False
+    export_sidecar: ClassVar[bool] = False
+    _timers: ClassVar[Dict[str, _PhaseTimer]] = dict()
+
+    @classmethod
+    def enable(cls, export_properties: bool = False, export_sidecar: bool = False) -> None:
+        cls.enabled = True
+        cls.export_properties = export_properties
+        cls.export_sidecar = export_sidecar
+
+    @classmethod
+    def disable(cls) -> None:
+        cls.enabled = cls.export_properties = cls.export_sidecar = False
+
+    @classmethod
+    def load_env(cls) -> None:
+        values = [v.strip().lower() for v in os.getenv(cls.INSTRUMENTATION_KEY, "").split(",") if v.strip()]
+        if any(v in cls.TRUE_VALUES + (cls.EXPORT_PROPERTIES, cls.EXPORT_SIDECAR) for v in values):
+            cls.enable(cls.EXPORT_PROPERTIES in values, cls.EXPORT_SIDECAR in values)
+
+    @classmethod
+    def measure(cls, phase: str) -> _PhaseTimer:
+        """
+        Get the phase timer, used as context manager:
+            with Instrumentation.measure(Instrumentation.RENDER):
+                ...
+        :param phase: Phase name
+        :return: Phase timer
+        """
+        timer = cls._timers.get(phase)
+        if timer is None:
+            timer = cls._timers.setdefault(phase, _PhaseTimer())
+        return timer
+
+    @classmethod
+    def snapshot(cls) -> Dict[str, Dict[str, Union[int, float]]]:
+        """
+        :return: Counters by phase - {phase: {"count": int, "total_sec": float}}
+        """
+        return {
+            phase: {"count": timer.count, "total_sec": timer.total_sec}
+            for phase, timer in sorted(list(cls._timers.items())) if timer.count
+        }
+
+    @classmethod
+    def reset(cls) -> None:
+        for timer in list(cls._timers.values()):
+            timer.reset()
+
+    @classmethod
+    def get_properties(cls) -> Dict[str, str]:
+        """
+        :return: Counters as report properties - junit_report.<phase>.count and junit_report.<phase>.total_sec
+        """
+        properties = dict()
+        for phase, counters in cls.snapshot().items():
+            for name, value in counters.items():
+                properties[f"{cls.PROPERTY_PREFIX}.{phase}.{name}"] = str(value)
+        return properties
+
+    @classmethod
+    def write_sidecar(cls, report_dir: Path, report_writer) -> Path:
+        """
+        Write counters snapshot as json file into the given directory
+        :param report_dir: Reports directory
+        :param report_writer: ReportWriter instance
+        :return: Sidecar file path
+        """
+        path = Path(report_dir).joinpath(cls.SIDECAR_FILE_NAME)
+        report_writer.write(path, json.dumps({"pid": os.getpid(), "phases": cls.snapshot()}, indent=2))
+        return path
+
+
+Instrumentation.load_env()
@@ -0,0 +1,253 @@
+import argparse
+import atexit
+import datetime
+import json
+import os
+import re
+import threading
+import uuid
+from contextlib import suppress
+from pathlib import Path
+from typing import Any, ClassVar, Dict, Iterator, List, Optional, Sequence, Tuple, Union
+
+from junit_xml import to_xml_report_string
+
+from .report_writer import ReportWriter
+from .utils import CaseFailure, CaseRecord, ReportTestCase, ReportTestSuite, TestCaseCategories, TestCaseData
+
+
+class IncompleteSuite(AssertionError):
+    """ Failure type of suites recovered from the journal of a process that died before exporting them """
+
+
+class CaseJournal:
+    """
+    Append-only journal of the registered cases, so a report can be recovered when the test process dies (OOM-killed,
+    hard timeout) before the suite is exported.
+    Each process appends to its own newline delimited json file, <report_dir>/.journal/journal_<pid>_<token>.jsonl
+    (the random token keeps a process that reuses the pid of a crashed process away from its journal) - a suite
+    line on the first case of each suite, a line per registered case (compact CaseRecord) and an exported line once
+    the suite report is written. Each line is written with a single unbuffered append (no fsync), so it survives
+    the process being killed.
+    When the process exits normally and all journaled suites were exported, its journal is removed.
+    Reports of the suites that weren't exported are rebuilt using: python -m junit_report.journal <report_dir>
+    Disabled by default, can be enabled per suite or using JUNIT_REPORT_JOURNAL environment variable.
+    """
+
+    JOURNAL_KEY = "JUNIT_REPORT_JOURNAL"
+    TRUE_VALUES = ("1", "true", "yes", "on")
+    DIR_NAME = ".journal"
+    FILE_FORMAT = "journal_{pid}_{token}.jsonl"
+    FILE_PATTERN = re.compile(r"journal_(\d+)_[0-9a-f]+\.jsonl$")
+    SUITE = "suite"
+    CASE = "case"
+    EXPORTED = "exported"
+    RECOVERED_PROPERTY = "junit_report.recovered_from"
+
+    _files: ClassVar[Dict[Path, int]] = dict()
+    _pending: ClassVar[Dict[Path, Dict[str, int]]] = dict()
+    _lock: ClassVar[threading.Lock] = threading.Lock()
+    _exit_handler_registered: ClassVar[bool] = False
+    _process_token: ClassVar[Tuple[int, str]] = (0, "")
+
+    def __init__(self, report_dir: Union[Path, str]):
+        """
+        :param report_dir: Reports directory, the journal is written into its .journal directory
+        """
+        self._journal_dir = Path(report_dir).absolute().joinpath(self.DIR_NAME)
+
+    @property
+    def path(self) -> Path:
+        """ Journal of the current process """
+        return self._journal_dir.joinpath(self.get_file_name())
+
+    @classmethod
+    def get_file_name(cls) -> str:
+        """ Journal file name of the current process, a new token is generated in forked processes """
+        pid = os.getpid()
+        if cls._process_token[0] != pid:
+            CaseJournal._process_token = (pid, uuid.uuid4().hex[:12])
+        return cls.FILE_FORMAT.format(pid=pid, token=cls._process_token[1])
+
+    @classmethod
+    def is_enabled(cls, journal: bool = None) -> bool:
+        """
+        :param journal: Explicit setting, JUNIT_REPORT_JOURNAL environment variable is used if not set
+        :return: Whether registered cases should be journaled
+        """
+        if journal is None:
+            return os.getenv(cls.JOURNAL_KEY, "").lower() in cls.TRUE_VALUES
+        return journal
+
+    def _append(self, path: Path, entry: Dict[str, Any]) -> None:
+        fd = self._files.get(path)
+        if fd is None:
+            os.makedirs(path.parent, exist_ok=True)
+            fd = self._files[path] = os.open(path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+            self._pending[path] = dict()
+            if not CaseJournal._exit_handler_registered:
+                atexit.register(CaseJournal._close_all)
+                CaseJournal._exit_handler_registered = True
+        os.write(fd, json.dumps(entry, separators=(",", ":"), default=str).encode() + b"\n")
+
+    def append_case(self, suite_name: str, test_data: TestCaseData, custom_filename: str = None) -> None:
+        """
+        Journal a registered case
+        :param suite_name: Report suite name
+        :param test_data: Registered case
+        :param custom_filename: Suite report custom file name
+        :return: None
+        """
+        path = self.path
+        with self._lock:
+            if suite_name not in self._pending.get(path, dict()):
+                self._append(path, {"type": self.SUITE, "suite": suite_name, "custom_filename": custom_filename,
+                                    "timestamp": str(datetime.datetime.now())})
+            self._append(path, {"type": self.CASE, "suite": suite_name, "parametrize": test_data.parametrize,
+                                "case": test_data.case.to_dict()})
+            self._pending[path][suite_name] = self._pending[path].get(suite_name, 0) + 1
+
+    def suite_exported(self, suite_name: str) -> None:
+        """
+        Journal that the suite cases were exported, they are not recovered
+        :param suite_name: Report suite name
+        :return: None
+        """
+        path = self.path
+        with self._lock:
+            if self._pending.get(path, dict()).get(suite_name):
+                self._append(path, {"type": self.EXPORTED, "suite": suite_name})
+                self._pending[path][suite_name] = 0
+
+    @classmethod
+    def _close_all(cls) -> None:
+        """ Close the journals of the current process, journals without unexported cases are removed """
+        with cls._lock:
+            file_name = cls.get_file_name()
+            for path, fd in list(cls._files.items()):
+                os.close(fd)
+                if path.name == file_name and not any(cls._pending.get(path, dict()).values()):
+                    with suppress(OSError):
+                        path.unlink()
+            cls._files.clear()
+            cls._pending.clear()
+
+    @classmethod
+    def read(cls, path: Union[Path, str]) -> Iterator[Dict[str, Any]]:
+        """
+        :param path: Journal path
+        :return: Journal entries, a partially written last line is skipped
+        """
+        with open(path, "rb") as f:
+            for line in f:
+                try:
+                    yield json.loads(line)
+                except ValueError:
+                    continue
+
+    @staticmethod
+    def is_process_running(pid: int) -> bool:
+        if pid == os.getpid():
+            return True
+        try:
+            os.kill(pid, 0)
+        except ProcessLookupError:
+            return False
+        except PermissionError:
+            return True
+        return True
+
+    @classmethod
+    def get_unexported_suites(cls, path: Union[Path, str]) -> Dict[str, Dict[str, Any]]:
+        """
+        :param path: Journal path
+        :return: Suites with cases that weren't exported - {suite name: {"custom_filename", "timestamp", "cases"}},
+                 cases are (CaseRecord, parametrize) tuples
+        """
+        suites: Dict[str, Dict[str, Any]] = dict()
+        for entry in cls.read(path):
+            suite = suites.setdefault(entry["suite"], {"custom_filename": None, "timestamp": None, "cases": list()})
+            if entry["type"] == cls.SUITE:
+                suite.update(custom_filename=entry.get("custom_filename"), timestamp=entry.get("timestamp"))
+            elif entry["type"] == cls.CASE:
+                suite["cases"].append((CaseRecord.from_dict(entry["case"]), entry.get("parametrize")))
+            elif entry["type"] == cls.EXPORTED:
+                suite["cases"] = list()
+        return {name: suite for name, suite in suites.items() if suite["cases"]}
+
+    @classmethod
+    def get_recovered_suites(cls, path: Path, pid: int) -> Dict[str, ReportTestSuite]:
+        """
+        :param path: Journal path
+        :param pid: Journal process id
+        :return: Recovered suites by report file name, each suite gets an additional failed case since it didn't finish
+        """
+        from .decorators import JunitTestSuite  # the decorators are required only for their report file names
+
+        recovered = dict()
+        for suite_name, suite in cls.get_unexported_suites(path).items():
+            by_args: Dict[str, List[ReportTestCase]] = dict()
+            for record, parametrize in suite["cases"]:
+                args = "_".join(str(value) for _, value in parametrize or ())
+                by_args.setdefault(args, list()).append(record.to_test_case())
+
+            for args, cases in by_args.items():
+                incomplete_case = CaseRecord(name=suite_name, classname=suite_name,
+                                             category=TestCaseCategories.SUITE.value)
+                message = f"Process {pid} exited before the suite finished, {len(cases)} cases were recovered"
+                incomplete_case.add_failure(CaseFailure(message=message, output=message,
+                                                        type=IncompleteSuite.__name__))
+                file_name = JunitTestSuite.get_report_file_name(suite_name, args, suite["custom_filename"])
+                recovered[file_name] = ReportTestSuite(name=suite_name,
+                                                       test_cases=cases + [incomplete_case.to_test_case()],
+                                                       timestamp=suite["timestamp"],
+                                                       properties={cls.RECOVERED_PROPERTY: path.name})
+        return recovered
+
+    @classmethod
+    def recover(cls, report_dir: Union[Path, str], report_writer: ReportWriter = None, include_running: bool = False,
+                remove: bool = True) -> List[Path]:
+        """
+        Rebuild the reports of the suites that weren't exported by dead processes
+        :param report_dir: Reports directory
+        :param report_writer: Writer used to write the recovered reports
+        :param include_running: Recover also the journals of running processes
+        :param remove: Remove the recovered journals
+        :return: Recovered reports paths
+        """
+        report_dir = Path(report_dir)
+        report_writer = report_writer or ReportWriter()
+        paths = list()
+        for path in sorted(report_dir.joinpath(cls.DIR_NAME).glob("journal_*.jsonl")):
+            match = cls.FILE_PATTERN.match(path.name)
+            if match is None:
+                continue
+            pid = int(match.group(1))
+            if not include_running and cls.is_process_running(pid):
+                continue
+
+            for file_name, suite in cls.get_recovered_suites(path, pid).items():
+                report_path = report_dir.joinpath(file_name)
+                report_writer.write(report_path, to_xml_report_string([suite]))
+                paths.append(report_path)
+            if remove:
+                path.unlink()
+        return paths
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m junit_report.journal",
+                                     description="Rebuild reports of suites that weren't exported from journals "
+                                                 "left by crashed processes")
+    parser.add_argument("report_dir", type=Path, help="Reports directory")
+    parser.add_argument("--include-running", action="store_true", help="Recover journals of running processes")
+    parser.add_argument("--keep", action="store_true", help="Keep the recovered journals")
+    args = parser.parse_args(argv)
+
+    for path in CaseJournal.recover(args.report_dir, include_running=args.include_running, remove=not args.keep):
+        print(path)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
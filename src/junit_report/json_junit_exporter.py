@@ -1,13 +1,25 @@
 import datetime
 import json
+import os
+import threading
+import time
 from dataclasses import dataclass
 from pathlib import Path
-from typing import List, Tuple, Dict, Optional, Union
+from typing import TYPE_CHECKING, List, Tuple, Dict, Optional, Union
 
 from junit_xml import TestCase, to_xml_report_string, TestSuite
 
+from .collector import CollectorClient
+from .incremental_report import IncrementalSuiteReport
+from .instrumentation import Instrumentation
+from .payload_store import PayloadStore
+from .report_manifest import ReportManifest
+from .report_writer import ReportWriter
 from .utils import CaseFailure, Utils
 
+if TYPE_CHECKING:  # avoid importing numpy on the exporter path unless results are collected
+    from .columnar import ColumnarResults
+
 
 @dataclass
 class CaseFormatKeys:
@@ -22,14 +34,33 @@ class CaseFormatKeys:
 class JsonJunitExporter:
     DEFAULT_SEVERITY_LEVELS = ("error", "critical", "fatal")
     REPORT_PREFIX = "junit_report"
+    EVENTS_OFFSET_KEY = "events_offset"
+    EVENTS_INODE_KEY = "events_inode"
+    DEFAULT_POLL_INTERVAL = 0.5
+    DEFAULT_FLUSH_INTERVAL = 5.0
+    DEFAULT_BATCH_SIZE = 1000
 
     def __init__(self,
                  fmt: CaseFormatKeys,
                  update_format_keys: bool = True,
                  report_prefix: str = REPORT_PREFIX,
                  export_on_success: bool = True,
-                 severity_export_values: Tuple[str, ...] = DEFAULT_SEVERITY_LEVELS):
+                 severity_export_values: Tuple[str, ...] = DEFAULT_SEVERITY_LEVELS,
+                 report_writer: ReportWriter = None,
+                 manifest: bool = None,
+                 results: "ColumnarResults" = None,
+                 payload_threshold: int = None):
+        """
+        :param payload_threshold: Failure messages, outputs and stdout larger than payload_threshold bytes are stored
+                                  in the reports directory and replaced by a truncated preview with a reference
+                                  (see PayloadStore), if not set JUNIT_REPORT_PAYLOAD_THRESHOLD environment variable
+                                  is used
+        """
         self._format = fmt
+        self._payload_threshold = PayloadStore.get_threshold(payload_threshold)
+        self._results = results
+        self._update_manifest = ReportManifest.is_enabled(manifest)
+        self._report_writer = report_writer or ReportWriter()
         self._report_prefix = report_prefix
         self._export_on_success = export_on_success
         self._severity_export_values = severity_export_values
@@ -67,6 +98,23 @@ class JsonJunitExporter:
             case.stdout = msg
         return case
 
+    def _get_test_cases(self, entries: List[Dict[str, str]]) -> List[TestCase]:
+        test_cases = list()
+        for entry in entries:
+            test_case = self._get_test_case(entry, entry.get(self._format.severity_key, None))
+            if test_case is not None:
+                test_cases.append(test_case)
+        return test_cases
+
+    def _externalize_payloads(self, test_cases: List[TestCase], report_dir: Path) -> List[TestCase]:
+        if self._payload_threshold is None:
+            return test_cases
+        return PayloadStore(report_dir, self._payload_threshold, report_writer=self._report_writer).externalize(
+            test_cases)
+
+    def _get_report_file_name(self, suite_name: str, xml_suffix: str = "") -> str:
+        return f"{self._report_prefix}_{suite_name}{f'_{xml_suffix}' if xml_suffix else ''}.xml"
+
     def collect(self, entries: List[Dict[str, str]],
                 suite_name: str,
                 report_dir: Optional[Path] = None,
@@ -74,21 +122,171 @@ class JsonJunitExporter:
                 ) -> str:
         report_dir = Utils.get_report_dir(report_dir)
 
-        test_cases = list()
-        for entry in entries:
-            test_case = self._get_test_case(entry, entry.get(self._format.severity_key, None))
-            if test_case is not None:
-                test_cases.append(test_case)
+        report_dir.mkdir(exist_ok=True)
+        test_cases = self._externalize_payloads(self._get_test_cases(entries), report_dir)
+        suite = TestSuite(name=suite_name, test_cases=test_cases, timestamp=self._get_suite_timestamp(test_cases))
+        path = report_dir.joinpath(self._get_report_file_name(suite_name, xml_suffix))
+        if not CollectorClient.submit(path, [suite], xml_suffix, self._update_manifest):
+            with Instrumentation.measure(Instrumentation.RENDER):
+                xml_report = to_xml_report_string(test_suites=[suite])
+            if self._report_writer.write(path, xml_report) and self._update_manifest:
+                ReportManifest(report_dir, self._report_writer).update(path, suite, xml_report, xml_suffix)
+        if self._results is not None:
+            self._results.add_suite(suite)
+        if Instrumentation.export_sidecar:
+            Instrumentation.write_sidecar(report_dir, self._report_writer)
+        return str(path)
 
+    def collect_incremental(self, events_path: Path,
+                            suite_name: str,
+                            report_dir: Optional[Path] = None,
+                            xml_suffix: str = ""
+                            ) -> str:
+        """
+        Incremental version of collect for ever-growing newline delimited json (NDJSON) events file.
+        Only events added since the previous run are processed, their test cases are appended to the existing
+        report and the suite totals are updated in place.
+        Events file read offset is saved in a checkpoint file next to the report. If the events file was
+        replaced or truncated, the report is regenerated from the beginning of the file.
+        :param events_path: NDJSON events file, one entry per line
+        :param suite_name: Test suite name
+        :param report_dir: Target directory
+        :param xml_suffix: Report file name suffix
+        :return: Report file path
+        """
+        report_dir = Utils.get_report_dir(report_dir)
         report_dir.mkdir(exist_ok=True)
-        xml_report = to_xml_report_string(test_suites=[TestSuite(name=suite_name,
-                                                                 test_cases=test_cases,
-                                                                 timestamp=self._get_suite_timestamp(test_cases))])
-        file_name = f"{self._report_prefix}_{suite_name}{f'_{xml_suffix}' if xml_suffix else ''}.xml"
-        with open(report_dir.joinpath(file_name), "w") as f:
-            f.write(xml_report)
-            return f.name
+        report = IncrementalSuiteReport.load(report_dir.joinpath(self._get_report_file_name(suite_name, xml_suffix)),
+                                             suite_name, report_writer=self._report_writer)
+        self._collect_new_entries(report, Path(events_path), xml_suffix)
+        return str(report.path)
+
+    def _collect_new_entries(self, report: IncrementalSuiteReport, events_path: Path, xml_suffix: str = "") -> int:
+        """
+        Read new entries from events file and append them to the report
+        :return: Number of new entries
+        """
+        offset = self._get_events_offset(report, events_path)
+        entries, offset = self._read_entries(events_path, offset)
+        if entries or report.tests == 0:
+            self._append_entries(report, entries, events_path, offset, xml_suffix=xml_suffix)
+        return len(entries)
+
+    def _get_events_offset(self, report: IncrementalSuiteReport, events_path: Path) -> int:
+        """
+        Get the events file offset the report was collected up to.
+        If the events file was replaced or truncated the report is reset and 0 is returned.
+        """
+        offset = report.state.get(self.EVENTS_OFFSET_KEY, 0)
+        if self._is_events_file_replaced(report, events_path, offset):
+            return self._reset_events_offset(report, events_path)
+        return offset
+
+    def _reset_events_offset(self, report: IncrementalSuiteReport, events_path: Path) -> int:
+        """
+        Reset the report, it will be regenerated from the beginning of the events file
+        :return: Events file offset to read from
+        """
+        report.reset()
+        report.state[self.EVENTS_INODE_KEY] = os.stat(events_path).st_ino
+        return 0
+
+    def _is_events_file_replaced(self, report: IncrementalSuiteReport, events_path: Path, offset: int) -> bool:
+        stat = os.stat(events_path)
+        return report.state.get(self.EVENTS_INODE_KEY) != stat.st_ino or stat.st_size < offset
+
+    def _append_entries(self, report: IncrementalSuiteReport,
+                        entries: List[Dict[str, str]],
+                        events_path: Path,
+                        offset: int,
+                        atomic: bool = False,
+                        xml_suffix: str = "") -> None:
+        report.append(self._externalize_payloads(self._get_test_cases(entries), report.path.parent), atomic=atomic,
+                      **{self.EVENTS_OFFSET_KEY: offset, self.EVENTS_INODE_KEY: os.stat(events_path).st_ino})
+        if self._update_manifest:
+            ReportManifest(report.path.parent, self._report_writer).update_incremental(report, xml_suffix)
+
+    def follow(self, events_path: Path,
+               suite_name: str,
+               report_dir: Optional[Path] = None,
+               xml_suffix: str = "",
+               poll_interval: float = DEFAULT_POLL_INTERVAL,
+               flush_interval: float = DEFAULT_FLUSH_INTERVAL,
+               batch_size: int = DEFAULT_BATCH_SIZE,
+               stop_event: Optional[threading.Event] = None,
+               timeout: Optional[float] = None
+               ) -> str:
+        """
+        Follow a growing NDJSON events file (like tail -f) and keep its report up to date.
+        New entries are batched and flushed to the report when batch_size entries are pending or when
+        flush_interval seconds passed since the last flush. Each flush atomically replaces the report file,
+        so readers always see a well-formed report.
+        Follow state is shared with collect_incremental, a stopped follow resumes from its last flush.
+        :param events_path: NDJSON events file, one entry per line
+        :param suite_name: Test suite name
+        :param report_dir: Target directory
+        :param xml_suffix: Report file name suffix
+        :param poll_interval: Seconds to wait between events file polls
+        :param flush_interval: Max seconds pending entries wait before being flushed
+        :param batch_size: Max number of pending entries before flush
+        :param stop_event: Stop following once set, pending entries are flushed before returning
+        :param timeout: Stop following after timeout seconds, follow forever if not set
+        :return: Report file path
+        """
+        report_dir = Utils.get_report_dir(report_dir)
+        report_dir.mkdir(exist_ok=True)
+        events_path = Path(events_path)
+        report = IncrementalSuiteReport.load(report_dir.joinpath(self._get_report_file_name(suite_name, xml_suffix)),
+                                             suite_name, report_writer=self._report_writer)
+        stop_event = stop_event or threading.Event()
+        deadline = None if timeout is None else time.monotonic() + timeout
+
+        pending = list()
+        offset = self._get_events_offset(report, events_path) if events_path.exists() else 0
+        last_flush = time.monotonic()
+        while True:
+            if events_path.exists():
+                if self._is_events_file_replaced(report, events_path, offset):
+                    # checked against the read offset, which may be past the checkpointed offset
+                    pending, offset = list(), self._reset_events_offset(report, events_path)
+                entries, offset = self._read_entries(events_path, offset)
+                pending.extend(entries)
+
+            stopped = stop_event.is_set() or (deadline is not None and time.monotonic() >= deadline)
+            flush_due = len(pending) >= batch_size or time.monotonic() - last_flush >= flush_interval
+            flush = pending and (stopped or flush_due)
+            if flush or (events_path.exists() and not report.path.exists()):
+                self._append_entries(report, pending, events_path, offset, atomic=True, xml_suffix=xml_suffix)
+                pending, last_flush = list(), time.monotonic()
+
+            if stopped:
+                return str(report.path)
+            stop_event.wait(poll_interval)
+
+    @classmethod
+    def _read_entries(cls, events_path: Path, offset: int) -> Tuple[List[Dict[str, str]], int]:
+        """
+        Read complete lines from the given offset, trailing partial line is left for the next read.
+        Malformed lines (invalid json or not a json object) are skipped
+        :return: Parsed entries and the offset of the first unread byte
+        """
+        with open(events_path, "rb") as f:
+            f.seek(offset)
+            data = f.read()
+
+        end = data.rfind(b"\n") + 1
+        entries = list()
+        for line in data[:end].splitlines():
+            if not line.strip():
+                continue
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                continue
+            if isinstance(entry, dict):
+                entries.append(entry)
+        return entries, offset + end
 
     @classmethod
     def _get_suite_timestamp(cls, test_cases: List[TestCase]) -> str:
-        return test_cases[0].timestamp if test_cases else str(datetime.datetime.now())
+        return IncrementalSuiteReport.get_suite_timestamp(test_cases)
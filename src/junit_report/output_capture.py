@@ -0,0 +1,137 @@
+import logging
+import sys
+from collections import deque
+from typing import Deque, Optional, TextIO
+
+
+class BoundedBuffer:
+    """
+    Ring buffer of text that keeps only the last max_bytes (utf-8 encoded) bytes written to it.
+    """
+
+    TRUNCATED_FORMAT = "[... {count} bytes truncated ...]\n"
+
+    def __init__(self, max_bytes: int):
+        self._max_bytes = max_bytes
+        self._chunks: Deque[bytes] = deque()
+        self._size = 0
+        self._truncated = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    def write(self, text: str) -> int:
+        data = text.encode(errors="replace")
+        if len(data) > self._max_bytes:
+            self._truncated += len(data) - self._max_bytes
+            data = data[len(data) - self._max_bytes:]
+
+        self._chunks.append(data)
+        self._size += len(data)
+        while self._size > self._max_bytes:
+            chunk = self._chunks.popleft()
+            overflow = self._size - self._max_bytes
+            if len(chunk) > overflow:
+                self._chunks.appendleft(chunk[overflow:])
+                chunk = chunk[:overflow]
+            self._size -= len(chunk)
+            self._truncated += len(chunk)
+        return len(text)
+
+    def getvalue(self) -> str:
+        value = b"".join(self._chunks).decode(errors="replace")
+        if self._truncated:
+            return self.TRUNCATED_FORMAT.format(count=self._truncated) + value
+        return value
+
+
+class _TeeStream:
+    """ Text stream that writes both to the original stream and to a bounded buffer """
+
+    def __init__(self, stream: TextIO, buffer: BoundedBuffer):
+        self._stream = stream
+        self._buffer = buffer
+
+    def write(self, text: str) -> int:
+        self._buffer.write(text)
+        return self._stream.write(text)
+
+    def __getattr__(self, item):
+        return getattr(self._stream, item)
+
+
+class _RecordsHandler(logging.Handler):
+    """ Logging handler that keeps the last log records, records are formatted only when requested """
+
+    DEFAULT_FORMAT = "%(asctime)s %(levelname)s %(name)s: %(message)s"
+
+    def __init__(self, max_records: int, level: int = logging.NOTSET):
+        super().__init__(level)
+        self.records: Deque[logging.LogRecord] = deque(maxlen=max_records)
+        self.setFormatter(logging.Formatter(self.DEFAULT_FORMAT))
+
+    def emit(self, record: logging.LogRecord) -> None:
+        self.records.append(record)
+
+    def getvalue(self) -> str:
+        lines = list()
+        for record in self.records:
+            try:
+                lines.append(self.format(record))
+            except Exception:
+                lines.append(f"{record.levelname} {record.name}: {record.msg!r}")
+        return "\n".join(lines) + "\n" if lines else ""
+
+
+class CaseOutputCapture:
+    """
+    Capture stdout, stderr and logging records of a single test case into bounded buffers.
+    Captured output is still written to the original streams, the capture only keeps a bounded copy of it.
+    Log records are kept as is and formatted only when the captured output is collected.
+    """
+
+    DEFAULT_MAX_BYTES = 64 * 1024
+    DEFAULT_MAX_LOG_RECORDS = 1000
+
+    def __init__(self, max_bytes: int = DEFAULT_MAX_BYTES,
+                 max_log_records: int = DEFAULT_MAX_LOG_RECORDS,
+                 log_level: int = logging.NOTSET):
+        """
+        :param max_bytes: Max bytes kept for each of stdout and stderr (including log records)
+        :param max_log_records: Max number of log records kept, older records are dropped
+        :param log_level: Minimal level of captured log records
+        """
+        self._max_bytes = max_bytes
+        self._stdout = BoundedBuffer(max_bytes)
+        self._stderr = BoundedBuffer(max_bytes)
+        self._handler = _RecordsHandler(max_log_records, log_level)
+        self._stdout_stream: Optional[_TeeStream] = None
+        self._stderr_stream: Optional[_TeeStream] = None
+
+    def start(self) -> None:
+        self._stdout_stream = _TeeStream(sys.stdout, self._stdout)
+        self._stderr_stream = _TeeStream(sys.stderr, self._stderr)
+        sys.stdout, sys.stderr = self._stdout_stream, self._stderr_stream
+        logging.getLogger().addHandler(self._handler)
+
+    def stop(self) -> None:
+        logging.getLogger().removeHandler(self._handler)
+        if sys.stdout is self._stdout_stream:
+            sys.stdout = self._stdout_stream._stream
+        if sys.stderr is self._stderr_stream:
+            sys.stderr = self._stderr_stream._stream
+
+    def get_stdout(self) -> str:
+        return self._stdout.getvalue()
+
+    def get_stderr(self) -> str:
+        """ Captured stderr followed by the formatted log records, limited to max_bytes """
+        logs = BoundedBuffer(self._max_bytes)
+        logs.write(self._handler.getvalue())
+        if not len(logs):
+            return self._stderr.getvalue()
+
+        output = BoundedBuffer(self._max_bytes)
+        output.write(self._stderr.getvalue())
+        output.write(logs.getvalue())
+        return output.getvalue()
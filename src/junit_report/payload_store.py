@@ -0,0 +1,132 @@
+import hashlib
+import os
+import re
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Union
+
+from junit_xml import TestCase
+
+from .report_writer import ReportWriter
+from .utils import CaseFailure
+
+
+class PayloadStore:
+    """
+    Content-addressed store of large case payloads (failure messages and outputs, stdout, stderr) next to the reports.
+    Payloads larger than threshold bytes are written once to <report_dir>/.payloads/<sha256> - identical payloads
+    of different cases and reports share the same file - and the report gets a truncated preview followed by a
+    reference line to the stored payload, so reports stay small and fast to parse.
+    Use PayloadStore.resolve to get the full payload of a report value.
+    Disabled by default, the threshold can be set per suite/exporter or using JUNIT_REPORT_PAYLOAD_THRESHOLD
+    environment variable (bytes).
+    """
+
+    THRESHOLD_KEY = "JUNIT_REPORT_PAYLOAD_THRESHOLD"
+    DIR_NAME = ".payloads"
+    DEFAULT_PREVIEW_SIZE = 1024
+    REFERENCE_FORMAT = "\n... [{size} bytes, full payload: {dir_name}/{digest}]"
+    # xml attribute values (failure message) are read back with the reference newline normalized to a space
+    REFERENCE_PATTERN = re.compile(r"\s\.\.\. \[(\d+) bytes, full payload: ([^\]/]+)/([0-9a-f]{64})\]$")
+    CASE_PAYLOADS = ("stdout", "stderr")
+    RESULT_PAYLOADS = ("message", "output")
+
+    def __init__(self, report_dir: Union[Path, str], threshold: int, preview_size: int = DEFAULT_PREVIEW_SIZE,
+                 report_writer: ReportWriter = None):
+        """
+        :param report_dir: Reports directory, payloads are written into its .payloads directory
+        :param threshold: Payloads larger than threshold bytes (utf-8 encoded) are stored
+        :param preview_size: Number of characters kept in the report as a preview of a stored payload
+        :param report_writer: Writer used to write the payloads
+        """
+        self._report_dir = Path(report_dir)
+        self._threshold = threshold
+        self._preview_size = min(preview_size, threshold)
+        self._report_writer = report_writer or ReportWriter()
+
+    @property
+    def path(self) -> Path:
+        return self._report_dir.joinpath(self.DIR_NAME)
+
+    @property
+    def threshold(self) -> int:
+        return self._threshold
+
+    @classmethod
+    def get_threshold(cls, threshold: int = None) -> Optional[int]:
+        """
+        :param threshold: Explicit threshold, JUNIT_REPORT_PAYLOAD_THRESHOLD environment variable is used if not set
+        :return: Payload size threshold in bytes, None if disabled or the environment variable is invalid
+        """
+        if threshold is None:
+            try:
+                threshold = int(os.getenv(cls.THRESHOLD_KEY) or 0)
+            except ValueError:
+                return None
+        return threshold if threshold > 0 else None
+
+    @classmethod
+    def from_threshold(cls, report_dir: Union[Path, str], threshold: int = None,
+                       report_writer: ReportWriter = None) -> Optional["PayloadStore"]:
+        """
+        :return: PayloadStore of the reports directory, None if no threshold is set
+        """
+        threshold = cls.get_threshold(threshold)
+        return cls(report_dir, threshold, report_writer=report_writer) if threshold else None
+
+    def store(self, payload: Any) -> Any:
+        """
+        Store payload if it's larger than the threshold
+        :param payload: Case payload, values that are not strings are returned as is
+        :return: Truncated preview with a reference to the stored payload, or the payload itself if it's small
+        """
+        if not isinstance(payload, str) or len(payload) <= self._threshold // 4:
+            return payload  # a utf-8 character is at most 4 bytes, short payloads are never encoded
+        data = payload.encode()
+        if len(data) <= self._threshold:
+            return payload
+
+        digest = hashlib.sha256(data).hexdigest()
+        path = self.path.joinpath(digest)
+        if not path.exists():
+            os.makedirs(self.path, exist_ok=True)
+            self._report_writer.write(path, data)
+        return payload[:self._preview_size] + self.REFERENCE_FORMAT.format(size=len(data), dir_name=self.DIR_NAME,
+                                                                           digest=digest)
+
+    def externalize(self, test_cases: List[TestCase]) -> List[TestCase]:
+        """
+        Replace the large payloads of the given cases with references to the stored payloads.
+        Failures, errors and skipped results with large payloads are replaced by new objects, so results shared
+        with other cases or records are not changed
+        :param test_cases: Report test cases, failures tracebacks must be resolved
+        :return: The given test cases
+        """
+        for case in test_cases:
+            for key in self.CASE_PAYLOADS:
+                setattr(case, key, self.store(getattr(case, key, None)))
+            for key in ("failures", "errors", "skipped"):
+                results = getattr(case, key)
+                for i, result in enumerate(results):
+                    results[i] = self._externalize_result(result)
+        return test_cases
+
+    def _externalize_result(self, result: Union[CaseFailure, Dict[str, Any]]) -> Union[CaseFailure, Dict[str, Any]]:
+        values = {key: result[key] for key in self.RESULT_PAYLOADS}
+        stored = {key: self.store(value) for key, value in values.items()}
+        if stored == values:
+            return result
+        if isinstance(result, CaseFailure):
+            return CaseFailure(message=stored["message"], output=stored["output"], type=result.type)
+        return dict(result, **stored)
+
+    @classmethod
+    def resolve(cls, value: str, report_dir: Union[Path, str]) -> str:
+        """
+        :param value: Report value (case stdout/stderr, failure message or output)
+        :param report_dir: Directory of the report the value was read from
+        :return: Full payload if the value references a stored payload, otherwise the value itself
+        """
+        match = cls.REFERENCE_PATTERN.search(value or "")
+        if match is None:
+            return value
+        return Path(report_dir).joinpath(match.group(2), match.group(3)).read_text(encoding="utf-8")
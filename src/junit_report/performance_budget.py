@@ -0,0 +1,96 @@
+import time
+from typing import Dict, List, Optional, Union
+
+from .resource_usage import CaseResourceUsage
+from .utils import CaseFailure
+
+
+class PerformanceBudgetExceeded(AssertionError):
+    """ Failure type of test cases and suites that exceeded their performance budget """
+
+
+class PerformanceBudget:
+    """
+    Duration, CPU time and memory budget of a test case or suite.
+    Duration is the case elapsed time, CPU time is the process CPU time (user + system) and memory is the
+    tracemalloc peak of memory allocated during the execution.
+    When exceeded, a PerformanceBudgetExceeded failure is recorded with the measured values. In warn only mode,
+    the measured values are recorded as properties only and the case doesn't fail.
+    """
+
+    PROPERTY_PREFIX = "budget"
+    DURATION = "duration_sec"
+    CPU_TIME = "cpu_time_sec"
+    MEMORY = "memory_kb"
+
+    def __init__(self,
+                 max_duration: float = None,
+                 max_cpu_time: float = None,
+                 max_memory_kb: float = None,
+                 warn_only: bool = False):
+        """
+        :param max_duration: Max elapsed seconds
+        :param max_cpu_time: Max process CPU seconds
+        :param max_memory_kb: Max tracemalloc peak in kilobytes
+        :param warn_only: Record measured values as properties without failing
+        """
+        self._limits = {self.DURATION: max_duration, self.CPU_TIME: max_cpu_time, self.MEMORY: max_memory_kb}
+        self._warn_only = warn_only
+        self._memory_usage = CaseResourceUsage(resource_usage=False, trace_memory=True)
+        self._start_cpu_time = None
+        self.measured: Dict[str, float] = dict()
+
+    @property
+    def enabled(self) -> bool:
+        return any(limit is not None for limit in self._limits.values())
+
+    @property
+    def is_running(self) -> bool:
+        return self._start_cpu_time is not None
+
+    def start(self) -> None:
+        self.measured = dict()
+        if self._limits[self.MEMORY] is not None:
+            self._memory_usage.start()
+        self._start_cpu_time = time.process_time()
+
+    def stop(self) -> None:
+        """ Stop measuring CPU time and memory, should be called when the measured execution ends """
+        if self._start_cpu_time is None:
+            return
+
+        start_cpu_time, self._start_cpu_time = self._start_cpu_time, None
+        if self._limits[self.CPU_TIME] is not None:
+            self.measured[self.CPU_TIME] = round(time.process_time() - start_cpu_time, 6)
+        if self._limits[self.MEMORY] is not None:
+            # the peak is not measured before python 3.9 if tracemalloc was already tracing (see CaseResourceUsage)
+            memory_peak = self._memory_usage.stop().get(CaseResourceUsage.TRACEMALLOC_PEAK)
+            if memory_peak is not None:
+                self.measured[self.MEMORY] = memory_peak
+
+    def check(self, elapsed_sec: Union[float, None]) -> Optional[CaseFailure]:
+        """
+        Check the measured values against the budget
+        :param elapsed_sec: Measured execution duration
+        :return: PerformanceBudgetExceeded failure if the budget exceeded and warn only is not set, None otherwise
+        """
+        if self._limits[self.DURATION] is not None:
+            self.measured[self.DURATION] = round(elapsed_sec or 0, 6)
+
+        exceeded = self.get_exceeded()
+        if not exceeded or self._warn_only:
+            return None
+
+        message = f"Performance budget exceeded: {', '.join(exceeded)}"
+        return CaseFailure(message=message, output=message, type=PerformanceBudgetExceeded.__name__)
+
+    def get_exceeded(self) -> List[str]:
+        return [f"{name} {value} > {self._limits[name]}"
+                for name, value in self.measured.items() if value > self._limits[name]]
+
+    def get_properties(self) -> Dict[str, str]:
+        properties = dict()
+        for name, value in self.measured.items():
+            properties[f"{self.PROPERTY_PREFIX}.{name}"] = str(value)
+            properties[f"{self.PROPERTY_PREFIX}.max_{name}"] = str(self._limits[name])
+        return properties
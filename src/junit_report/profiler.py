@@ -0,0 +1,155 @@
+import cProfile
+import os
+import pstats
+import re
+import threading
+from pathlib import Path
+from typing import Any, ClassVar, Dict, Hashable, List, Optional, Set
+
+
+class CaseProfiler:
+    """
+    Run test cases and suites under cProfile.
+    Profiling is enabled for every execution (profile=True or JUNIT_REPORT_PROFILE environment variable) or in
+    adaptive mode, where only the next execution of a case that exceeded the duration threshold is profiled
+    (profile_threshold or JUNIT_REPORT_PROFILE_THRESHOLD environment variable, in seconds).
+    Profiles are saved as <report_dir>/profiles/<name>_<pid>_<n>.pstats, the pstats path and the top N functions
+    sorted by cumulative time are attached to the report as properties.
+    Only one profiler can be active at a time, nested cases of a profiled case are not profiled.
+    """
+
+    PROFILE_KEY = "JUNIT_REPORT_PROFILE"
+    PROFILE_THRESHOLD_KEY = "JUNIT_REPORT_PROFILE_THRESHOLD"
+    PROFILES_DIR = "profiles"
+    PROFILE_PROPERTY = "profile.pstats"
+    TOP_PROPERTY_FORMAT = "profile.cumulative.{index}"
+    ATTACHMENT_FORMAT = "[[ATTACHMENT|{path}]]"
+    DEFAULT_TOP_N = 10
+    TRUE_VALUES = ("1", "true", "yes", "on")
+
+    _slow_keys: ClassVar[Set[Hashable]] = set()
+    _active: ClassVar[Optional["CaseProfiler"]] = None
+    _lock: ClassVar[threading.Lock] = threading.Lock()
+    _counter: ClassVar[int] = 0
+
+    def __init__(self, profile: bool = None, profile_threshold: float = None, top_n: int = DEFAULT_TOP_N):
+        """
+        :param profile: Profile every execution, if not set JUNIT_REPORT_PROFILE environment variable is used
+        :param profile_threshold: Profile the next execution of cases that took longer than threshold seconds,
+                                  if not set JUNIT_REPORT_PROFILE_THRESHOLD environment variable is used
+        :param top_n: Number of top cumulative time functions attached to the report
+        """
+        if profile is None:
+            profile = os.getenv(self.PROFILE_KEY, "").lower() in self.TRUE_VALUES
+        if profile_threshold is None:
+            profile_threshold = self.get_env_threshold()
+
+        self._profile = profile
+        self._profile_threshold = profile_threshold
+        self._top_n = top_n
+        self._profiler: Optional[cProfile.Profile] = None
+
+    @classmethod
+    def get_env_threshold(cls) -> Optional[float]:
+        """
+        :return: JUNIT_REPORT_PROFILE_THRESHOLD value, None if not set or invalid
+        """
+        try:
+            return float(os.getenv(cls.PROFILE_THRESHOLD_KEY) or "")
+        except ValueError:
+            return None
+
+    @property
+    def enabled(self) -> bool:
+        return self._profile or self._profile_threshold is not None
+
+    @property
+    def is_running(self) -> bool:
+        return self._profiler is not None
+
+    def start(self, key: Hashable) -> bool:
+        """
+        Start profiling if needed for the given case
+        :param key: Unique case key (e.g. the decorated function)
+        :return: True if profiling started
+        """
+        if not (self._profile or key in self._slow_keys):
+            return False
+
+        with self._lock:
+            if CaseProfiler._active is not None:
+                return False
+            CaseProfiler._active = self
+
+        self._slow_keys.discard(key)
+        self._profiler = cProfile.Profile()
+        try:
+            self._profiler.enable()
+        except ValueError:  # another profiling tool is already active
+            self._profiler = None
+            CaseProfiler._active = None
+            return False
+        return True
+
+    def stop(self) -> Optional[pstats.Stats]:
+        """
+        Stop profiling
+        :return: Collected stats, None if the profiler was not running
+        """
+        if self._profiler is None:
+            return None
+
+        profiler, self._profiler = self._profiler, None
+        profiler.disable()
+        CaseProfiler._active = None
+        return pstats.Stats(profiler)
+
+    def update_threshold(self, key: Hashable, elapsed_sec: float, profiled: bool) -> None:
+        """
+        Adaptive mode - mark case to be profiled on its next execution if it exceeded the duration threshold
+        :param key: Unique case key
+        :param elapsed_sec: Case duration
+        :param profiled: Whether the current execution was profiled
+        :return: None
+        """
+        if self._profile_threshold is not None and not profiled and elapsed_sec > self._profile_threshold:
+            self._slow_keys.add(key)
+
+    def export(self, stats: pstats.Stats, name: str, report_dir: Path) -> Dict[str, str]:
+        """
+        Save stats as pstats file and return the report properties
+        :param stats: Collected stats
+        :param name: Case or suite name, used for the file name
+        :param report_dir: Reports directory, profile saved into its profiles sub-directory
+        :return: Properties - pstats path and top N cumulative functions
+        """
+        with self._lock:
+            CaseProfiler._counter += 1
+            counter = CaseProfiler._counter
+
+        profiles_dir = Path(report_dir).joinpath(self.PROFILES_DIR)
+        os.makedirs(profiles_dir, exist_ok=True)
+        file_name = re.sub(r"[^\w.-]", "_", name)
+        path = profiles_dir.joinpath(f"{file_name}_{os.getpid()}_{counter}.pstats")
+        stats.dump_stats(path)
+
+        properties = {self.PROFILE_PROPERTY: str(path)}
+        for index, line in enumerate(self.get_top_functions(stats, self._top_n), start=1):
+            properties[self.TOP_PROPERTY_FORMAT.format(index=index)] = line
+        return properties
+
+    @classmethod
+    def get_top_functions(cls, stats: pstats.Stats, top_n: int) -> List[str]:
+        stats.sort_stats(pstats.SortKey.CUMULATIVE)
+        top_functions = list()
+        for function in stats.fcn_list[:top_n]:
+            _, calls, total_time, cumulative_time, _ = stats.stats[function]
+            filename, line, function_name = function
+            location = f"{filename}:{line}({function_name})" if filename != "~" else function_name
+            top_functions.append(f"{cumulative_time:.6f}s cumulative, {total_time:.6f}s total, {calls} calls - "
+                                 f"{location}")
+        return top_functions
+
+    @classmethod
+    def get_attachment(cls, properties: Dict[str, Any]) -> str:
+        return cls.ATTACHMENT_FORMAT.format(path=properties[cls.PROFILE_PROPERTY])
@@ -0,0 +1,202 @@
+import argparse
+import datetime
+import os
+import statistics
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple, Union
+
+from junit_xml import to_xml_report_string
+
+from .history import HistoryStore
+from .report_writer import ReportWriter
+from .utils import CaseFailure, ReportTestCase, ReportTestSuite
+
+CaseKey = Tuple[str, str, str, str]
+
+
+class DurationRegression(AssertionError):
+    """ Failure type of cases that became significantly slower than their baseline """
+
+
+@dataclass
+class CaseComparison:
+    key: CaseKey
+    baseline_sec: float
+    current_sec: float
+    z_score: Optional[float] = None
+    is_regression: bool = False
+
+    @property
+    def ratio(self) -> float:
+        return self.current_sec / self.baseline_sec if self.baseline_sec > 0 else float("inf")
+
+
+class RegressionDetector:
+    """
+    Detect cases duration regressions of a current run against a baseline.
+    Cases are joined on (suite, classname, name, parametrize key). A case is a regression when its duration grew
+    by more than min_delta seconds and either:
+        - With history (at least min_history past durations of the case) - its robust z-score, based on the history
+          median and median absolute deviation, exceeds z_threshold
+        - Otherwise - its ratio to the baseline duration exceeds ratio_threshold
+    The comparison is exported as a JUnit report, each compared case is a test case and regressions are failures.
+    """
+
+    DEFAULT_RATIO_THRESHOLD = 1.5
+    DEFAULT_Z_THRESHOLD = 3.5
+    DEFAULT_MIN_DELTA = 0.05
+    DEFAULT_MIN_HISTORY = 5
+    MAD_SCALE = 0.6745
+    SUITE_NAME = "duration_regressions"
+    PROPERTY_PREFIX = "regression"
+
+    def __init__(self,
+                 ratio_threshold: float = DEFAULT_RATIO_THRESHOLD,
+                 z_threshold: float = DEFAULT_Z_THRESHOLD,
+                 min_delta: float = DEFAULT_MIN_DELTA,
+                 history: HistoryStore = None,
+                 history_runs: int = None,
+                 min_history: int = DEFAULT_MIN_HISTORY):
+        """
+        :param ratio_threshold: Min current to baseline duration ratio of a regression
+        :param z_threshold: Min robust z-score of a regression, used for cases with enough history
+        :param min_delta: Min duration growth in seconds of a regression, filters out noise of very short cases
+        :param history: HistoryStore with past durations of the compared cases
+        :param history_runs: Number of latest history runs to use, all runs if not set
+        :param min_history: Min number of past durations required for using the z-score
+        """
+        self._ratio_threshold = ratio_threshold
+        self._z_threshold = z_threshold
+        self._min_delta = min_delta
+        self._min_history = min_history
+        self._history = history.get_cases_durations(history_runs) if history is not None else dict()
+
+    @classmethod
+    def load_reports(cls, report_dirs: Sequence[Union[Path, str]], pattern: str = "*.xml") -> Dict[CaseKey, float]:
+        """
+        Load cases durations from reports directories, durations of cases that appear more than once are averaged
+        :param report_dirs: Reports directories
+        :param pattern: Reports glob pattern
+        :return: Duration by case key - (suite, classname, name, parametrize)
+        """
+        durations: Dict[CaseKey, List[float]] = dict()
+        for report_dir in report_dirs:
+            for path in sorted(Path(report_dir).glob(pattern)):
+                for suite_name, _, _, cases in HistoryStore.read_report(path):
+                    for classname, name, _, elapsed_sec, _ in cases:
+                        if elapsed_sec is not None:
+                            key = (suite_name, classname) + HistoryStore.split_case_name(name)
+                            durations.setdefault(key, list()).append(elapsed_sec)
+        return {key: statistics.mean(values) for key, values in durations.items()}
+
+    def get_z_score(self, key: CaseKey, current_sec: float) -> Optional[float]:
+        """
+        :return: Robust z-score of the current duration against the case history, None if not enough history or
+                 the history has no deviation
+        """
+        history = self._history.get(key, list())
+        if len(history) < self._min_history:
+            return None
+        median = statistics.median(history)
+        mad = statistics.median(abs(value - median) for value in history)
+        if mad == 0:
+            return None
+        return self.MAD_SCALE * (current_sec - median) / mad
+
+    def compare(self, baseline: Dict[CaseKey, float], current: Dict[CaseKey, float]) -> List[CaseComparison]:
+        """
+        Compare current durations against the baseline
+        :param baseline: Baseline durations by case key, cases without baseline use their history median if exists
+        :param current: Current durations by case key
+        :return: Comparison of each case with baseline or history, in current cases order
+        """
+        comparisons = list()
+        for key, current_sec in current.items():
+            baseline_sec = baseline.get(key)
+            if baseline_sec is None and key in self._history:
+                baseline_sec = statistics.median(self._history[key])
+            if baseline_sec is None:
+                continue
+
+            comparison = CaseComparison(key, baseline_sec, current_sec, self.get_z_score(key, current_sec))
+            if current_sec - baseline_sec >= self._min_delta:
+                if comparison.z_score is not None:
+                    comparison.is_regression = comparison.z_score > self._z_threshold
+                else:
+                    comparison.is_regression = comparison.ratio > self._ratio_threshold
+            comparisons.append(comparison)
+        return comparisons
+
+    def get_suite(self, comparisons: List[CaseComparison], name: str = SUITE_NAME) -> ReportTestSuite:
+        """
+        :param comparisons: Cases comparisons
+        :param name: Report suite name
+        :return: Test suite with a test case for each comparison, regressions are marked as failures
+        """
+        cases = list()
+        for comparison in comparisons:
+            suite_name, classname, case_name, parametrize = comparison.key
+            case = ReportTestCase(name=f"{case_name}[{parametrize}]" if parametrize else case_name,
+                                  classname=f"{suite_name}.{classname}", elapsed_sec=comparison.current_sec)
+            case.add_property(f"{self.PROPERTY_PREFIX}.baseline_sec", round(comparison.baseline_sec, 6))
+            case.add_property(f"{self.PROPERTY_PREFIX}.current_sec", round(comparison.current_sec, 6))
+            case.add_property(f"{self.PROPERTY_PREFIX}.ratio", round(comparison.ratio, 3))
+            if comparison.z_score is not None:
+                case.add_property(f"{self.PROPERTY_PREFIX}.z_score", round(comparison.z_score, 3))
+
+            if comparison.is_regression:
+                message = (f"Duration regression: {comparison.current_sec:.6f}s, "
+                           f"baseline {comparison.baseline_sec:.6f}s (x{comparison.ratio:.2f})")
+                case.failures.append(CaseFailure(message=message, output=message, type=DurationRegression.__name__))
+            cases.append(case)
+
+        return ReportTestSuite(name=name, test_cases=cases, timestamp=datetime.datetime.now())
+
+    def export(self, comparisons: List[CaseComparison], report_dir: Union[Path, str], name: str = SUITE_NAME,
+               report_writer: ReportWriter = None) -> Path:
+        """
+        Export comparisons as JUnit report - junit_<name>_report.xml
+        :return: Report path
+        """
+        os.makedirs(report_dir, exist_ok=True)
+        path = Path(report_dir).joinpath(f"junit_{name}_report.xml")
+        (report_writer or ReportWriter()).write(path, to_xml_report_string([self.get_suite(comparisons, name)]))
+        return path
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m junit_report.regression",
+                                     description="Detect cases duration regressions against a baseline run")
+    parser.add_argument("--current", type=Path, nargs="+", required=True, help="Current run reports directories")
+    parser.add_argument("--baseline", type=Path, nargs="+", default=list(), help="Baseline reports directories")
+    parser.add_argument("--history", type=Path, help="HistoryStore database with cases past durations")
+    parser.add_argument("--runs", type=int, help="Number of latest history runs to use")
+    parser.add_argument("--ratio", type=float, default=RegressionDetector.DEFAULT_RATIO_THRESHOLD,
+                        help="Regression duration ratio threshold")
+    parser.add_argument("--z-score", type=float, default=RegressionDetector.DEFAULT_Z_THRESHOLD,
+                        help="Regression robust z-score threshold")
+    parser.add_argument("--min-delta", type=float, default=RegressionDetector.DEFAULT_MIN_DELTA,
+                        help="Min duration growth in seconds")
+    parser.add_argument("--report-dir", type=Path, help="Export the comparison JUnit report into directory")
+    args = parser.parse_args(argv)
+
+    if not args.baseline and not args.history:
+        parser.error("--baseline or --history is required")
+
+    detector = RegressionDetector(args.ratio, args.z_score, args.min_delta,
+                                  HistoryStore(args.history) if args.history else None, args.runs)
+    comparisons = detector.compare(detector.load_reports(args.baseline), detector.load_reports(args.current))
+    if args.report_dir:
+        detector.export(comparisons, args.report_dir)
+
+    regressions = [c for c in comparisons if c.is_regression]
+    for regression in regressions:
+        print(f"{'::'.join(filter(None, regression.key))}: {regression.baseline_sec:.6f}s -> "
+              f"{regression.current_sec:.6f}s (x{regression.ratio:.2f})")
+    print(f"{len(comparisons)} cases compared, {len(regressions)} regressions")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
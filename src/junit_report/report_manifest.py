@@ -0,0 +1,211 @@
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager, suppress
+from pathlib import Path
+from typing import Any, ClassVar, Dict, Iterator, List, Union
+
+from junit_xml import TestSuite
+
+from .incremental_report import IncrementalSuiteReport
+from .report_writer import ReportWriter
+
+try:
+    import fcntl
+except ImportError:  # fcntl module is not available on Windows
+    fcntl = None
+
+
+class ReportManifest:
+    """
+    JSON index of the reports of a reports directory (junit_report_manifest.json), updated on each report write.
+    Each entry holds the report file name, suite name, parametrize values, tests/failures/errors/skipped counts,
+    duration and content hash, so consumers can find failed suites without listing and parsing the reports.
+    Each update appends a single json line to the manifest journal (junit_report_manifest.jsonl), so its cost
+    doesn't depend on the number of indexed reports. Once the journal grows larger than the manifest, it's compacted
+    into the manifest (replaced atomically), which keeps the amortized update cost constant. load merges both, call
+    compact at the end of the run to leave a complete junit_report_manifest.json for consumers that read it directly.
+    Updates are serialized between threads and processes (file lock next to the manifest, where fcntl is available).
+    Disabled by default, can be enabled per suite/exporter or using JUNIT_REPORT_MANIFEST environment variable.
+    """
+
+    MANIFEST_KEY = "JUNIT_REPORT_MANIFEST"
+    FILE_NAME = "junit_report_manifest.json"
+    JOURNAL_FILE_NAME = "junit_report_manifest.jsonl"
+    MIN_COMPACT_SIZE = 64 * 1024
+    LOCK_FILE_NAME = ".junit_report_manifest.lock"
+    VERSION = 1
+    TRUE_VALUES = ("1", "true", "yes", "on")
+
+    _lock: ClassVar[threading.Lock] = threading.Lock()
+
+    def __init__(self, report_dir: Union[Path, str], report_writer: ReportWriter = None):
+        """
+        :param report_dir: Reports directory
+        :param report_writer: Writer used to replace the manifest
+        """
+        self._report_dir = Path(report_dir)
+        self._report_writer = report_writer or ReportWriter()
+
+    @property
+    def path(self) -> Path:
+        return self._report_dir.joinpath(self.FILE_NAME)
+
+    @property
+    def journal_path(self) -> Path:
+        return self._report_dir.joinpath(self.JOURNAL_FILE_NAME)
+
+    @classmethod
+    def is_enabled(cls, manifest: bool = None) -> bool:
+        """
+        :param manifest: Explicit setting, JUNIT_REPORT_MANIFEST environment variable is used if not set
+        :return: Whether the manifest should be maintained
+        """
+        if manifest is None:
+            return os.getenv(cls.MANIFEST_KEY, "").lower() in cls.TRUE_VALUES
+        return manifest
+
+    @contextmanager
+    def _locked(self) -> Iterator[None]:
+        with self._lock:
+            if fcntl is None:
+                yield
+                return
+
+            os.makedirs(self._report_dir, exist_ok=True)
+            with open(self._report_dir.joinpath(self.LOCK_FILE_NAME), "a") as lock_file:
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+                try:
+                    yield
+                finally:
+                    fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+
+    def load(self) -> Dict[str, Dict[str, Any]]:
+        """
+        :return: Manifest entries by report file name (including the journaled updates), empty if the manifest
+                 doesn't exist or is invalid
+        """
+        with self._locked():
+            return self._load()
+
+    def _load(self) -> Dict[str, Dict[str, Any]]:
+        try:
+            manifest = json.loads(self.path.read_text())
+        except (OSError, ValueError):
+            manifest = dict()
+        reports = manifest.get("reports", dict()) if isinstance(manifest, dict) else dict()
+
+        try:
+            with open(self.journal_path, "rb") as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                        reports[entry["file"]] = entry
+                    except (ValueError, KeyError, TypeError):
+                        continue  # partially written line
+        except OSError:
+            pass
+        return reports
+
+    @staticmethod
+    def get_entry(path: Path, suite: TestSuite, content: Union[str, bytes], parametrize: str = "") -> Dict[str, Any]:
+        data = content.encode() if isinstance(content, str) else content
+        cases = suite.test_cases
+        return {
+            "file": path.name,
+            "suite": suite.name,
+            "parametrize": parametrize,
+            "tests": len(cases),
+            "failures": len([case for case in cases if case.is_failure()]),
+            "errors": len([case for case in cases if case.is_error()]),
+            "skipped": len([case for case in cases if case.is_skipped()]),
+            "time": round(sum(case.elapsed_sec or 0 for case in cases), 6),
+            "hash": ReportWriter.get_digest(data).hex(),
+            "updated": time.time(),
+        }
+
+    def update(self, path: Union[Path, str], suite: TestSuite, content: Union[str, bytes],
+               parametrize: str = "") -> Dict[str, Any]:
+        """
+        Add or replace the manifest entry of a written report
+        :param path: Report path
+        :param suite: Report test suite
+        :param content: Written report content
+        :param parametrize: Suite parametrize values
+        :return: Report entry
+        """
+        return self.add_entry(self.get_entry(Path(path), suite, content, parametrize))
+
+    def update_incremental(self, report: IncrementalSuiteReport, parametrize: str = "") -> Dict[str, Any]:
+        """
+        Add or replace the manifest entry of an incremental report, using its totals. The report is not read,
+        the entry hash is the report digest chained over its appended cases (see IncrementalSuiteReport), not
+        the report content hash
+        :param report: Updated incremental report
+        :param parametrize: Suite parametrize values
+        :return: Report entry
+        """
+        totals = report.totals
+        entry = {
+            "file": report.path.name,
+            "suite": report.name,
+            "parametrize": parametrize,
+            "tests": totals["tests"],
+            "failures": totals["failures"],
+            "errors": totals["errors"],
+            "skipped": totals["skipped"],
+            "time": round(report.time, 6),
+            "hash": report.digest,
+            "updated": time.time(),
+        }
+        return self.add_entry(entry)
+
+    def add_entry(self, entry: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Journal a manifest entry, the journal is compacted into the manifest once it's larger than the manifest
+        :param entry: Report entry
+        :return: Report entry
+        """
+        line = json.dumps(entry, separators=(",", ":"), sort_keys=True).encode() + b"\n"
+        with self._locked():
+            os.makedirs(self._report_dir, exist_ok=True)
+            fd = os.open(self.journal_path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+            try:
+                os.write(fd, line)
+                journal_size = os.fstat(fd).st_size
+            finally:
+                os.close(fd)
+
+            if journal_size >= max(self.MIN_COMPACT_SIZE, self._get_size(self.path)):
+                self._compact()
+        return entry
+
+    def compact(self) -> None:
+        """
+        Merge the journaled updates into the manifest file and truncate the journal
+        :return: None
+        """
+        with self._locked():
+            self._compact()
+
+    def _compact(self) -> None:
+        reports = self._load()
+        self._report_writer.write(self.path, json.dumps({"version": self.VERSION, "reports": reports},
+                                                        indent=2, sort_keys=True))
+        # the journaled entries are in the manifest, if the process dies before truncating they are applied again
+        with suppress(OSError):
+            os.truncate(self.journal_path, 0)
+
+    @staticmethod
+    def _get_size(path: Path) -> int:
+        try:
+            return os.path.getsize(path)
+        except OSError:
+            return 0
+
+    def get_failed(self) -> List[Dict[str, Any]]:
+        """
+        :return: Entries of reports with failures or errors
+        """
+        return [entry for entry in self.load().values() if entry["failures"] or entry["errors"]]
@@ -0,0 +1,193 @@
+import argparse
+import json
+import mmap
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Tuple, Union
+from xml.etree import ElementTree
+
+
+@dataclass
+class ReportSummary:
+    files: int = 0
+    invalid: int = 0
+    tests: int = 0
+    failures: int = 0
+    errors: int = 0
+    skipped: int = 0
+    time: float = 0.0
+
+    def add(self, other: "ReportSummary") -> None:
+        self.files += other.files
+        self.invalid += other.invalid
+        self.tests += other.tests
+        self.failures += other.failures
+        self.errors += other.errors
+        self.skipped += other.skipped
+        self.time += other.time
+
+
+class ReportSummaryScanner:
+    """
+    Summarize JUnit xml reports totals (tests, failures, errors, skipped and time) without parsing the reports.
+    Each report is memory-mapped and only the <testsuites>/<testsuite> start tags are scanned: the totals are taken
+    from the <testsuites> root attributes when set (skipped from the <testsuite> tags), otherwise summed over the
+    <testsuite> tags. Reports that can't be summarized this way are parsed incrementally (iterparse).
+    Multiple reports are summarized by a process pool.
+    """
+
+    SUITE_TAG_PATTERN = re.compile(rb"<(testsuites|testsuite)(\s[^>]*)?/?>")
+    ATTRIBUTE_PATTERN = re.compile(rb"""([\w:.-]+)\s*=\s*(?:"([^"]*)"|'([^']*)')""")
+    COUNTERS = ("tests", "failures", "errors", "skipped")
+    DEFAULT_CHUNK_SIZE = 32
+
+    def __init__(self, workers: int = None, chunk_size: int = DEFAULT_CHUNK_SIZE):
+        """
+        :param workers: Number of worker processes, os.cpu_count() if not set. Reports are summarized in the current
+                        process if set to 1 or if there are not more reports than chunk_size
+        :param chunk_size: Number of reports sent to a worker at once
+        """
+        self._workers = workers or os.cpu_count() or 1
+        self._chunk_size = chunk_size
+
+    @classmethod
+    def _get_attributes(cls, tag_attributes: Optional[bytes]) -> Dict[str, str]:
+        return {m.group(1).decode(): (m.group(2) if m.group(2) is not None else m.group(3)).decode()
+                for m in cls.ATTRIBUTE_PATTERN.finditer(tag_attributes or b"")}
+
+    @classmethod
+    def _add_attributes(cls, summary: ReportSummary, attributes: Dict[str, str], counters: Sequence[str]) -> None:
+        for counter in counters:
+            if counter == "time":
+                summary.time += float(attributes.get(counter) or 0)
+            else:
+                setattr(summary, counter, getattr(summary, counter) + int(attributes.get(counter) or 0))
+
+    @classmethod
+    def _scan(cls, data: Union[bytes, mmap.mmap]) -> Optional[ReportSummary]:
+        """ Sum suite tags attributes, None if the report has no suite tags """
+        tags = [(m.group(1), cls._get_attributes(m.group(2))) for m in cls.SUITE_TAG_PATTERN.finditer(data)]
+        if not tags:
+            return None
+
+        summary = ReportSummary(files=1)
+        root_tag, root_attributes = tags[0]
+        if root_tag == b"testsuites" and "tests" in root_attributes:
+            cls._add_attributes(summary, root_attributes, ("tests", "failures", "errors", "time"))
+            for _, attributes in tags[1:]:
+                cls._add_attributes(summary, attributes, ("skipped",))
+        else:
+            for tag, attributes in tags:
+                if tag == b"testsuite":
+                    cls._add_attributes(summary, attributes, cls.COUNTERS + ("time",))
+        return summary
+
+    @classmethod
+    def _parse(cls, path: Path) -> ReportSummary:
+        """ Incremental parse fallback, sums the attributes of the top level suites, counts cases if not set """
+        summary = ReportSummary(files=1)
+        depth, suite_cases = 0, 0
+        for event, element in ElementTree.iterparse(str(path), events=("start", "end")):
+            if element.tag == "testsuite":
+                depth += 1 if event == "start" else -1
+                if event == "end" and depth == 0:
+                    attributes = dict(element.attrib)
+                    attributes.setdefault("tests", str(suite_cases))
+                    cls._add_attributes(summary, attributes, cls.COUNTERS + ("time",))
+                    suite_cases = 0
+                    element.clear()
+            elif element.tag == "testcase" and event == "end":
+                suite_cases += 1
+                element.clear()
+        return summary
+
+    @classmethod
+    def summarize_file(cls, path: Union[Path, str]) -> ReportSummary:
+        """
+        :param path: Report path
+        :return: Report totals, invalid is set for reports that couldn't be read or parsed
+        """
+        try:
+            with open(path, "rb") as f:
+                if os.fstat(f.fileno()).st_size == 0:
+                    return ReportSummary(files=1, invalid=1)
+                with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+                    summary = cls._scan(data)
+            if summary is not None:
+                return summary
+        except (OSError, ValueError):
+            pass
+
+        try:
+            return cls._parse(Path(path))
+        except (OSError, ValueError, ElementTree.ParseError):
+            return ReportSummary(files=1, invalid=1)
+
+    @staticmethod
+    def get_report_paths(paths: Iterable[Union[Path, str]], pattern: str = "*.xml") -> List[Path]:
+        """
+        :param paths: Reports and reports directories
+        :param pattern: Reports glob pattern used for directories
+        :return: Report paths
+        """
+        report_paths = list()
+        for path in map(Path, paths):
+            report_paths.extend(sorted(path.glob(pattern)) if path.is_dir() else [path])
+        return report_paths
+
+    def scan(self, paths: Sequence[Union[Path, str]]) -> Iterator[Tuple[Path, ReportSummary]]:
+        """
+        :param paths: Report paths
+        :return: Iterator of each report path and summary, in paths order
+        """
+        paths = [Path(path) for path in paths]
+        if self._workers == 1 or len(paths) <= self._chunk_size:
+            yield from zip(paths, map(self.summarize_file, paths))
+            return
+
+        with ProcessPoolExecutor(max_workers=self._workers) as executor:
+            yield from zip(paths, executor.map(self.summarize_file, paths, chunksize=self._chunk_size))
+
+    def summarize(self, paths: Sequence[Union[Path, str]]) -> ReportSummary:
+        """
+        :param paths: Report paths
+        :return: Totals of all reports
+        """
+        total = ReportSummary()
+        for _, summary in self.scan(paths):
+            total.add(summary)
+        return total
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m junit_report.report_summary",
+                                     description="Summarize JUnit xml reports totals")
+    parser.add_argument("paths", type=Path, nargs="+", help="Reports or reports directories")
+    parser.add_argument("--pattern", default="*.xml", help="Reports glob pattern used for directories")
+    parser.add_argument("--workers", type=int, help="Number of worker processes")
+    parser.add_argument("--per-file", action="store_true", help="Print each report summary")
+    parser.add_argument("--fail-on-failures", action="store_true",
+                        help="Exit with status 1 if there are failures, errors or invalid reports")
+    args = parser.parse_args(argv)
+
+    scanner = ReportSummaryScanner(args.workers)
+    paths = scanner.get_report_paths(args.paths, args.pattern)
+    total = ReportSummary()
+    per_file = dict()
+    for path, summary in scanner.scan(paths):
+        total.add(summary)
+        if args.per_file:
+            per_file[str(path)] = asdict(summary)
+
+    output = dict(asdict(total), time=round(total.time, 6))
+    if args.per_file:
+        output["reports"] = per_file
+    print(json.dumps(output, indent=2))
+    return 1 if args.fail_on_failures and (total.failures or total.errors or total.invalid) else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
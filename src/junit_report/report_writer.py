@@ -0,0 +1,112 @@
+import hashlib
+import os
+import threading
+import uuid
+from contextlib import contextmanager, suppress
+from pathlib import Path
+from typing import BinaryIO, ClassVar, Dict, Iterator, Tuple, Union
+
+from .instrumentation import Instrumentation
+
+
+class ReportWriter:
+    """
+    ReportWriter writes rendered reports to disk.
+    Reports are written into a temporary file in the target directory and atomically replace the target
+    using os.replace, so readers never see a truncated report.
+    A digest of the last content written to each path is kept, writing identical content again is skipped
+    as long as the file on disk was not changed since (size and modification time are compared).
+    fsync is disabled by default and can be enabled per writer or using JUNIT_REPORT_FSYNC environment variable.
+    """
+
+    FSYNC_KEY = "JUNIT_REPORT_FSYNC"
+    TRUE_VALUES = ("1", "true", "yes", "on")
+
+    _written: ClassVar[Dict[Path, Tuple[bytes, int, int]]] = dict()
+    _lock: ClassVar[threading.Lock] = threading.Lock()
+
+    def __init__(self, fsync: bool = None):
+        """
+        :param fsync: Flush written reports to the storage device before replacing the target, slower but durable
+                      on power loss. If not set, JUNIT_REPORT_FSYNC environment variable is used.
+        """
+        if fsync is None:
+            fsync = os.getenv(self.FSYNC_KEY, "").lower() in self.TRUE_VALUES
+        self._fsync = fsync
+
+    @property
+    def fsync(self) -> bool:
+        return self._fsync
+
+    @classmethod
+    def get_digest(cls, data: bytes) -> bytes:
+        return hashlib.blake2b(data, digest_size=16).digest()
+
+    def write(self, path: Union[Path, str], content: Union[str, bytes]) -> bool:
+        """
+        Write content to path unless the same content was already written to it
+        :param path: Target file path
+        :param content: Rendered report
+        :return: True if the file was written, False if the write was skipped
+        """
+        with Instrumentation.measure(Instrumentation.WRITE):
+            path = Path(path).absolute()
+            data = content.encode() if isinstance(content, str) else content
+            digest = self.get_digest(data)
+
+            with self._lock:
+                if self._is_unchanged(path, digest):
+                    return False
+
+            with self.atomic_open(path) as f:
+                f.write(data)
+
+            stat = os.stat(path)
+            with self._lock:
+                self._written[path] = (digest, stat.st_size, stat.st_mtime_ns)
+            return True
+
+    def _is_unchanged(self, path: Path, digest: bytes) -> bool:
+        if path not in self._written:
+            return False
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return False
+        return self._written[path] == (digest, stat.st_size, stat.st_mtime_ns)
+
+    @contextmanager
+    def atomic_open(self, path: Union[Path, str]) -> Iterator[BinaryIO]:
+        """
+        Open temporary file for binary writing that replaces path once the context exits successfully
+        :param path: Target file path
+        :return: Temporary file object
+        """
+        path = Path(path)
+        tmp_path = path.with_name(f".{path.name}.{uuid.uuid4().hex}.tmp")
+        fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o666)
+        try:
+            with os.fdopen(fd, "wb") as f:
+                yield f
+                if self._fsync:
+                    f.flush()
+                    os.fsync(f.fileno())
+            os.replace(tmp_path, path)
+        except BaseException:
+            with suppress(OSError):
+                os.remove(tmp_path)
+            raise
+
+        with self._lock:
+            self._written.pop(path.absolute(), None)
+        if self._fsync:
+            self._fsync_dir(path.parent)
+
+    @classmethod
+    def _fsync_dir(cls, directory: Path) -> None:
+        with suppress(OSError, AttributeError):
+            fd = os.open(directory, os.O_RDONLY)
+            try:
+                os.fsync(fd)
+            finally:
+                os.close(fd)
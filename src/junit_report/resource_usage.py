@@ -0,0 +1,141 @@
+import os
+import sys
+import threading
+import tracemalloc
+from typing import ClassVar, Dict, List, Optional, Union
+
+try:
+    import resource
+except ImportError:  # resource module is not available on Windows
+    resource = None
+
+
+class CaseResourceUsage:
+    """
+    Collect resource usage of a single test case as getrusage deltas: CPU time, max RSS, minor/major page faults,
+    block I/O operations, voluntary/involuntary context switches.
+    Optionally collect the tracemalloc peak of memory allocated during the case (much more expensive, as tracemalloc
+    traces every allocation while enabled).
+    Usage is collected for the whole process (RUSAGE_SELF), while cases run concurrently in threads the values
+    include the other threads usage.
+    Memory measurements may be nested (e.g. a case budget inside a suite budget), the tracemalloc peak is reset
+    when a measurement starts and the peak reached so far is kept by the enclosing measurements. Before python 3.9
+    the peak can't be reset, so it's collected only by measurements that started tracemalloc themselves.
+    """
+
+    RESOURCE_USAGE_KEY = "JUNIT_REPORT_RESOURCE_USAGE"
+    TRACE_MEMORY_KEY = "JUNIT_REPORT_TRACE_MEMORY"
+    PROPERTY_PREFIX = "resource"
+    TRUE_VALUES = ("1", "true", "yes", "on")
+
+    CPU_TIME = "cpu_time_sec"
+    MAX_RSS = "max_rss_kb"
+    MAX_RSS_DELTA = "max_rss_delta_kb"
+    TRACEMALLOC_PEAK = "tracemalloc_peak_kb"
+    RUSAGE_FIELDS = {
+        "ru_minflt": "minor_page_faults",
+        "ru_majflt": "major_page_faults",
+        "ru_inblock": "block_input_ops",
+        "ru_oublock": "block_output_ops",
+        "ru_nvcsw": "voluntary_context_switches",
+        "ru_nivcsw": "involuntary_context_switches",
+    }
+
+    _active: ClassVar[List["CaseResourceUsage"]] = list()
+    _started_tracing: ClassVar[bool] = False
+    _lock: ClassVar[threading.Lock] = threading.Lock()
+
+    def __init__(self, resource_usage: bool = None, trace_memory: bool = None):
+        """
+        :param resource_usage: Collect getrusage deltas, if not set JUNIT_REPORT_RESOURCE_USAGE environment
+                               variable is used. Ignored on platforms without resource module.
+        :param trace_memory: Collect tracemalloc peak, if not set JUNIT_REPORT_TRACE_MEMORY environment variable
+                             is used
+        """
+        if resource_usage is None:
+            resource_usage = os.getenv(self.RESOURCE_USAGE_KEY, "").lower() in self.TRUE_VALUES
+        if trace_memory is None:
+            trace_memory = os.getenv(self.TRACE_MEMORY_KEY, "").lower() in self.TRUE_VALUES
+
+        self._resource_usage = resource_usage and resource is not None
+        self._trace_memory = trace_memory
+        self._start_usage = None
+        self._start_traced = 0
+        self._peak = 0
+        self._peak_known = False
+        self.usage: Dict[str, Union[int, float]] = dict()
+
+    @property
+    def enabled(self) -> bool:
+        return self._resource_usage or self._trace_memory
+
+    def start(self) -> None:
+        self.usage = dict()
+        if self._trace_memory:
+            with self._lock:
+                self._start_memory_trace()
+
+        if self._resource_usage:
+            self._start_usage = resource.getrusage(resource.RUSAGE_SELF)
+
+    def stop(self) -> Dict[str, Union[int, float]]:
+        """
+        :return: Collected usage by name, also available as usage attribute
+        """
+        if self._start_usage is not None:
+            end_usage = resource.getrusage(resource.RUSAGE_SELF)
+            start_usage, self._start_usage = self._start_usage, None
+            start_cpu_time = start_usage.ru_utime + start_usage.ru_stime
+            self.usage[self.CPU_TIME] = round(end_usage.ru_utime + end_usage.ru_stime - start_cpu_time, 6)
+            self.usage[self.MAX_RSS] = self._to_kb(end_usage.ru_maxrss)
+            self.usage[self.MAX_RSS_DELTA] = self._to_kb(end_usage.ru_maxrss - start_usage.ru_maxrss)
+            for field, name in self.RUSAGE_FIELDS.items():
+                self.usage[name] = getattr(end_usage, field) - getattr(start_usage, field)
+
+        if self._trace_memory:
+            with self._lock:
+                self._stop_memory_trace()
+
+        return self.usage
+
+    def _start_memory_trace(self) -> None:
+        self._peak_known = True
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+            CaseResourceUsage._started_tracing = True
+        elif hasattr(tracemalloc, "reset_peak"):
+            peak = tracemalloc.get_traced_memory()[1]
+            for usage in self._active:
+                usage._peak = max(usage._peak, peak)
+            tracemalloc.reset_peak()
+        else:
+            self._peak_known = False  # the peak since tracing started may precede this measurement
+
+        self._start_traced, self._peak = tracemalloc.get_traced_memory()[0], 0
+        self._active.append(self)
+
+    def _stop_memory_trace(self) -> None:
+        if self not in self._active:
+            return
+
+        self._active.remove(self)
+        if not tracemalloc.is_tracing():
+            return
+
+        peak = max(self._peak, tracemalloc.get_traced_memory()[1])
+        if self._peak_known:
+            self.usage[self.TRACEMALLOC_PEAK] = round(max(peak - self._start_traced, 0) / 1024, 3)
+        if not self._active and self._started_tracing:
+            tracemalloc.stop()
+            CaseResourceUsage._started_tracing = False
+
+    def get_properties(self) -> Dict[str, str]:
+        return {f"{self.PROPERTY_PREFIX}.{name}": str(value) for name, value in self.usage.items()}
+
+    def get(self, name: str) -> Optional[Union[int, float]]:
+        return self.usage.get(name)
+
+    @staticmethod
+    def _to_kb(max_rss: int) -> int:
+        """ ru_maxrss is in kilobytes on Linux and in bytes on macOS """
+        return max_rss // 1024 if sys.platform == "darwin" else max_rss
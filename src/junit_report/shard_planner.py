@@ -0,0 +1,156 @@
+import argparse
+import heapq
+import json
+import os
+import statistics
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple, Union
+from xml.etree import ElementTree
+
+from .history import HistoryStore
+
+
+@dataclass
+class Shard:
+    index: int
+    suites: List[str] = field(default_factory=list)
+    duration: float = 0.0
+
+
+class ShardPlanner:
+    """
+    Distribute test suites across N shards (CI workers) so their expected wall-clock time is balanced.
+    Suites durations are taken from previous runs, either existing JUnit xml reports or a HistoryStore database,
+    and suites are assigned using the longest-processing-time heuristic: longest suites first, each suite to the
+    shard with the least total duration so far.
+    Suites without known duration are assumed to take the median duration of the known suites.
+    """
+
+    SHARD_FILE_FORMAT = "shard_{index}.txt"
+
+    def __init__(self, durations: Dict[str, float]):
+        """
+        :param durations: Expected duration in seconds by suite name
+        """
+        self._durations = durations
+
+    @property
+    def durations(self) -> Dict[str, float]:
+        return self._durations
+
+    @classmethod
+    def from_reports(cls, report_dirs: Sequence[Union[Path, str]], pattern: str = "*.xml") -> "ShardPlanner":
+        """
+        :param report_dirs: Directories of previous runs reports, each directory is considered a single run
+        :param pattern: Reports glob pattern
+        :return: ShardPlanner with the average suites durations across the given runs
+        """
+        runs_durations: Dict[str, List[float]] = dict()
+        for report_dir in report_dirs:
+            run_durations: Dict[str, float] = dict()
+            for path in Path(report_dir).glob(pattern):
+                for name, duration in cls._read_suites_durations(path):
+                    run_durations[name] = run_durations.get(name, 0.0) + duration
+            for name, duration in run_durations.items():
+                runs_durations.setdefault(name, list()).append(duration)
+
+        return cls({name: statistics.mean(durations) for name, durations in runs_durations.items()})
+
+    @classmethod
+    def from_history(cls, store: HistoryStore, runs: int = None,
+                     aggregate: Callable[[List[float]], float] = statistics.median) -> "ShardPlanner":
+        """
+        :param store: HistoryStore database
+        :param runs: Number of latest runs to use, all runs if not set
+        :param aggregate: Function that reduces a suite durations series to the expected duration
+        :return: ShardPlanner with the aggregated suites durations
+        """
+        return cls({name: aggregate(durations) for name, durations in store.get_suites_durations(runs).items()})
+
+    @staticmethod
+    def _read_suites_durations(path: Path) -> List[Tuple[str, float]]:
+        """
+        Read the testsuite elements attributes, the document is parsed incrementally and each element is cleared
+        once parsed, so memory doesn't grow with the number of cases
+        """
+        durations = list()
+        for event, element in ElementTree.iterparse(str(path), events=("start", "end")):
+            if event == "start":
+                if element.tag == "testsuite":
+                    durations.append((element.get("name", ""), float(element.get("time") or 0)))
+            else:
+                element.clear()
+        return durations
+
+    def plan(self, shards: int, suites: Iterable[str] = None, default_duration: float = None) -> List[Shard]:
+        """
+        Assign suites to shards
+        :param shards: Number of shards
+        :param suites: Suites to distribute, all suites with known duration if not set
+        :param default_duration: Expected duration of suites without known duration, median duration if not set
+        :return: Shards with their assigned suites and expected total duration
+        """
+        if shards < 1:
+            raise ValueError(f"Invalid number of shards {shards}")
+
+        suites = sorted(set(self._durations if suites is None else suites))
+        if default_duration is None:
+            default_duration = statistics.median(self._durations.values()) if self._durations else 0.0
+
+        durations = {suite: self._durations.get(suite, default_duration) for suite in suites}
+        plan = [Shard(index) for index in range(shards)]
+        heap = [(0.0, index) for index in range(shards)]
+        for suite in sorted(suites, key=lambda s: (-durations[s], s)):
+            _, index = heapq.heappop(heap)
+            plan[index].suites.append(suite)
+            plan[index].duration += durations[suite]
+            heapq.heappush(heap, (plan[index].duration, index))
+        return plan
+
+    @classmethod
+    def write_plan(cls, plan: List[Shard], output_dir: Union[Path, str]) -> List[Path]:
+        """
+        Write each shard selection list as text file, one suite per line
+        :param plan: Planned shards
+        :param output_dir: Target directory, created if not exists
+        :return: Written files paths
+        """
+        os.makedirs(output_dir, exist_ok=True)
+        paths = list()
+        for shard in plan:
+            path = Path(output_dir).joinpath(cls.SHARD_FILE_FORMAT.format(index=shard.index))
+            path.write_text("".join(f"{suite}\n" for suite in shard.suites))
+            paths.append(path)
+        return paths
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m junit_report.shard_planner",
+                                     description="Distribute test suites across shards by historical duration")
+    parser.add_argument("--shards", type=int, required=True, help="Number of shards")
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument("--reports", type=Path, nargs="+", help="Previous runs reports directories")
+    source.add_argument("--history", type=Path, help="HistoryStore database")
+    parser.add_argument("--runs", type=int, help="Number of latest history runs to use")
+    parser.add_argument("--suite", action="append", dest="suites", help="Suite to distribute (repeatable), "
+                                                                        "all known suites if not set")
+    parser.add_argument("--default-duration", type=float, help="Expected duration of unknown suites")
+    parser.add_argument("--output-dir", type=Path, help="Write shard_<index>.txt selection lists into directory")
+    args = parser.parse_args(argv)
+
+    if args.history:
+        planner = ShardPlanner.from_history(HistoryStore(args.history), args.runs)
+    else:
+        planner = ShardPlanner.from_reports(args.reports)
+
+    plan = planner.plan(args.shards, args.suites, args.default_duration)
+    if args.output_dir:
+        ShardPlanner.write_plan(plan, args.output_dir)
+    print(json.dumps([{"index": s.index, "duration": round(s.duration, 3), "suites": s.suites} for s in plan],
+                     indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
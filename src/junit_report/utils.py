@@ -1,16 +1,22 @@
+import hashlib
 import os
 import re
+import sys
 import time
+import traceback
 from abc import ABC
 from contextlib import suppress
 from dataclasses import dataclass
 from enum import Enum
 from pathlib import Path
-from typing import Callable, Any, Tuple, List, Union, Dict, Optional
+from typing import TYPE_CHECKING, Callable, Any, Tuple, List, Union, Dict, Optional, Iterator
+from xml.etree import ElementTree
 
-import pytest
-from _pytest.mark import Mark
-from junit_xml import TestCase
+from junit_xml import TestCase, TestSuite
+
+if TYPE_CHECKING:  # pytest is imported only by the decorators, exporting doesn't require it
+    import pytest
+    from _pytest.mark import Mark
 
 
 class TestCaseCategories(Enum):
@@ -20,23 +26,240 @@ class TestCaseCategories(Enum):
     FIXTURE_TEARDOWN = "fixture-teardown"
 
 
+class ReportTestCase(TestCase):
+    """ junit_xml TestCase with testcase properties """
+
+    def __init__(self, *args, properties: Dict[str, str] = None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.properties = properties or dict()
+
+    def add_property(self, name: str, value: Any) -> None:
+        self.properties[name] = str(value)
+
+
+class ReportTestSuite(TestSuite):
+    """ junit_xml TestSuite that exports testcase properties (<properties> element of each testcase) """
+
+    def build_xml_doc(self, encoding=None):
+        xml_element = super().build_xml_doc(encoding)
+        for case, case_element in zip(self.test_cases, xml_element.findall("testcase")):
+            properties = getattr(case, "properties", None)
+            if properties:
+                properties_element = ElementTree.Element("properties")
+                for name, value in properties.items():
+                    ElementTree.SubElement(properties_element, "property", {"name": str(name), "value": str(value)})
+                case_element.insert(0, properties_element)
+        return xml_element
+
+
+class LazyTraceback:
+    """
+    Compact traceback summary of an exception.
+    Only the frames summary is kept (no frames, locals or source lines), the traceback is formatted on first use,
+    usually when the report is exported.
+    """
+
+    __slots__ = ("_traceback_exception", "_formatted")
+
+    def __init__(self, exception: BaseException, limit: Optional[int] = None):
+        """
+        :param exception: Raised exception
+        :param limit: Max number of stack entries to keep (same as traceback module limit), unlimited if not set
+        """
+        self._traceback_exception = traceback.TracebackException.from_exception(
+            exception, limit=limit, lookup_lines=False
+        )
+        self._formatted = None
+
+    def __str__(self) -> str:
+        return self.format()
+
+    def __bool__(self) -> bool:
+        return True
+
+    def __eq__(self, other) -> bool:
+        return str(self) == str(other)
+
+    def __hash__(self) -> int:
+        return hash(self.key)
+
+    @property
+    def key(self) -> bytes:
+        """ Content hash of the traceback, identical tracebacks have the same key """
+        digest = hashlib.blake2b(digest_size=16)
+        for exception in self._iter_chain():
+            digest.update(f"{exception.exc_type}:{exception}\n".encode(errors="replace"))
+            for frame in exception.stack:
+                digest.update(f"{frame.filename}:{frame.lineno}:{frame.name}\n".encode(errors="replace"))
+        return digest.digest()
+
+    def _iter_chain(self) -> Iterator[traceback.TracebackException]:
+        exception = self._traceback_exception
+        while exception is not None:
+            yield exception
+            exception = exception.__cause__ or (None if exception.__suppress_context__ else exception.__context__)
+
+    def format(self) -> str:
+        if self._formatted is None:
+            self._formatted = "".join(self._traceback_exception.format())
+        return self._formatted
+
+    def resolve(self, cache: Dict[bytes, str]) -> str:
+        """
+        Format traceback once per content, identical tracebacks share the same formatted string
+        :param cache: Formatted tracebacks by key
+        :return: Formatted traceback
+        """
+        if self._formatted is None:
+            key = self.key
+            if key not in cache:
+                cache[key] = self.format()
+            self._formatted = cache[key]
+        return self._formatted
+
+
 @dataclass
 class CaseFailure:
+    """ Failure of a test case, accessible as the junit_xml failure dict (failure["message"]) """
+
     message: str
-    output: str = ""
+    output: Union[str, LazyTraceback] = ""
     type: str = ""
 
+    @classmethod
+    def from_exception(cls, exception: BaseException, message: str = None) -> "CaseFailure":
+        """
+        Create failure from exception, the traceback is formatted lazily
+        :param exception: Raised exception
+        :param message: Failure message, str(exception) if not set
+        :return: CaseFailure
+        """
+        return cls(message=str(exception) if message is None else message,
+                   output=LazyTraceback(exception, Utils.get_traceback_limit()),
+                   type=exception.__class__.__name__)
+
     def __getitem__(self, item):
-        return self.__getattribute__(item)
+        value = self.__getattribute__(item)
+        return str(value) if isinstance(value, LazyTraceback) else value
+
+
+class CaseRecord:
+    """
+    Compact record of a single test case result, kept while the suite is running and converted to ReportTestCase
+    only when the report is exported.
+    Records are slotted, classname and category strings are interned (shared between all records of the same class)
+    and the failures list and properties dict are allocated only when used.
+    """
+
+    __slots__ = ("name", "_classname", "_category", "elapsed_sec", "timestamp", "stdout", "stderr", "_failures",
+                 "_properties")
+
+    def __init__(self, name: str, classname: str = None, category: str = None, elapsed_sec: float = None,
+                 timestamp: Any = None):
+        self.name = name
+        self.classname = classname
+        self.category = category
+        self.elapsed_sec = elapsed_sec
+        self.timestamp = timestamp
+        self.stdout = None
+        self.stderr = None
+        self._failures: Optional[List[CaseFailure]] = None
+        self._properties: Optional[Dict[str, str]] = None
+
+    @property
+    def classname(self) -> Optional[str]:
+        return self._classname
+
+    @classname.setter
+    def classname(self, classname: Optional[str]) -> None:
+        self._classname = sys.intern(classname) if classname is not None else None
+
+    @property
+    def category(self) -> Optional[str]:
+        return self._category
+
+    @category.setter
+    def category(self, category: Optional[str]) -> None:
+        self._category = sys.intern(category) if category is not None else None
+
+    @property
+    def failures(self) -> Union[List[CaseFailure], Tuple]:
+        """ Read only view of the case failures, use add_failure to add a failure """
+        return self._failures if self._failures is not None else ()
+
+    @property
+    def properties(self) -> Dict[str, str]:
+        return dict(self._properties) if self._properties else dict()
+
+    def add_failure(self, failure: CaseFailure) -> None:
+        if self._failures is None:
+            self._failures = list()
+        self._failures.append(failure)
+
+    def add_property(self, name: str, value: Any) -> None:
+        if self._properties is None:
+            self._properties = dict()
+        self._properties[name] = str(value)
+
+    def is_failure(self) -> bool:
+        return any(failure["message"] or failure["output"] for failure in self.failures)
+
+    def to_test_case(self) -> ReportTestCase:
+        """
+        :return: Exported format of the record
+        """
+        case = ReportTestCase(name=self.name, classname=self._classname, elapsed_sec=self.elapsed_sec,
+                              stdout=self.stdout, stderr=self.stderr, timestamp=self.timestamp,
+                              category=self._category, properties=self.properties)
+        case.failures.extend(self.failures)
+        return case
+
+    def to_dict(self) -> Dict[str, Any]:
+        """
+        :return: Compact representation of the record (built-in types only) for sending it to another process,
+                 failures tracebacks are formatted
+        """
+        record = {"name": self.name, "classname": self._classname, "category": self._category,
+                  "elapsed_sec": self.elapsed_sec}
+        for key in ("timestamp", "stdout", "stderr"):
+            if getattr(self, key) is not None:
+                record[key] = getattr(self, key)
+        if self._failures:
+            record["failures"] = [[failure.message, str(failure.output), failure.type] for failure in self._failures]
+        if self._properties:
+            record["properties"] = dict(self._properties)
+        return record
+
+    @classmethod
+    def from_dict(cls, record: Dict[str, Any]) -> "CaseRecord":
+        """
+        :param record: Record representation created by to_dict
+        :return: CaseRecord
+        """
+        case = cls(name=record["name"], classname=record.get("classname"), category=record.get("category"),
+                   elapsed_sec=record.get("elapsed_sec"), timestamp=record.get("timestamp"))
+        case.stdout = record.get("stdout")
+        case.stderr = record.get("stderr")
+        for message, output, failure_type in record.get("failures", ()):
+            case.add_failure(CaseFailure(message=message, output=output, type=failure_type))
+        for name, value in record.get("properties", dict()).items():
+            case.add_property(name, value)
+        return case
 
 
-@dataclass
 class TestCaseData:
-    case: TestCase
-    _func: Callable
-    _start_time: float
-    parametrize: Union[None, List[Tuple[str, Any]]] = None
-    _has_parent = False
+    """ Per-case state of a running JunitTestCase, registered to its suite once the case has finished """
+
+    __slots__ = ("case", "_func", "_start_time", "parametrize", "_has_parent", "is_inside_fixture")
+
+    def __init__(self, case: CaseRecord, _func: Callable, _start_time: float,
+                 parametrize: Union[None, List[Tuple[str, Any]]] = None):
+        self.case = case
+        self._func = _func
+        self._start_time = _start_time
+        self.parametrize = parametrize
+        self._has_parent = False
+        self.is_inside_fixture = False
 
     @property
     def name(self):
@@ -67,10 +290,11 @@ class TestCaseData:
 class Utils(ABC):
     JUNIT_EXCEPTION_TAG = "__is_junit_exception__"
     DEFAULT_REPORT_PATH_KEY = "JUNIT_REPORT_DIR"
+    TRACEBACK_LIMIT_KEY = "JUNIT_REPORT_TRACEBACK_LIMIT"
 
     @staticmethod
-    def get_new_test_case(func: Callable, classname: str, category: TestCaseCategories) -> TestCase:
-        return TestCase(name=func.__name__, classname=classname, category=category.value)
+    def get_new_test_case(func: Callable, classname: str, category: TestCaseCategories) -> CaseRecord:
+        return CaseRecord(name=func.__name__, classname=classname, category=category.value)
 
     @classmethod
     def is_case_exception_already_raised(cls, exception: BaseException) -> bool:
@@ -81,7 +305,7 @@ class Utils(ABC):
         setattr(exception, cls.JUNIT_EXCEPTION_TAG, True)
 
     @staticmethod
-    def get_wrapped_function(func: pytest.Function, func_name: str = None) -> Callable:
+    def get_wrapped_function(func: "pytest.Function", func_name: str = None) -> Callable:
         """
         Get wrapped function from class or module
         :param func: wrapped function from class or module
@@ -101,13 +325,37 @@ class Utils(ABC):
             return Path(os.getenv(cls.DEFAULT_REPORT_PATH_KEY, Path.cwd()))
         return report_dir
 
+    @classmethod
+    def get_traceback_limit(cls) -> Optional[int]:
+        """
+        :return: JUNIT_REPORT_TRACEBACK_LIMIT value, None (unlimited) if not set or invalid - it's read while
+                 handling the case exception, which must not be masked by a configuration error
+        """
+        try:
+            return int(os.getenv(cls.TRACEBACK_LIMIT_KEY) or "")
+        except ValueError:
+            return None
+
+    @staticmethod
+    def resolve_tracebacks(test_cases: List[TestCase], cache: Dict[bytes, str]) -> None:
+        """
+        Format lazy tracebacks of the given cases, identical tracebacks are formatted once
+        :param test_cases: Test cases to resolve
+        :param cache: Formatted tracebacks by key, shared between all cases of the same suite
+        :return: None
+        """
+        for case in test_cases:
+            for failure in case.failures:
+                if isinstance(failure, CaseFailure) and isinstance(failure.output, LazyTraceback):
+                    failure.output.resolve(cache)
+
 
 class PytestUtils:
     PARAMETERIZED_KEY = "parametrize"
     OWN_MARKERS_KEY = "own_markers"
 
     @classmethod
-    def get_case_pytest_parameterized(cls, pytest_function: pytest.Function) -> List[Tuple[str, Any]]:
+    def get_case_pytest_parameterized(cls, pytest_function: "pytest.Function") -> List[Tuple[str, Any]]:
         return (list(
             sorted(pytest_function.callspec.params.items())) if pytest_function and pytest_function.own_markers and all(
             m.name == cls.PARAMETERIZED_KEY for m in pytest_function.own_markers) else list())
@@ -128,6 +376,8 @@ class PytestUtils:
 
     @classmethod
     def _get_parameterized_on_no_cases(cls, func: Callable, stack_locals) -> List[Tuple[str, Any]]:
+        import pytest
+
         for f_locals in [stack_local for stack_local in stack_locals if "pyfuncitem" in stack_local]:
             pytest_func = f_locals["pyfuncitem"]
             if hasattr(func, "pytestmark"):
@@ -138,7 +388,7 @@ class PytestUtils:
         return list()
 
     @classmethod
-    def get_fixture_suite(cls, func: pytest.Function):
+    def get_fixture_suite(cls, func: "pytest.Function"):
         with suppress(AttributeError):
             # if pytest.mark.parametrize exist, get actual function from class while ignoring the add parameters
             if hasattr(func, cls.OWN_MARKERS_KEY) and len(func.own_markers) > 0:
@@ -150,7 +400,7 @@ class PytestUtils:
         return None
 
     @classmethod
-    def get_fixture_data(cls, func: pytest.Function) -> Tuple[List[str], List[Mark]]:
+    def get_fixture_data(cls, func: "pytest.Function") -> Tuple[List[str], List["Mark"]]:
         marks = [m for m in func.own_markers if m.name == cls.PARAMETERIZED_KEY]
         marks_count = len(marks)
 
@@ -162,7 +412,7 @@ class PytestUtils:
         return args, marks
 
     @classmethod
-    def get_fixture_parameterized(cls, func: pytest.Function) -> List[Tuple]:
+    def get_fixture_parameterized(cls, func: "pytest.Function") -> List[Tuple]:
         args, marks = cls.get_fixture_data(func)
         marks_count = len(marks)
         if not marks:
@@ -174,7 +424,7 @@ class PytestUtils:
         return parameterized
 
     @classmethod
-    def get_fixture_mark_function(cls, func: pytest.Function) -> Union[Callable, None]:
+    def get_fixture_mark_function(cls, func: "pytest.Function") -> Union[Callable, None]:
         """
         If mark parameterize decorate test suite with given fixture _get_mark_function is searching
         for all parametrize arguments and permutations.
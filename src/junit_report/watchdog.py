@@ -0,0 +1,149 @@
+import os
+import sys
+import threading
+import time
+import traceback
+from typing import Any, Callable, ClassVar, Dict, List, Optional, Set, Tuple
+
+from .utils import CaseRecord
+
+
+class CaseHang(AssertionError):
+    """ Error type of cases that were still running when the hang watchdog timeout expired """
+
+
+class HangWatchdog:
+    """
+    Watchdog thread of a running suite that detects hanging cases.
+    Cases register when they start and unregister when they finish (only while a watchdog is running).
+    When a case that started during the watched suite runs for more than timeout seconds, the stacks of all threads
+    are captured and passed to on_hang together with the hanging cases, once per case. JunitTestSuite uses it to write
+    a partial report - the completed cases and the hanging cases as errors with the captured stacks - before the CI job
+    timeout kills the process. The final report replaces it if the suite finishes after all.
+    Cases are registered with the suite running them (their owner), each watchdog reports only the cases of its
+    own suite. Cases without a known owner (e.g. started on another thread) are reported only while a single
+    watchdog is running.
+    Timeout can be set per suite or using JUNIT_REPORT_HANG_TIMEOUT environment variable (seconds).
+    """
+
+    HANG_TIMEOUT_KEY = "JUNIT_REPORT_HANG_TIMEOUT"
+    PARTIAL_PROPERTY = "junit_report.partial"
+    MIN_INTERVAL = 0.05
+    MAX_INTERVAL = 1.0
+
+    _running_cases: ClassVar[Dict[int, Tuple[CaseRecord, float, Any]]] = dict()
+    _active: ClassVar[int] = 0
+    _lock: ClassVar[threading.Lock] = threading.Lock()
+
+    def __init__(self, timeout: float, on_hang: Callable[[List[Tuple[CaseRecord, float]], str], None],
+                 interval: float = None, owner: Any = None):
+        """
+        :param timeout: Seconds a case may run before it's considered hanging
+        :param on_hang: Called on the watchdog thread with the newly hanging cases (record, elapsed seconds)
+                        and the formatted stacks of all threads
+        :param interval: Seconds between checks, derived from timeout if not set
+        :param owner: Watched suite, only the cases started with this owner (or without owner) are reported
+        """
+        self._timeout = timeout
+        self._owner = owner
+        self._on_hang = on_hang
+        self._interval = interval or min(max(timeout / 10, self.MIN_INTERVAL), self.MAX_INTERVAL)
+        self._stop_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._start_time = 0.0
+        self._reported: Set[int] = set()
+
+    @property
+    def timeout(self) -> float:
+        return self._timeout
+
+    @classmethod
+    def get_timeout(cls, timeout: float = None) -> Optional[float]:
+        """
+        :param timeout: Explicit timeout, JUNIT_REPORT_HANG_TIMEOUT environment variable is used if not set
+        :return: Hang timeout in seconds, None if disabled or the environment variable is invalid
+        """
+        if timeout is None:
+            try:
+                timeout = float(os.getenv(cls.HANG_TIMEOUT_KEY) or 0)
+            except ValueError:
+                return None
+        return timeout if timeout > 0 else None
+
+    @classmethod
+    def is_active(cls) -> bool:
+        return cls._active > 0
+
+    @classmethod
+    def case_started(cls, case: CaseRecord, owner: Any = None) -> None:
+        """
+        :param case: Started case
+        :param owner: Suite running the case, if known
+        :return: None
+        """
+        if cls._active:
+            with cls._lock:
+                cls._running_cases[id(case)] = (case, time.monotonic(), owner)
+
+    @classmethod
+    def case_finished(cls, case: CaseRecord) -> None:
+        if cls._running_cases:
+            with cls._lock:
+                cls._running_cases.pop(id(case), None)
+
+    def start(self) -> None:
+        with self._lock:
+            HangWatchdog._active += 1
+        self._start_time = time.monotonic()
+        self._reported = set()
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, name="junit-report-watchdog", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        if self._thread is None:
+            return
+        self._stop_event.set()
+        self._thread.join()
+        self._thread = None
+        with self._lock:
+            HangWatchdog._active -= 1
+
+    def _run(self) -> None:
+        while not self._stop_event.wait(self._interval):
+            hanging = self.get_hanging_cases()
+            if hanging:
+                self._on_hang(hanging, self.format_stacks())
+
+    def get_hanging_cases(self) -> List[Tuple[CaseRecord, float]]:
+        """
+        :return: Cases started during the watched suite that passed the timeout and weren't reported yet,
+                 with their elapsed seconds
+        """
+        now = time.monotonic()
+        with self._lock:
+            running = list(self._running_cases.items())
+            single_watchdog = HangWatchdog._active == 1
+
+        hanging = list()
+        for key, (case, start_time, owner) in running:
+            if owner is not self._owner and (owner is not None or not single_watchdog):
+                continue  # case of another suite
+            if start_time >= self._start_time and now - start_time > self._timeout and key not in self._reported:
+                self._reported.add(key)
+                hanging.append((case, now - start_time))
+        return hanging
+
+    @staticmethod
+    def format_stacks() -> str:
+        """
+        :return: Stacks of all threads (except the current one), like faulthandler.dump_traceback
+        """
+        names = {thread.ident: thread.name for thread in threading.enumerate()}
+        current = threading.get_ident()
+        stacks = list()
+        for thread_id, frame in sys._current_frames().items():
+            if thread_id != current:
+                stack = "".join(traceback.format_stack(frame))
+                stacks.append(f"Thread {names.get(thread_id, '<unknown>')} ({thread_id}):\n{stack}")
+        return "\n".join(stacks)
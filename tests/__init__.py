@@ -72,6 +72,14 @@ class BaseTest:
             return [cases]
         return cases
 
+    @staticmethod
+    def get_properties(element: dict) -> dict:
+        if "properties" not in element:
+            return dict()
+        properties = element["properties"]["property"]
+        properties = properties if isinstance(properties, list) else [properties]
+        return {p["@name"]: p["@value"] for p in properties}
+
     @staticmethod
     def delete_test_suite(key: Callable):
         JunitTestSuite._junit_suites.pop(key)
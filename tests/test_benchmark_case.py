@@ -0,0 +1,82 @@
+import shutil
+import time
+
+import pytest
+import xmltodict
+
+from src.junit_report import JunitBenchmarkCase, JunitTestSuite
+from tests import REPORT_DIR, BaseTest
+
+
+class TestBenchmarkCase(BaseTest):
+    @classmethod
+    @pytest.fixture(autouse=True)
+    def cleanup(cls):
+        yield
+        shutil.rmtree(REPORT_DIR, ignore_errors=True)
+
+    def test_benchmark_case(self):
+        calls = list()
+
+        class A:
+            REPORT_PATH = REPORT_DIR.joinpath("junit_A_test_suite_report.xml")
+
+            @JunitBenchmarkCase(iterations=5, warmup=2)
+            def benchmark_case(self, value):
+                calls.append(value)
+                return value * 2
+
+            @JunitBenchmarkCase(iterations=1000, warmup=0, time_budget=0.05)
+            def budget_case(self):
+                time.sleep(0.01)
+
+            @JunitTestSuite(REPORT_DIR)
+            def test_suite(self):
+                assert self.benchmark_case(3) == 6
+                self.budget_case()
+
+        A().test_suite()
+
+        xml_results = xmltodict.parse(A.REPORT_PATH.read_text())
+        self.assert_xml_report_results(xml_results, testsuite_tests=2, failures=0, testsuite_name="A_test_suite")
+        benchmark_case, budget_case = xml_results["testsuites"]["testsuite"]["testcase"]
+
+        properties = self.get_properties(benchmark_case)
+        assert len(calls) == 7
+        assert properties["benchmark.iterations"] == "5"
+        assert properties["benchmark.warmup"] == "2"
+        assert float(properties["benchmark.min_sec"]) <= float(properties["benchmark.median_sec"]) <= \
+            float(properties["benchmark.max_sec"])
+        assert float(properties["benchmark.ops_per_sec"]) > 0
+
+        properties = self.get_properties(budget_case)
+        assert 1 <= int(properties["benchmark.iterations"]) < 1000
+        assert float(properties["benchmark.mean_sec"]) >= 0.01
+
+        self.delete_test_suite(A.test_suite.__wrapped__)
+
+    def test_benchmark_case_failure(self):
+        class A:
+            REPORT_PATH = REPORT_DIR.joinpath("junit_A_test_suite_report.xml")
+
+            def __init__(self):
+                self.calls = 0
+
+            @JunitBenchmarkCase(iterations=5, warmup=0)
+            def failing_case(self):
+                self.calls += 1
+                assert self.calls < 3
+
+            @JunitTestSuite(REPORT_DIR)
+            def test_suite(self):
+                self.failing_case()
+
+        with pytest.raises(AssertionError):
+            A().test_suite()
+
+        xml_results = xmltodict.parse(A.REPORT_PATH.read_text())
+        self.assert_xml_report_results(xml_results, testsuite_tests=1, failures=1, testsuite_name="A_test_suite")
+        properties = self.get_properties(xml_results["testsuites"]["testsuite"]["testcase"])
+        assert properties["benchmark.iterations"] == "2"
+
+        self.delete_test_suite(A.test_suite.__wrapped__)
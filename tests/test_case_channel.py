@@ -0,0 +1,128 @@
+import multiprocessing
+import os
+import shutil
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import suppress
+
+import pytest
+import xmltodict
+
+from src.junit_report import JunitTestCase, JunitTestSuite
+from src.junit_report.case_channel import CaseChannel
+from tests import REPORT_DIR, BaseTest
+
+
+@JunitTestCase()
+def verify_chunk(chunk: int):
+    if chunk == 2:
+        raise ValueError(f"Invalid chunk {chunk}")
+    return chunk * 2
+
+
+def run_chunk(chunk: int):
+    with suppress(ValueError):
+        return verify_chunk(chunk)
+
+
+class ChildSuite:
+    @JunitTestSuite(REPORT_DIR)
+    def test_suite(self):
+        self.child_case()
+
+    @JunitTestCase()
+    def child_case(self):
+        pass
+
+
+def run_child_suite():
+    ChildSuite().test_suite()
+
+
+class TestCaseChannel(BaseTest):
+    @classmethod
+    @pytest.fixture(autouse=True)
+    def cleanup(cls):
+        yield
+        shutil.rmtree(REPORT_DIR, ignore_errors=True)
+
+    @staticmethod
+    def get_suite_class(start_method: str):
+        class A:
+            @JunitTestSuite(REPORT_DIR, collect_child_processes=True)
+            def test_suite(self):
+                context = multiprocessing.get_context(start_method)
+                processes = [context.Process(target=run_chunk, args=(i,)) for i in range(3)]
+                for process in processes:
+                    process.start()
+                for process in processes:
+                    process.join()
+                self.local_case()
+
+            @JunitTestCase()
+            def local_case(self):
+                pass
+
+        return A
+
+    @pytest.mark.skipif(not hasattr(os, "fork"), reason="fork start method is not available")
+    def test_forked_children_cases(self):
+        self.assert_children_cases("fork")
+
+    def test_spawned_children_cases(self):
+        self.assert_children_cases("spawn")
+
+    def assert_children_cases(self, start_method: str):
+        suite_class = self.get_suite_class(start_method)
+        suite_class().test_suite()
+        xml_results = xmltodict.parse(REPORT_DIR.joinpath("junit_A_test_suite_report.xml").read_text())
+        cases = self.assert_xml_report_results(xml_results, testsuite_tests=4, testsuite_name="A_test_suite",
+                                               failures=1)
+        assert sorted(case["@name"] for case in cases) == ["local_case"] + ["verify_chunk"] * 3
+        failures = [case["failure"] for case in cases if "failure" in case]
+        assert failures[0]["@message"] == "Invalid chunk 2" and "ValueError" in failures[0]["#text"]
+        assert CaseChannel.ADDRESS_KEY not in os.environ
+        self.delete_test_suite(suite_class.test_suite.__wrapped__)
+
+    def test_process_pool_cases(self):
+        class A:
+            @JunitTestSuite(REPORT_DIR, collect_child_processes=True)
+            def test_suite(self):
+                with ProcessPoolExecutor(2, mp_context=multiprocessing.get_context("spawn")) as executor:
+                    assert list(executor.map(run_chunk, [0, 1, 3])) == [0, 2, 6]
+
+        A().test_suite()
+        xml_results = xmltodict.parse(REPORT_DIR.joinpath("junit_A_test_suite_report.xml").read_text())
+        self.assert_xml_report_results(xml_results, testsuite_tests=3, testsuite_name="A_test_suite")
+        self.delete_test_suite(A.test_suite.__wrapped__)
+
+    def test_child_process_own_suite(self):
+        class A:
+            @JunitTestSuite(REPORT_DIR, collect_child_processes=True)
+            def test_suite(self):
+                process = multiprocessing.get_context("spawn").Process(target=run_child_suite)
+                process.start()
+                process.join()
+                self.local_case()
+
+            @JunitTestCase()
+            def local_case(self):
+                pass
+
+        A().test_suite()
+        xml_results = xmltodict.parse(REPORT_DIR.joinpath("junit_A_test_suite_report.xml").read_text())
+        self.assert_xml_report_results(xml_results, testsuite_tests=1, testsuite_name="A_test_suite")
+
+        # the child process suite cases are reported by the child process
+        xml_results = xmltodict.parse(REPORT_DIR.joinpath("junit_ChildSuite_test_suite_report.xml").read_text())
+        self.assert_xml_report_results(xml_results, testsuite_tests=1, testsuite_name="ChildSuite_test_suite")
+        self.delete_test_suite(A.test_suite.__wrapped__)
+
+    def test_not_child_process(self):
+        channel = CaseChannel(lambda case, parametrize: None)
+        channel.start()
+        try:
+            assert not CaseChannel.is_child()
+            assert os.environ[CaseChannel.ADDRESS_KEY] == channel.address
+        finally:
+            channel.stop()
+        assert channel.address is None and CaseChannel.OWNER_KEY not in os.environ
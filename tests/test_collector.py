@@ -0,0 +1,110 @@
+import json
+import shutil
+import tempfile
+import time
+from pathlib import Path
+
+import pytest
+import xmltodict
+
+from src.junit_report import CaseFormatKeys, JsonJunitExporter, JunitTestCase, JunitTestSuite, ReportManifest
+from src.junit_report.collector import CollectorClient, ReportCollector, case_from_dict, case_to_dict
+from src.junit_report.utils import CaseFailure, ReportTestCase
+from tests import REPORT_DIR, BaseTest
+from tests.test_entry_exporter import JSON_DATA
+
+
+class TestCollector(BaseTest):
+    @classmethod
+    @pytest.fixture(autouse=True)
+    def cleanup(cls):
+        yield
+        shutil.rmtree(REPORT_DIR, ignore_errors=True)
+
+    @pytest.fixture
+    def collector(self, monkeypatch):
+        socket_dir = tempfile.mkdtemp()
+        collector = ReportCollector(Path(socket_dir).joinpath("collector.sock"), flush_interval=60)
+        collector.start()
+        monkeypatch.setenv(CollectorClient.COLLECTOR_KEY, collector.address)
+        yield collector
+        collector.stop()
+        shutil.rmtree(socket_dir, ignore_errors=True)
+
+    def test_case_record(self):
+        case = ReportTestCase(name="test", classname="module.Class", elapsed_sec=0.5, category="function",
+                              properties={"key": "1"})
+        case.failures.append(CaseFailure(message="some message", output="bla bla", type="ValueError"))
+        case.skipped.append({"message": "skipped", "output": None, "type": None})
+
+        restored = case_from_dict(json.loads(json.dumps(case_to_dict(case))))
+        assert (restored.name, restored.classname, restored.elapsed_sec, restored.category) == (
+            "test", "module.Class", 0.5, "function")
+        assert restored.failures == case.failures and restored.properties == {"key": "1"}
+        assert restored.is_skipped() and restored.stdout is None
+
+    def test_suites_written_by_collector(self, collector):
+        class A:
+            @JunitTestSuite(REPORT_DIR, custom_filename="merged", manifest=True)
+            def test_suite(self):
+                self.test_case()
+
+            @JunitTestSuite(REPORT_DIR, custom_filename="merged")
+            def other_suite(self):
+                self.test_case()
+
+            @JunitTestCase()
+            def test_case(self):
+                pass
+
+        A().test_suite()
+        A().other_suite()
+        exporter = JsonJunitExporter(fmt=CaseFormatKeys(case_name="id", severity_key="severity"))
+        file_name = exporter.collect(json.loads(JSON_DATA), suite_name="all_test_suite", report_dir=REPORT_DIR)
+        path = REPORT_DIR.joinpath("merged.xml")
+        assert not path.exists() and not Path(file_name).exists()
+
+        assert sorted(collector.stop()) == sorted([path, Path(file_name)])
+        suites = xmltodict.parse(path.read_text())["testsuites"]["testsuite"]
+        assert [suite["@name"] for suite in suites] == ["A_test_suite", "A_other_suite"]
+        self.assert_xml_report_results(xmltodict.parse(Path(file_name).read_text()), testsuite_tests=6, failures=2,
+                                       testsuite_name="all_test_suite")
+        assert ReportManifest(REPORT_DIR).load()["merged.xml"]["tests"] == 2
+        assert collector.flush() == list()
+
+        self.delete_test_suite(A.test_suite.__wrapped__)
+        self.delete_test_suite(A.other_suite.__wrapped__)
+
+    def test_fallback_to_direct_export(self, monkeypatch):
+        monkeypatch.setenv(CollectorClient.COLLECTOR_KEY, str(REPORT_DIR.joinpath("missing.sock")))
+        exporter = JsonJunitExporter(fmt=CaseFormatKeys(case_name="id", severity_key="severity"))
+        file_name = exporter.collect(json.loads(JSON_DATA), suite_name="all_test_suite", report_dir=REPORT_DIR)
+        assert Path(file_name).exists()
+
+    def test_stop_flushes_pending_reports(self, collector):
+        exporter = JsonJunitExporter(fmt=CaseFormatKeys(case_name="id", severity_key="severity"))
+        file_name = exporter.collect(json.loads(JSON_DATA), suite_name="all_test_suite", report_dir=REPORT_DIR)
+        assert collector.stop() == [Path(file_name)]
+        assert not CollectorClient.is_available(collector.address)
+
+    def test_idle_reports_evicted(self, monkeypatch):
+        socket_dir = tempfile.mkdtemp()
+        collector = ReportCollector(Path(socket_dir).joinpath("collector.sock"), flush_interval=60, idle_timeout=0)
+        collector.start()
+        monkeypatch.setenv(CollectorClient.COLLECTOR_KEY, collector.address)
+        exporter = JsonJunitExporter(fmt=CaseFormatKeys(case_name="id", severity_key="severity"))
+        try:
+            for i in range(5):
+                exporter.collect(json.loads(JSON_DATA), suite_name=f"suite_{i}", report_dir=REPORT_DIR)
+                with CollectorClient._lock:  # the producer exits
+                    CollectorClient._connection.close()
+                    CollectorClient._connection = None
+                time.sleep(0.2)
+                assert len(collector._readers) == 1  # readers of closed connections are pruned
+        finally:
+            written = collector.stop()
+            shutil.rmtree(socket_dir, ignore_errors=True)
+
+        assert len(written) == 5
+        assert collector._reports == dict()
+        assert collector.flush() == list()
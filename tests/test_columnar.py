@@ -0,0 +1,68 @@
+import json
+import math
+import shutil
+
+import pytest
+
+from src.junit_report import CaseFormatKeys, ColumnarResults, JsonJunitExporter, JunitTestCase, JunitTestSuite
+from src.junit_report import columnar
+from tests import REPORT_DIR, BaseTest
+from tests.test_entry_exporter import JSON_DATA
+
+
+class TestColumnarResults(BaseTest):
+    @classmethod
+    @pytest.fixture(autouse=True)
+    def cleanup(cls):
+        yield
+        shutil.rmtree(REPORT_DIR, ignore_errors=True)
+
+    @pytest.fixture(params=["numpy", "python"])
+    def results(self, request, monkeypatch):
+        if request.param == "numpy":
+            pytest.importorskip("numpy")
+        else:
+            monkeypatch.setattr(columnar, "numpy", None)
+
+        results = ColumnarResults()
+        for i in range(1, 11):
+            results.append("A", "A", f"case_{i}", i, ColumnarResults.FAILURE if i % 5 == 0 else ColumnarResults.PASSED)
+        results.append("B", "B", "case_1", 100, ColumnarResults.ERROR)
+        results.append("B", "B", "case_2", None, ColumnarResults.SKIPPED)
+        return results
+
+    def test_aggregations(self, results):
+        assert len(results) == 12
+        assert results.get_suite_totals() == {
+            "A": {"tests": 10, "failures": 2, "errors": 0, "skipped": 0, "time": 55.0},
+            "B": {"tests": 2, "failures": 0, "errors": 1, "skipped": 1, "time": 100.0},
+        }
+        assert results.get_percentiles([0, 50, 90, 100], suite="A") == [1.0, 5.5, 9.1, 10.0]
+        assert results.get_percentiles([100]) == [100.0]
+        assert math.isnan(results.get_percentiles([50], suite="C")[0])
+
+        assert results.get_slowest(2) == [("B", "B", "case_1", 100.0), ("A", "A", "case_10", 10.0)]
+        assert results.get_slowest(2, suite="A") == [("A", "A", "case_10", 10.0), ("A", "A", "case_9", 9.0)]
+        assert results.get_slowest(5, suite="B") == [("B", "B", "case_1", 100.0)]
+
+    def test_populate(self):
+        results = ColumnarResults()
+
+        class A:
+            @JunitTestCase()
+            def passing_case(self):
+                pass
+
+            @JunitTestSuite(REPORT_DIR, results=results)
+            def test_suite(self):
+                self.passing_case()
+
+        A().test_suite()
+        self.delete_test_suite(A.test_suite.__wrapped__)
+
+        exporter = JsonJunitExporter(fmt=CaseFormatKeys(case_name="id", severity_key="severity"), results=results)
+        exporter.collect(json.loads(JSON_DATA), suite_name="events", report_dir=REPORT_DIR)
+
+        totals = results.get_suite_totals()
+        assert totals["A_test_suite"]["tests"] == 1
+        assert (totals["events"]["tests"], totals["events"]["failures"]) == (6, 2)
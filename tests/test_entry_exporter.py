@@ -1,11 +1,15 @@
 import json
 import shutil
+import threading
+import time
 from pathlib import Path
+from typing import Callable
+from unittest import mock
 
 import pytest
 import xmltodict
 
-from src.junit_report import JsonJunitExporter, CaseFormatKeys
+from src.junit_report import JsonJunitExporter, CaseFormatKeys, IncrementalSuiteReport
 from tests import REPORT_DIR, BaseTest
 
 JSON_DATA = """
@@ -96,3 +100,169 @@ class TestJsonJunitExporter(BaseTest):
                                                           testsuite_tests=6, failures=2,
                                                           testsuite_name="all_test_suite")
         assert all([c["@name"] == test_name for c in cases])
+
+    @staticmethod
+    def write_events(events_path: Path, events: list, mode: str = "a"):
+        with open(events_path, mode) as f:
+            for event in events:
+                f.write(json.dumps(event) + "\n")
+
+    def test_incremental_events(self):
+        events = json.loads(JSON_DATA)
+        REPORT_DIR.mkdir(exist_ok=True)
+        events_path = REPORT_DIR.joinpath("events.ndjson")
+        exporter = JsonJunitExporter(fmt=CaseFormatKeys(case_name="id", severity_key="severity"))
+
+        self.write_events(events_path, events[:3])
+        file_name = exporter.collect_incremental(events_path, suite_name="incremental_suite", report_dir=REPORT_DIR)
+        self.assert_xml_report_results_with_cases(self.get_test_report(Path(file_name)),
+                                                  testsuite_tests=3, failures=0, testsuite_name="incremental_suite")
+
+        # Partial line is not collected until it's completed
+        self.write_events(events_path, events[3:])
+        with open(events_path, "a") as f:
+            f.write('{"id": "partial", "severity": "error"')
+
+        file_name = exporter.collect_incremental(events_path, suite_name="incremental_suite", report_dir=REPORT_DIR)
+        cases = self.assert_xml_report_results_with_cases(self.get_test_report(Path(file_name)), testsuite_tests=6,
+                                                          failures=2, testsuite_name="incremental_suite")
+        assert [c["@name"] for c in cases] == [e["id"] for e in events]
+
+        with open(events_path, "a") as f:
+            f.write("}\n")
+        file_name = exporter.collect_incremental(events_path, suite_name="incremental_suite", report_dir=REPORT_DIR)
+        self.assert_xml_report_results_with_cases(self.get_test_report(Path(file_name)),
+                                                  testsuite_tests=7, failures=3, testsuite_name="incremental_suite")
+
+    def test_incremental_events_file_replaced(self):
+        events = json.loads(JSON_DATA)
+        REPORT_DIR.mkdir(exist_ok=True)
+        events_path = REPORT_DIR.joinpath("events.ndjson")
+        exporter = JsonJunitExporter(fmt=CaseFormatKeys(case_name="id", severity_key="severity"))
+
+        self.write_events(events_path, events)
+        exporter.collect_incremental(events_path, suite_name="incremental_suite", report_dir=REPORT_DIR)
+
+        events_path.unlink()
+        self.write_events(events_path, events[:2], mode="w")
+        file_name = exporter.collect_incremental(events_path, suite_name="incremental_suite", report_dir=REPORT_DIR)
+        self.assert_xml_report_results_with_cases(self.get_test_report(Path(file_name)),
+                                                  testsuite_tests=2, failures=0, testsuite_name="incremental_suite")
+
+    def test_incremental_malformed_events(self):
+        events = json.loads(JSON_DATA)
+        REPORT_DIR.mkdir(exist_ok=True)
+        events_path = REPORT_DIR.joinpath("events.ndjson")
+        exporter = JsonJunitExporter(fmt=CaseFormatKeys(case_name="id", severity_key="severity"))
+
+        self.write_events(events_path, events[:3])
+        with open(events_path, "a") as f:
+            f.write('{"id": "broken", \n[1, 2]\n')
+        self.write_events(events_path, events[3:])
+
+        file_name = exporter.collect_incremental(events_path, suite_name="incremental_suite", report_dir=REPORT_DIR)
+        cases = self.assert_xml_report_results_with_cases(self.get_test_report(Path(file_name)), testsuite_tests=6,
+                                                          failures=2, testsuite_name="incremental_suite")
+        assert [c["@name"] for c in cases] == [e["id"] for e in events]
+
+    def test_incremental_suite_timestamp(self):
+        REPORT_DIR.mkdir(exist_ok=True)
+        events_path = REPORT_DIR.joinpath("events.ndjson")
+        events_path.touch()
+        exporter = JsonJunitExporter(fmt=CaseFormatKeys(case_name="id", severity_key="severity"))
+
+        # like collect, a suite without cases gets the current time
+        file_name = exporter.collect_incremental(events_path, suite_name="incremental_suite", report_dir=REPORT_DIR)
+        assert self.get_test_report(Path(file_name))["testsuites"]["testsuite"]["@timestamp"]
+
+        report = IncrementalSuiteReport(REPORT_DIR.joinpath("reset.xml"), "reset", timestamp="2021-11-07T00:31:33")
+        report.reset()
+        report.append([])
+        assert self.get_test_report(report.path)["testsuites"]["testsuite"]["@timestamp"] == "2021-11-07T00:31:33"
+
+    def test_follow_events(self):
+        events = json.loads(JSON_DATA)
+        REPORT_DIR.mkdir(exist_ok=True)
+        events_path = REPORT_DIR.joinpath("events.ndjson")
+        exporter = JsonJunitExporter(fmt=CaseFormatKeys(case_name="id", severity_key="severity"))
+        self.write_events(events_path, events[:2])
+
+        stop_event = threading.Event()
+        result = dict()
+        follower = threading.Thread(target=lambda: result.update(file_name=exporter.follow(
+            events_path, suite_name="follow_suite", report_dir=REPORT_DIR, poll_interval=0.01, batch_size=2,
+            flush_interval=60, stop_event=stop_event)))
+        follower.start()
+
+        report_path = REPORT_DIR.joinpath("junit_report_follow_suite.xml")
+        for event in events[2:]:
+            self.write_events(events_path, [event])
+            if report_path.exists():
+                # Report is always well-formed while it's being updated
+                assert self.get_test_report(report_path)["testsuites"]["testsuite"]["@name"] == "follow_suite"
+
+        stop_event.set()
+        follower.join(timeout=10)
+        assert not follower.is_alive()
+        self.assert_xml_report_results_with_cases(self.get_test_report(Path(result["file_name"])),
+                                                  testsuite_tests=6, failures=2, testsuite_name="follow_suite")
+
+    def test_follow_events_file_truncated(self):
+        events = json.loads(JSON_DATA)
+        REPORT_DIR.mkdir(exist_ok=True)
+        events_path = REPORT_DIR.joinpath("events.ndjson")
+        report_path = REPORT_DIR.joinpath("junit_report_follow_suite.xml")
+        exporter = JsonJunitExporter(fmt=CaseFormatKeys(case_name="id", severity_key="severity"))
+        self.write_events(events_path, events[:1])
+
+        # pending entries are not checkpointed before a flush, the follower progress is observed by its read offsets
+        read_offsets = list()
+        read_entries = exporter._read_entries
+
+        def record_read_entries(*args, **kwargs):
+            entries, offset = read_entries(*args, **kwargs)
+            read_offsets.append(offset)
+            return entries, offset
+
+        def wait_for(condition: Callable[[], bool]):
+            deadline = time.monotonic() + 10
+            while not condition():
+                assert time.monotonic() < deadline and follower.is_alive()
+                time.sleep(0.01)
+
+        stop_event = threading.Event()
+        follower = threading.Thread(target=exporter.follow, args=(events_path, "follow_suite", REPORT_DIR),
+                                    kwargs=dict(poll_interval=0.01, batch_size=100, flush_interval=60,
+                                                stop_event=stop_event))
+        with mock.patch.object(exporter, "_read_entries", side_effect=record_read_entries):
+            follower.start()
+            try:
+                wait_for(report_path.exists)
+                # pending entries were read past the checkpointed offset, the file is rewritten in place with a size
+                # between the checkpointed and the read offsets
+                self.write_events(events_path, events[1:])
+                size = events_path.stat().st_size
+                wait_for(lambda: read_offsets[-1] == size)
+                self.write_events(events_path, events[3:5], mode="w")
+                size = events_path.stat().st_size
+                wait_for(lambda: read_offsets[-1] == size)
+            finally:
+                stop_event.set()
+                follower.join(timeout=10)
+
+        assert not follower.is_alive()
+        cases = self.assert_xml_report_results_with_cases(self.get_test_report(report_path), testsuite_tests=2,
+                                                          failures=1, testsuite_name="follow_suite")
+        assert [c["@name"] for c in cases] == [e["id"] for e in events[3:5]]
+
+    def test_follow_timeout_flushes_pending(self):
+        events = json.loads(JSON_DATA)
+        REPORT_DIR.mkdir(exist_ok=True)
+        events_path = REPORT_DIR.joinpath("events.ndjson")
+        exporter = JsonJunitExporter(fmt=CaseFormatKeys(case_name="id", severity_key="severity"))
+        self.write_events(events_path, events)
+
+        file_name = exporter.follow(events_path, suite_name="follow_suite", report_dir=REPORT_DIR,
+                                    poll_interval=0.01, batch_size=100, flush_interval=60, timeout=0.05)
+        self.assert_xml_report_results_with_cases(self.get_test_report(Path(file_name)),
+                                                  testsuite_tests=6, failures=2, testsuite_name="follow_suite")
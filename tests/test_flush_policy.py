@@ -0,0 +1,117 @@
+import shutil
+import threading
+import time
+from unittest import mock
+
+import pytest
+import xmltodict
+
+from src.junit_report import IncrementalSuiteReport, JunitTestCase, JunitTestSuite, utils
+from tests import REPORT_DIR, BaseTest
+
+
+class TestFlushPolicy(BaseTest):
+    REPORT_PATH = REPORT_DIR.joinpath("junit_A_test_suite_report.xml")
+
+    @classmethod
+    @pytest.fixture(autouse=True)
+    def cleanup(cls):
+        yield
+        shutil.rmtree(REPORT_DIR, ignore_errors=True)
+
+    def read_report(self):
+        return xmltodict.parse(self.REPORT_PATH.read_text())
+
+    def test_flush_every_cases(self):
+        interim_reports = list()
+        report = self
+
+        class A:
+            @JunitTestSuite(REPORT_DIR, flush_every_cases=2)
+            def test_suite(self):
+                for _ in range(5):
+                    self.test_case()
+                    interim_reports.append(report.read_report() if report.REPORT_PATH.exists() else None)
+
+            @JunitTestCase()
+            def test_case(self):
+                pass
+
+        with mock.patch.object(IncrementalSuiteReport, "_render_cases",
+                               wraps=IncrementalSuiteReport._render_cases) as render_cases:
+            A().test_suite()
+
+        assert interim_reports[0] is None
+        assert [int(r["testsuites"]["testsuite"]["@tests"]) for r in interim_reports[1:]] == [2, 2, 4, 4]
+        assert [len(call.args[0]) for call in render_cases.call_args_list] == [2, 2]
+
+        self.assert_xml_report_results(self.read_report(), testsuite_tests=5, testsuite_name="A_test_suite")
+        assert not REPORT_DIR.joinpath(self.REPORT_PATH.name + IncrementalSuiteReport.CHECKPOINT_SUFFIX).exists()
+        self.delete_test_suite(A.test_suite.__wrapped__)
+
+    def test_flush_interval(self):
+        interim_tests = list()
+        report = self
+
+        class A:
+            @JunitTestSuite(REPORT_DIR, flush_interval=0.01)
+            def test_suite(self):
+                for _ in range(3):
+                    self.slow_case()
+                    interim_tests.append(int(report.read_report()["testsuites"]["testsuite"]["@tests"]))
+                self.fast_case()
+
+            @JunitTestCase()
+            def slow_case(self):
+                time.sleep(0.02)
+
+            @JunitTestCase()
+            def fast_case(self):
+                raise ValueError("Some error")
+
+        with pytest.raises(ValueError):
+            A().test_suite()
+
+        assert interim_tests == [1, 2, 3]
+        self.assert_xml_report_results(self.read_report(), testsuite_tests=4, testsuite_name="A_test_suite",
+                                       failures=1)
+        self.delete_test_suite(A.test_suite.__wrapped__)
+
+    def test_concurrent_flushes(self):
+        threads_count, cases_count = 4, 25
+        report = self
+
+        def slow_render(*args, **kwargs):
+            time.sleep(0.001)
+            return render_cases(*args, **kwargs)
+
+        class A:
+            @JunitTestSuite(REPORT_DIR, flush_every_cases=1)
+            def test_suite(self):
+                suite = JunitTestSuite._junit_suites[A.test_suite.__wrapped__]
+
+                def add_cases(thread_index):
+                    for i in range(cases_count):
+                        record = utils.CaseRecord(name=f"test_case_{thread_index}_{i}", classname="A")
+                        JunitTestSuite.register_case(utils.TestCaseData(record, None, 0), A.test_suite.__wrapped__)
+
+                threads = [threading.Thread(target=add_cases, args=(i,)) for i in range(threads_count)]
+                for thread in threads:
+                    thread.start()
+                # partial exports of the watchdog thread race with the flushes of the case threads
+                while any(thread.is_alive() for thread in threads):
+                    suite._export_partial([], "")
+                for thread in threads:
+                    thread.join()
+                report.interim_names = [case["@name"] for case in
+                                        report.read_report()["testsuites"]["testsuite"]["testcase"]]
+
+        render_cases = IncrementalSuiteReport._render_cases
+        with mock.patch.object(IncrementalSuiteReport, "_render_cases", side_effect=slow_render):
+            A().test_suite()
+
+        expected = sorted(f"test_case_{t}_{i}" for t in range(threads_count) for i in range(cases_count))
+        assert sorted(self.interim_names) == expected
+        self.assert_xml_report_results(self.read_report(), testsuite_tests=threads_count * cases_count,
+                                       testsuite_name="A_test_suite")
+        self.delete_test_suite(A.test_suite.__wrapped__)
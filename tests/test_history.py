@@ -0,0 +1,83 @@
+import os
+import shutil
+
+import pytest
+import xmltodict
+
+from src.junit_report import HistoryStore, JunitTestCase, JunitTestSuite
+from tests import REPORT_DIR, BaseTest
+
+
+class TestHistoryStore(BaseTest):
+    @classmethod
+    @pytest.fixture(autouse=True)
+    def cleanup(cls):
+        yield
+        shutil.rmtree(REPORT_DIR, ignore_errors=True)
+
+    def test_suite_history_db_key(self):
+        assert JunitTestSuite.HISTORY_DB_KEY == HistoryStore.HISTORY_DB_KEY
+
+    def test_split_case_name(self):
+        assert HistoryStore.split_case_name("test_case[a=1, b=[2]]") == ("test_case", "a=1, b=[2]")
+        assert HistoryStore.split_case_name("test_case") == ("test_case", "")
+
+    def test_suite_history(self):
+        history_db = REPORT_DIR.joinpath("history.db")
+
+        class A:
+            @JunitTestCase()
+            def passing_case(self):
+                pass
+
+            @JunitTestCase()
+            def failing_case(self):
+                raise ValueError("failure")
+
+            @JunitTestSuite(REPORT_DIR, history_db=history_db)
+            def test_suite(self):
+                self.passing_case()
+                with pytest.raises(ValueError):
+                    self.failing_case()
+
+        A().test_suite()
+        self.delete_test_suite(A.test_suite.__wrapped__)
+
+        store = HistoryStore(history_db)
+        run = HistoryStore.get_run_name()
+        assert store.get_runs() == [run]
+
+        history = store.get_case_history("A_test_suite", "A", "passing_case")
+        assert len(history) == 1
+        assert history[0][0] == run and history[0][2] == HistoryStore.PASSED
+        assert store.get_case_history("A_test_suite", "A", "failing_case")[0][2] == HistoryStore.FAILURE
+
+        store.ingest_reports(REPORT_DIR, run="reingested")
+        assert store.get_runs() == ["reingested", run]
+        assert len(store.get_case_history("A_test_suite", "A", "passing_case")) == 2
+        assert len(store.get_case_history("A_test_suite", "A", "passing_case", limit=1)) == 1
+
+        assert len(store.get_suites_durations()["A_test_suite"]) == 2
+        assert list(store.get_cases_durations(runs=1)) == [("A_test_suite", "A", "passing_case", ""),
+                                                           ("A_test_suite", "A", "failing_case", "")]
+
+    def test_unavailable_history_db(self):
+        os.makedirs(REPORT_DIR, exist_ok=True)
+        not_a_dir = REPORT_DIR.joinpath("not_a_dir")
+        not_a_dir.write_text("")
+
+        class A:
+            @JunitTestCase()
+            def test_case(self):
+                pass
+
+            @JunitTestSuite(REPORT_DIR, history_db=not_a_dir.joinpath("history.db"))
+            def test_suite(self):
+                self.test_case()
+
+        for _ in range(2):
+            A().test_suite()
+            report = REPORT_DIR.joinpath("junit_A_test_suite_report.xml")
+            self.assert_xml_report_results(xmltodict.parse(report.read_text()), testsuite_tests=1,
+                                           testsuite_name="A_test_suite")
+        self.delete_test_suite(A.test_suite.__wrapped__)
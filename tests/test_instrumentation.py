@@ -0,0 +1,90 @@
+import json
+import shutil
+import threading
+import time
+
+import pytest
+import xmltodict
+
+from src.junit_report import Instrumentation, JunitTestCase, JunitTestSuite
+from tests import REPORT_DIR, BaseTest
+
+
+class TestInstrumentation(BaseTest):
+    @classmethod
+    @pytest.fixture(autouse=True)
+    def cleanup(cls):
+        Instrumentation.reset()
+        yield
+        Instrumentation.disable()
+        Instrumentation.reset()
+        shutil.rmtree(REPORT_DIR, ignore_errors=True)
+
+    @pytest.fixture
+    def suite_class(self):
+        class A:
+            REPORT_PATH = REPORT_DIR.joinpath("junit_A_test_suite_report.xml")
+
+            @JunitTestCase()
+            def some_case(self):
+                pass
+
+            @JunitTestSuite(REPORT_DIR)
+            def test_suite(self):
+                self.some_case()
+                self.some_case()
+
+        yield A
+        self.delete_test_suite(A.test_suite.__wrapped__)
+
+    def test_disabled(self, suite_class):
+        suite_class().test_suite()
+        assert Instrumentation.snapshot() == dict()
+
+    def test_counters(self, suite_class):
+        Instrumentation.enable(export_properties=True, export_sidecar=True)
+        suite_class().test_suite()
+
+        snapshot = Instrumentation.snapshot()
+        assert snapshot[Instrumentation.STACK_INTROSPECTION]["count"] == 3
+        assert snapshot[Instrumentation.SUITE_LOOKUP]["count"] == 2
+        assert snapshot[Instrumentation.REGISTER_CASE]["count"] == 2
+        assert snapshot[Instrumentation.RENDER]["count"] == 1
+        assert snapshot[Instrumentation.WRITE]["count"] >= 1
+        assert all(counters["total_sec"] >= 0 for counters in snapshot.values())
+
+        with open(suite_class.REPORT_PATH) as f:
+            xml_results = xmltodict.parse(f.read())
+        properties = self.get_properties(xml_results["testsuites"]["testsuite"])
+        assert properties["junit_report.stack_introspection.count"] == "3"
+
+        with open(REPORT_DIR.joinpath(Instrumentation.SIDECAR_FILE_NAME)) as f:
+            assert json.load(f)["phases"][Instrumentation.RENDER]["count"] == 1
+
+    def test_concurrent_phases(self):
+        Instrumentation.enable()
+        first_entered, second_entered, first_exited = threading.Event(), threading.Event(), threading.Event()
+
+        def first():
+            with Instrumentation.measure(Instrumentation.RENDER):
+                first_entered.set()
+                second_entered.wait()
+                time.sleep(0.05)
+            first_exited.set()
+
+        def second():
+            first_entered.wait()
+            time.sleep(0.1)
+            with Instrumentation.measure(Instrumentation.RENDER):
+                second_entered.set()
+                first_exited.wait()
+
+        threads = [threading.Thread(target=target) for target in (first, second)]
+        for thread in threads:
+            thread.start()
+        first_exited.wait()
+        # the first phase ended while the second was still running, it's timed from its own start
+        assert Instrumentation.snapshot()[Instrumentation.RENDER]["total_sec"] >= 0.15
+        for thread in threads:
+            thread.join()
+        assert Instrumentation.snapshot()[Instrumentation.RENDER]["count"] == 2
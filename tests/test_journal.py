@@ -0,0 +1,103 @@
+import os
+import shutil
+import subprocess
+import sys
+import textwrap
+from pathlib import Path
+
+import pytest
+import xmltodict
+
+from src.junit_report.journal import CaseJournal, main
+from src.junit_report import utils
+from tests import REPORT_DIR, BaseTest
+
+ROOT_DIR = Path(__file__).resolve().parent.parent
+
+SUITE_SCRIPT = textwrap.dedent("""
+    import os
+    from pathlib import Path
+    from src.junit_report import JunitTestCase, JunitTestSuite
+
+    class A:
+        @JunitTestSuite(Path({report_dir!r}), journal=True)
+        def test_suite(self):
+            self.test_case()
+            try:
+                self.failed_case()
+            except ValueError:
+                pass
+            if {crash}:
+                os._exit(137)
+
+        @JunitTestCase()
+        def test_case(self):
+            pass
+
+        @JunitTestCase()
+        def failed_case(self):
+            raise ValueError("Some error")
+
+    A().test_suite()
+""")
+
+
+class TestJournal(BaseTest):
+    @classmethod
+    @pytest.fixture(autouse=True)
+    def cleanup(cls):
+        yield
+        shutil.rmtree(REPORT_DIR, ignore_errors=True)
+
+    @staticmethod
+    def run_suite(crash: bool) -> int:
+        script = SUITE_SCRIPT.format(report_dir=str(REPORT_DIR), crash=crash)
+        return subprocess.run([sys.executable, "-c", script], cwd=str(ROOT_DIR)).returncode
+
+    def test_journal_removed_after_export(self):
+        assert self.run_suite(crash=False) == 0
+        assert REPORT_DIR.joinpath("junit_A_test_suite_report.xml").exists()
+        assert list(REPORT_DIR.joinpath(CaseJournal.DIR_NAME).iterdir()) == []
+        assert CaseJournal.recover(REPORT_DIR) == []
+
+    def test_recover_crashed_suite(self):
+        assert self.run_suite(crash=True) == 137
+        report_path = REPORT_DIR.joinpath("junit_A_test_suite_report.xml")
+        assert not report_path.exists()
+        journals = list(REPORT_DIR.joinpath(CaseJournal.DIR_NAME).iterdir())
+        assert len(journals) == 1
+
+        with journals[0].open("ab") as f:
+            f.write(b'{"type":"case","suite":"A_te')  # partially written line
+        assert CaseJournal.recover(REPORT_DIR) == [report_path]
+        assert not journals[0].exists()
+
+        cases = self.assert_xml_report_results(xmltodict.parse(report_path.read_text()), testsuite_tests=3,
+                                               testsuite_name="A_test_suite", failures=2)
+        assert [case["@name"] for case in cases] == ["test_case", "failed_case", "A_test_suite"]
+        assert "ValueError: Some error" in cases[1]["failure"]["#text"]
+        assert cases[2]["failure"]["@type"] == "IncompleteSuite"
+
+    def test_recover_command(self, capsys):
+        assert self.run_suite(crash=True) == 137
+        assert main([str(REPORT_DIR), "--keep"]) == 0
+        assert capsys.readouterr().out.strip() == str(REPORT_DIR.joinpath("junit_A_test_suite_report.xml"))
+        assert len(list(REPORT_DIR.joinpath(CaseJournal.DIR_NAME).iterdir())) == 1
+
+    def test_reused_pid_keeps_crashed_journal(self):
+        assert self.run_suite(crash=True) == 137
+        crashed = next(REPORT_DIR.joinpath(CaseJournal.DIR_NAME).iterdir())
+        # the crashed process had the pid of the current process
+        reused = crashed.with_name(CaseJournal.FILE_FORMAT.format(pid=os.getpid(), token="0123456789ab"))
+        crashed.rename(reused)
+        content = reused.read_bytes()
+
+        journal = CaseJournal(REPORT_DIR)
+        journal.append_case("B_test_suite", utils.TestCaseData(utils.CaseRecord(name="test_case"), None, 0))
+        journal.suite_exported("B_test_suite")
+        assert journal.path != reused
+        CaseJournal._close_all()
+
+        assert not journal.path.exists()
+        assert reused.read_bytes() == content
+        assert list(CaseJournal.get_unexported_suites(reused)) == ["A_test_suite"]
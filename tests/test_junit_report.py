@@ -1,3 +1,5 @@
+import dataclasses
+import inspect
 import shutil
 import subprocess
 from pathlib import Path
@@ -5,7 +7,8 @@ from pathlib import Path
 import pytest
 import xmltodict
 
-from src.junit_report import CaseFailure, JunitTestCase, JunitTestSuite
+from src.junit_report import CaseFailure, JunitFixtureTestCase, JunitTestCase, JunitTestSuite
+from src.junit_report.utils import CaseRecord, LazyTraceback, Utils
 from tests import REPORT_DIR, BaseTest
 
 
@@ -174,6 +177,67 @@ class TestJunitReport(BaseTest):
         assert cf.message == cf["message"]
         assert cf.output == cf["output"]
         assert cf.type == cf["type"]
+        assert dataclasses.is_dataclass(cf)
+        assert dataclasses.asdict(cf) == {"message": "some message", "output": "bla bla", "type": ""}
+        assert dataclasses.replace(cf, type="ValueError") == CaseFailure("some message", "bla bla", "ValueError")
+
+    def test_lazy_traceback(self, monkeypatch):
+        def raise_error():
+            raise ValueError("lazy")
+
+        def get_failure():
+            try:
+                raise_error()
+            except ValueError as e:
+                return CaseFailure.from_exception(e)
+
+        failures = [get_failure() for _ in range(3)]
+        assert all(isinstance(f.output, LazyTraceback) for f in failures)
+        assert failures[0].output.key == failures[1].output.key
+
+        cache = dict()
+        outputs = [f.output.resolve(cache) for f in failures]
+        assert len(cache) == 1
+        assert all(output is outputs[0] for output in outputs)
+        assert "raise_error()" in failures[0]["output"] and "ValueError: lazy" in failures[0]["output"]
+
+        monkeypatch.setenv(Utils.TRACEBACK_LIMIT_KEY, "1")
+        limited = get_failure()
+        assert "raise_error()" in str(limited.output) and 'raise ValueError("lazy")' not in str(limited.output)
+
+        monkeypatch.setenv(Utils.TRACEBACK_LIMIT_KEY, "invalid")
+        assert 'raise ValueError("lazy")' in str(get_failure().output)
+
+    def test_case_record(self):
+        records = [CaseRecord(name=f"case_{i}", classname=".".join(["module", "Class"]), category="function")
+                   for i in range(2)]
+        assert records[0].classname is records[1].classname
+        assert not hasattr(records[0], "__dict__")
+        assert records[0].failures == () and records[0].properties == dict()
+
+        records[0].add_failure(CaseFailure("some message", "bla bla", "ValueError"))
+        records[0].add_property("name", 1)
+        records[0].elapsed_sec = 0.5
+
+        case = records[0].to_test_case()
+        assert (case.name, case.classname, case.category, case.elapsed_sec) == ("case_0", "module.Class", "function",
+                                                                                0.5)
+        assert case.is_failure() and records[0].is_failure() and not records[1].is_failure()
+        assert case.properties == {"name": "1"}
+
+    def test_wrapper_signature(self):
+        def case(my_fixture, value: int = 1) -> None:
+            """ case docstring """
+
+        def fixture(request):
+            yield request
+
+        wrapped_case = JunitTestCase()(case)
+        wrapped_fixture = JunitFixtureTestCase()(fixture)
+        assert str(inspect.signature(wrapped_case)) == "(my_fixture, value: int = 1) -> None"
+        assert (wrapped_case.__name__, wrapped_case.__doc__, wrapped_case.__wrapped__) == ("case", case.__doc__, case)
+        assert list(inspect.signature(wrapped_fixture).parameters) == ["request"]
+        assert inspect.isgeneratorfunction(wrapped_fixture)
 
     def test_register_two_suites_same_name(self):
         start = len(JunitTestSuite._junit_suites)
@@ -0,0 +1,45 @@
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+SRC_DIR = Path(__file__).resolve().parent.parent.joinpath("src")
+
+
+class TestLazyImports:
+    @staticmethod
+    def get_imported_modules(statement: str, *modules: str) -> dict:
+        code = f"{statement}; import sys; print(','.join(m for m in {modules!r} if m in sys.modules))"
+        env = dict(os.environ, PYTHONPATH=str(SRC_DIR))
+        output = subprocess.run([sys.executable, "-c", code], env=env, check=True, stdout=subprocess.PIPE,
+                                universal_newlines=True).stdout.strip()
+        return {module: module in output.split(",") for module in modules}
+
+    @pytest.mark.parametrize("statement", [
+        "import junit_report",
+        "from junit_report import JsonJunitExporter",
+        "from junit_report import ReportSummaryScanner, ShardPlanner, RegressionDetector",
+    ])
+    def test_pytest_not_imported(self, statement):
+        assert self.get_imported_modules(statement, "pytest", "_pytest", "decorator") == {
+            "pytest": False, "_pytest": False, "decorator": False}
+
+    def test_decorators_loaded_on_access(self):
+        assert self.get_imported_modules("from junit_report import JunitTestSuite", "pytest") == {"pytest": True}
+
+    def test_decorators_optional_dependencies_not_imported(self):
+        modules = ("numpy", "sqlite3", "junit_report.columnar", "junit_report.history")
+        assert self.get_imported_modules("from junit_report import JunitTestSuite, JunitTestCase", *modules) == {
+            module: False for module in modules}
+
+    def test_lazy_attributes(self):
+        import src.junit_report as junit_report
+
+        assert set(junit_report.__all__) <= set(dir(junit_report))
+        for name in junit_report.__all__:
+            assert getattr(junit_report, name).__name__ == name
+
+        with pytest.raises(AttributeError):
+            junit_report.NotExist  # noqa: B018
@@ -0,0 +1,86 @@
+import logging
+import shutil
+
+import pytest
+import xmltodict
+
+from src.junit_report import JunitTestCase, JunitTestSuite
+from src.junit_report.output_capture import BoundedBuffer
+from tests import REPORT_DIR, BaseTest
+
+
+class TestOutputCapture(BaseTest):
+    @classmethod
+    @pytest.fixture(autouse=True)
+    def cleanup(cls):
+        yield
+        shutil.rmtree(REPORT_DIR, ignore_errors=True)
+
+    def test_bounded_buffer(self):
+        buffer = BoundedBuffer(max_bytes=10)
+        buffer.write("0123456789")
+        assert buffer.getvalue() == "0123456789"
+
+        buffer.write("abc")
+        assert len(buffer) == 10
+        assert buffer.getvalue() == BoundedBuffer.TRUNCATED_FORMAT.format(count=3) + "3456789abc"
+
+        buffer.write("x" * 100)
+        assert buffer.getvalue().endswith("x" * 10)
+
+    def test_capture_failed_case_output(self):
+        class A:
+            REPORT_PATH = REPORT_DIR.joinpath("junit_A_test_suite_report.xml")
+
+            @JunitTestCase(capture_output=True)
+            def passed_case(self):
+                print("passed case output")
+
+            @JunitTestCase(capture_output=True, output_max_bytes=1024)
+            def failed_case(self):
+                print("x" * 5000)
+                print("failed case output")
+                logging.getLogger("some.logger").warning("failed case %s", "log")
+                raise ValueError("failed")
+
+            @JunitTestSuite(REPORT_DIR)
+            def test_suite(self):
+                self.passed_case()
+                self.failed_case()
+
+        with pytest.raises(ValueError):
+            A().test_suite()
+
+        with open(A.REPORT_PATH) as f:
+            xml_results = xmltodict.parse(f.read())
+
+        passed, failed = self.assert_xml_report_results(xml_results, failures=1, testsuite_tests=2,
+                                                        testsuite_name="A_test_suite")
+        assert "system-out" not in passed
+        assert failed["system-out"].endswith("failed case output")
+        assert len(failed["system-out"]) < 1100
+        assert "WARNING some.logger: failed case log" in failed["system-err"]
+
+        self.delete_test_suite(A.test_suite.__wrapped__)
+
+    def test_capture_output_on_success(self):
+        class A:
+            REPORT_PATH = REPORT_DIR.joinpath("junit_A_test_suite_report.xml")
+
+            @JunitTestCase(capture_output=True, export_output_on_success=True)
+            def passed_case(self):
+                print("passed case output")
+
+            @JunitTestSuite(REPORT_DIR)
+            def test_suite(self):
+                self.passed_case()
+
+        A().test_suite()
+
+        with open(A.REPORT_PATH) as f:
+            xml_results = xmltodict.parse(f.read())
+
+        case = self.assert_xml_report_results(xml_results, testsuite_tests=1, testsuite_name="A_test_suite").pop()
+        assert case["system-out"] == "passed case output"
+
+        self.delete_test_suite(A.test_suite.__wrapped__)
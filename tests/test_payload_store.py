@@ -0,0 +1,86 @@
+import shutil
+
+import pytest
+import xmltodict
+
+from src.junit_report import CaseFormatKeys, JsonJunitExporter, JunitTestCase, JunitTestSuite, PayloadStore
+from tests import REPORT_DIR, BaseTest
+
+
+class TestPayloadStore(BaseTest):
+    LARGE_MESSAGE = "large message " * 1000
+
+    @classmethod
+    @pytest.fixture(autouse=True)
+    def cleanup(cls):
+        yield
+        shutil.rmtree(REPORT_DIR, ignore_errors=True)
+
+    def test_store(self):
+        store = PayloadStore(REPORT_DIR, threshold=100, preview_size=10)
+        assert store.store("small") == "small"
+        assert store.store(None) is None
+
+        value = store.store(self.LARGE_MESSAGE)
+        assert value.startswith(self.LARGE_MESSAGE[:10] + "\n")
+        assert len(value) < 200
+        assert PayloadStore.resolve(value, REPORT_DIR) == self.LARGE_MESSAGE
+        assert PayloadStore.resolve("small", REPORT_DIR) == "small"
+
+        # identical payloads are stored once
+        assert store.store(self.LARGE_MESSAGE) == value
+        assert len(list(store.path.iterdir())) == 1
+
+    def test_exporter_payloads(self):
+        entries = [{"id": f"case_{i}", "message": self.LARGE_MESSAGE, "severity": severity}
+                   for i, severity in enumerate(("info", "error", "error"))]
+        exporter = JsonJunitExporter(CaseFormatKeys(case_name="id", severity_key="severity"),
+                                     payload_threshold=4 * 1024)
+        path = exporter.collect(entries, suite_name="payloads", report_dir=REPORT_DIR)
+
+        xml_results = xmltodict.parse(open(path).read())
+        cases = self.assert_xml_report_results(xml_results, testsuite_tests=3, testsuite_name="payloads", failures=2)
+        assert len(open(path).read()) < len(self.LARGE_MESSAGE)
+        for case in cases[1:]:
+            assert PayloadStore.resolve(case["failure"]["@message"], REPORT_DIR) == PayloadStore.resolve(
+                case["failure"]["#text"], REPORT_DIR)
+            assert self.LARGE_MESSAGE in PayloadStore.resolve(case["failure"]["#text"], REPORT_DIR)
+        assert self.LARGE_MESSAGE in PayloadStore.resolve(cases[0]["system-out"], REPORT_DIR)
+        assert len(list(REPORT_DIR.joinpath(PayloadStore.DIR_NAME).iterdir())) == 3
+
+    def test_invalid_threshold_env_var(self, monkeypatch):
+        monkeypatch.setenv(PayloadStore.THRESHOLD_KEY, "1MB")
+        assert PayloadStore.get_threshold() is None
+        assert PayloadStore.get_threshold(1024) == 1024
+        assert JunitTestSuite(REPORT_DIR)._payload_store is None
+        assert JsonJunitExporter(CaseFormatKeys(case_name="id", severity_key="severity"))._payload_threshold is None
+
+    def test_suite_payloads_env_var(self, monkeypatch):
+        monkeypatch.setenv(PayloadStore.THRESHOLD_KEY, "1024")
+        message = self.LARGE_MESSAGE
+
+        class A:
+            @JunitTestSuite(REPORT_DIR)
+            def test_suite(self):
+                self.small_case()
+                self.large_case()
+
+            @JunitTestCase()
+            def small_case(self):
+                pass
+
+            @JunitTestCase()
+            def large_case(self):
+                raise ValueError(message)
+
+        with pytest.raises(ValueError):
+            A().test_suite()
+
+        xml_results = xmltodict.parse(REPORT_DIR.joinpath("junit_A_test_suite_report.xml").read_text())
+        cases = self.assert_xml_report_results(xml_results, testsuite_tests=2, testsuite_name="A_test_suite",
+                                               failures=1)
+        failure = cases[1]["failure"]
+        assert len(failure["@message"]) < len(message)
+        assert PayloadStore.resolve(failure["@message"], REPORT_DIR) == message
+        assert message in PayloadStore.resolve(failure["#text"], REPORT_DIR)
+        self.delete_test_suite(A.test_suite.__wrapped__)
@@ -0,0 +1,136 @@
+import shutil
+import time
+import tracemalloc
+
+import pytest
+import xmltodict
+
+from src.junit_report import JunitTestCase, JunitTestSuite, PerformanceBudget, PerformanceBudgetExceeded
+from src.junit_report import utils
+from tests import REPORT_DIR, BaseTest
+
+
+class TestPerformanceBudget(BaseTest):
+    @classmethod
+    @pytest.fixture(autouse=True)
+    def cleanup(cls):
+        yield
+        shutil.rmtree(REPORT_DIR, ignore_errors=True)
+
+    def test_budget(self):
+        budget = PerformanceBudget(max_duration=1, max_cpu_time=10, max_memory_kb=10)
+        budget.start()
+        data = [bytearray(1024) for _ in range(100)]
+        budget.stop()
+        failure = budget.check(elapsed_sec=0.5)
+
+        assert data
+        assert failure.type == PerformanceBudgetExceeded.__name__
+        assert "memory_kb" in failure.message and "duration_sec" not in failure.message
+        assert budget.get_properties()["budget.max_duration_sec"] == "1"
+
+    def test_case_budget(self):
+        class A:
+            REPORT_PATH = REPORT_DIR.joinpath("junit_A_test_suite_report.xml")
+
+            @JunitTestCase(max_duration=0.001)
+            def slow_case(self):
+                time.sleep(0.01)
+
+            @JunitTestCase(max_duration=0.001, budget_warn_only=True)
+            def slow_warn_only_case(self):
+                time.sleep(0.01)
+
+            @JunitTestCase(max_duration=10)
+            def fast_case(self):
+                pass
+
+            @JunitTestSuite(REPORT_DIR)
+            def test_suite(self):
+                self.slow_case()
+                self.slow_warn_only_case()
+                self.fast_case()
+
+        A().test_suite()
+
+        with open(A.REPORT_PATH) as f:
+            xml_results = xmltodict.parse(f.read())
+
+        slow, warn_only, fast = self.assert_xml_report_results(xml_results, testsuite_tests=3, failures=1,
+                                                               testsuite_name="A_test_suite")
+        assert slow["failure"]["@type"] == PerformanceBudgetExceeded.__name__
+        assert "duration_sec" in slow["failure"]["@message"]
+        assert "failure" not in warn_only
+        assert float(self.get_properties(warn_only)["budget.duration_sec"]) >= 0.01
+        assert "failure" not in fast
+
+        self.delete_test_suite(A.test_suite.__wrapped__)
+
+    def test_suite_budget(self):
+        class A:
+            REPORT_PATH = REPORT_DIR.joinpath("junit_A_test_suite_report.xml")
+
+            @JunitTestCase()
+            def some_case(self):
+                time.sleep(0.01)
+
+            @JunitTestSuite(REPORT_DIR, max_duration=0.001)
+            def test_suite(self):
+                self.some_case()
+
+        A().test_suite()
+
+        with open(A.REPORT_PATH) as f:
+            xml_results = xmltodict.parse(f.read())
+
+        case, suite_case = self.assert_xml_report_results(xml_results, testsuite_tests=2, failures=1,
+                                                          testsuite_name="A_test_suite")
+        assert suite_case["@class"] == utils.TestCaseCategories.SUITE.value
+        assert suite_case["failure"]["@type"] == PerformanceBudgetExceeded.__name__
+        assert "budget.duration_sec" in self.get_properties(xml_results["testsuites"]["testsuite"])
+
+        self.delete_test_suite(A.test_suite.__wrapped__)
+
+    def test_nested_memory_budgets(self):
+        class A:
+            REPORT_PATH = REPORT_DIR.joinpath("junit_A_test_suite_report.xml")
+
+            @JunitTestCase(max_memory_kb=256)
+            def small_case(self):
+                assert bytearray(100 * 1024)
+
+            @JunitTestSuite(REPORT_DIR, max_memory_kb=512)
+            def test_suite(self):
+                data = bytearray(1024 * 1024)
+                del data
+                # the case resets the tracemalloc peak, the suite peak must still include the freed allocation
+                self.small_case()
+
+        A().test_suite()
+
+        with open(A.REPORT_PATH) as f:
+            xml_results = xmltodict.parse(f.read())
+
+        case, suite_case = self.assert_xml_report_results(xml_results, testsuite_tests=2, failures=1,
+                                                          testsuite_name="A_test_suite")
+        assert "failure" not in case
+        assert 100 <= float(self.get_properties(case)["budget.memory_kb"]) < 256
+        assert suite_case["failure"]["@type"] == PerformanceBudgetExceeded.__name__
+        assert float(self.get_properties(xml_results["testsuites"]["testsuite"])["budget.memory_kb"]) >= 1024
+
+        self.delete_test_suite(A.test_suite.__wrapped__)
+
+    def test_nested_memory_budget_without_reset_peak(self, monkeypatch):
+        monkeypatch.delattr(tracemalloc, "reset_peak", raising=False)
+        outer_budget, inner_budget = PerformanceBudget(max_memory_kb=10), PerformanceBudget(max_memory_kb=10)
+        outer_budget.start()
+        data = bytearray(100 * 1024)
+        del data
+        inner_budget.start()
+        inner_budget.stop()
+        outer_budget.stop()
+
+        # the inner peak can't be separated from the outer allocations, it's not measured instead of being wrong
+        assert inner_budget.check(elapsed_sec=0) is None and inner_budget.measured == dict()
+        assert outer_budget.check(elapsed_sec=0).type == PerformanceBudgetExceeded.__name__
+        assert not tracemalloc.is_tracing()
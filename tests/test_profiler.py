@@ -0,0 +1,125 @@
+import shutil
+from pathlib import Path
+
+import pytest
+import xmltodict
+
+from src.junit_report import JunitTestCase, JunitTestSuite
+from src.junit_report.profiler import CaseProfiler
+from tests import REPORT_DIR, BaseTest
+
+
+class TestProfiler(BaseTest):
+    @classmethod
+    @pytest.fixture(autouse=True)
+    def cleanup(cls):
+        yield
+        shutil.rmtree(REPORT_DIR, ignore_errors=True)
+
+    def test_profile_case(self):
+        class A:
+            REPORT_PATH = REPORT_DIR.joinpath("junit_A_test_suite_report.xml")
+
+            @JunitTestCase(profile=True)
+            def profiled_case(self):
+                _ = sorted(range(1000), key=lambda x: -x)
+
+            @JunitTestCase()
+            def other_case(self):
+                pass
+
+            @JunitTestSuite(REPORT_DIR)
+            def test_suite(self):
+                self.profiled_case()
+                self.other_case()
+
+        A().test_suite()
+
+        with open(A.REPORT_PATH) as f:
+            xml_results = xmltodict.parse(f.read())
+
+        profiled, other = self.assert_xml_report_results(xml_results, testsuite_tests=2, testsuite_name="A_test_suite")
+        properties = self.get_properties(profiled)
+        assert Path(properties[CaseProfiler.PROFILE_PROPERTY]).exists()
+        assert CaseProfiler.TOP_PROPERTY_FORMAT.format(index=1) in properties
+        assert any("builtins.sorted" in value for value in properties.values())
+        assert profiled["system-out"] == f"[[ATTACHMENT|{properties[CaseProfiler.PROFILE_PROPERTY]}]]"
+        assert not self.get_properties(other)
+
+        self.delete_test_suite(A.test_suite.__wrapped__)
+
+    def test_adaptive_profile(self):
+        class A:
+            REPORT_PATH = REPORT_DIR.joinpath("junit_A_test_suite_report.xml")
+
+            @JunitTestCase(profile_threshold=0)
+            def slow_case(self):
+                pass
+
+            @JunitTestSuite(REPORT_DIR)
+            def test_suite(self):
+                self.slow_case()
+                self.slow_case()
+                self.slow_case()
+
+        A().test_suite()
+
+        with open(A.REPORT_PATH) as f:
+            xml_results = xmltodict.parse(f.read())
+
+        cases = self.assert_xml_report_results(xml_results, testsuite_tests=3, testsuite_name="A_test_suite")
+        assert [CaseProfiler.PROFILE_PROPERTY in self.get_properties(c) for c in cases] == [False, True, False]
+
+        self.delete_test_suite(A.test_suite.__wrapped__)
+
+    def test_profile_suite(self):
+        class A:
+            REPORT_PATH = REPORT_DIR.joinpath("junit_A_test_suite_report.xml")
+
+            @JunitTestCase()
+            def some_case(self):
+                pass
+
+            @JunitTestSuite(REPORT_DIR, profile=True)
+            def test_suite(self):
+                self.some_case()
+
+        A().test_suite()
+
+        with open(A.REPORT_PATH) as f:
+            xml_results = xmltodict.parse(f.read())
+
+        properties = self.get_properties(xml_results["testsuites"]["testsuite"])
+        assert Path(properties[CaseProfiler.PROFILE_PROPERTY]).exists()
+
+        self.delete_test_suite(A.test_suite.__wrapped__)
+
+    def test_adaptive_profile_suite(self):
+        class A:
+            REPORT_PATH = REPORT_DIR.joinpath("junit_A_test_suite_report.xml")
+
+            @JunitTestCase()
+            def some_case(self):
+                pass
+
+            @JunitTestSuite(REPORT_DIR, profile_threshold=0)
+            def test_suite(self):
+                self.some_case()
+
+        suites_properties = list()
+        for _ in range(3):
+            A().test_suite()
+            with open(A.REPORT_PATH) as f:
+                suites_properties.append(self.get_properties(xmltodict.parse(f.read())["testsuites"]["testsuite"]))
+
+        # profiled only on the execution that follows a slow one, properties don't leak to the next execution
+        assert [CaseProfiler.PROFILE_PROPERTY in properties for properties in suites_properties] == [False, True, False]
+
+        self.delete_test_suite(A.test_suite.__wrapped__)
+
+    def test_threshold_from_env(self, monkeypatch):
+        monkeypatch.setenv(CaseProfiler.PROFILE_THRESHOLD_KEY, "0.5")
+        assert CaseProfiler().enabled
+        monkeypatch.setenv(CaseProfiler.PROFILE_THRESHOLD_KEY, "x")
+        assert not CaseProfiler().enabled
+        assert not JunitTestSuite(REPORT_DIR)._profiler.enabled
@@ -0,0 +1,68 @@
+import shutil
+from contextlib import redirect_stdout
+from io import StringIO
+
+import junit_xml
+import pytest
+import xmltodict
+
+from src.junit_report import HistoryStore, RegressionDetector
+from src.junit_report.regression import main
+from tests import REPORT_DIR, BaseTest
+
+
+class TestRegressionDetector(BaseTest):
+    @classmethod
+    @pytest.fixture(autouse=True)
+    def cleanup(cls):
+        yield
+        shutil.rmtree(REPORT_DIR, ignore_errors=True)
+
+    @staticmethod
+    def write_report(report_dir, durations: dict):
+        report_dir.mkdir(parents=True, exist_ok=True)
+        cases = [junit_xml.TestCase(name=name, classname="A", elapsed_sec=duration)
+                 for name, duration in durations.items()]
+        report_dir.joinpath("junit_A_test_suite_report.xml").write_text(
+            junit_xml.to_xml_report_string([junit_xml.TestSuite("A_test_suite", cases)])
+        )
+
+    def test_ratio_regression(self):
+        baseline_dir, current_dir = REPORT_DIR.joinpath("baseline"), REPORT_DIR.joinpath("current")
+        self.write_report(baseline_dir, {"stable": 1.0, "slower[a=1]": 1.0, "tiny": 0.001, "removed": 1.0})
+        self.write_report(current_dir, {"stable": 1.1, "slower[a=1]": 2.0, "tiny": 0.01, "new": 1.0})
+
+        detector = RegressionDetector()
+        baseline = detector.load_reports([baseline_dir])
+        assert baseline[("A_test_suite", "A", "slower", "a=1")] == 1.0
+
+        comparisons = detector.compare(baseline, detector.load_reports([current_dir]))
+        assert [c.key[2] for c in comparisons] == ["stable", "slower", "tiny"]
+        assert [c.key[2] for c in comparisons if c.is_regression] == ["slower"]
+
+        output = StringIO()
+        with redirect_stdout(output):
+            assert main(["--baseline", str(baseline_dir), "--current", str(current_dir),
+                         "--report-dir", str(REPORT_DIR)]) == 1
+        assert "3 cases compared, 1 regressions" in output.getvalue()
+
+        xml_results = xmltodict.parse(REPORT_DIR.joinpath("junit_duration_regressions_report.xml").read_text())
+        cases = self.assert_xml_report_results(xml_results, testsuite_tests=3, failures=1,
+                                               testsuite_name="duration_regressions")
+        assert cases[1]["@name"] == "slower[a=1]"
+        assert cases[1]["failure"]["@type"] == "DurationRegression"
+
+    def test_history_regression(self):
+        history = HistoryStore(REPORT_DIR.joinpath("history.db"))
+        for i, duration in enumerate([1.0, 1.1, 0.9, 1.0, 1.05, 0.95]):
+            run_dir = REPORT_DIR.joinpath(f"run_{i}")
+            self.write_report(run_dir, {"noisy": duration * 2, "stable": duration})
+            history.ingest_reports(run_dir)
+
+        detector = RegressionDetector(history=history)
+        comparisons = detector.compare(dict(), {("A_test_suite", "A", "noisy", ""): 2.4,
+                                                ("A_test_suite", "A", "stable", ""): 1.4})
+
+        noisy, stable = comparisons
+        assert noisy.z_score is not None and not noisy.is_regression
+        assert stable.is_regression and stable.ratio < RegressionDetector.DEFAULT_RATIO_THRESHOLD
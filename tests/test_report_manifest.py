@@ -0,0 +1,107 @@
+import json
+import shutil
+import threading
+from pathlib import Path
+from unittest import mock
+
+import pytest
+
+from src.junit_report import (CaseFormatKeys, IncrementalSuiteReport, JsonJunitExporter, JunitTestCase, JunitTestSuite,
+                              ReportManifest, ReportWriter)
+from tests import REPORT_DIR, BaseTest
+from tests.test_entry_exporter import JSON_DATA
+
+
+class TestReportManifest(BaseTest):
+    @classmethod
+    @pytest.fixture(autouse=True)
+    def cleanup(cls):
+        yield
+        shutil.rmtree(REPORT_DIR, ignore_errors=True)
+
+    def test_suite_manifest(self):
+        class A:
+            @JunitTestCase()
+            def passing_case(self):
+                pass
+
+            @JunitTestCase()
+            def failing_case(self):
+                raise ValueError("failure")
+
+            @JunitTestSuite(REPORT_DIR, manifest=True)
+            def test_suite(self):
+                self.passing_case()
+                with pytest.raises(ValueError):
+                    self.failing_case()
+
+        A().test_suite()
+        self.delete_test_suite(A.test_suite.__wrapped__)
+
+        exporter = JsonJunitExporter(fmt=CaseFormatKeys(case_name="id", severity_key="severity"), manifest=True)
+        exporter.collect(json.loads(JSON_DATA), suite_name="events", report_dir=REPORT_DIR, xml_suffix="1")
+
+        manifest = ReportManifest(REPORT_DIR)
+        reports = manifest.load()
+        assert sorted(reports) == ["junit_A_test_suite_report.xml", "junit_report_events_1.xml"]
+
+        entry = reports["junit_A_test_suite_report.xml"]
+        assert (entry["suite"], entry["tests"], entry["failures"], entry["errors"]) == ("A_test_suite", 2, 1, 0)
+        assert entry["hash"] == ReportWriter.get_digest(REPORT_DIR.joinpath(entry["file"]).read_bytes()).hex()
+
+        entry = reports["junit_report_events_1.xml"]
+        assert (entry["suite"], entry["parametrize"], entry["tests"], entry["failures"]) == ("events", "1", 6, 2)
+        assert len(manifest.get_failed()) == 2
+
+    def test_concurrent_updates(self):
+        exporter = JsonJunitExporter(fmt=CaseFormatKeys(case_name="id", severity_key="severity"), manifest=True)
+        events = json.loads(JSON_DATA)
+        threads = [threading.Thread(target=exporter.collect, args=(events, f"events_{i}", REPORT_DIR))
+                   for i in range(10)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert len(ReportManifest(REPORT_DIR).load()) == 10
+
+    def test_journaled_updates(self):
+        exporter = JsonJunitExporter(fmt=CaseFormatKeys(case_name="id", severity_key="severity"), manifest=True)
+        events = json.loads(JSON_DATA)
+        manifest = ReportManifest(REPORT_DIR)
+
+        with mock.patch.object(ReportManifest, "MIN_COMPACT_SIZE", 2048):
+            for i in range(20):
+                exporter.collect(events, suite_name=f"events_{i}", report_dir=REPORT_DIR)
+                assert len(manifest.load()) == i + 1
+
+            # the journal was compacted into the manifest, which holds all entries except the latest journaled ones
+            reports = json.loads(manifest.path.read_text())["reports"]
+            assert 0 < len(reports) < 20
+            assert manifest.journal_path.stat().st_size < 2048
+
+        manifest.compact()
+        assert len(json.loads(manifest.path.read_text())["reports"]) == 20
+        assert manifest.journal_path.stat().st_size == 0
+
+    def test_incremental_manifest(self):
+        exporter = JsonJunitExporter(fmt=CaseFormatKeys(case_name="id", severity_key="severity"), manifest=True)
+        events = json.loads(JSON_DATA)
+        REPORT_DIR.mkdir(exist_ok=True)
+        events_path = REPORT_DIR.joinpath("events.ndjson")
+        manifest = ReportManifest(REPORT_DIR)
+
+        hashes = list()
+        for chunk in (events[:3], events[3:]):
+            with open(events_path, "a") as f:
+                f.writelines(json.dumps(event) + "\n" for event in chunk)
+            file_name = exporter.collect_incremental(events_path, suite_name="incremental", report_dir=REPORT_DIR,
+                                                     xml_suffix="1")
+            entry = manifest.load()["junit_report_incremental_1.xml"]
+            # the incremental entry hash is the report digest chained over its appends, the report isn't re-read
+            assert entry["hash"] == IncrementalSuiteReport.load(Path(file_name), "incremental").digest
+            hashes.append(entry["hash"])
+
+        assert all(hashes) and hashes[0] != hashes[1]
+
+        assert (entry["suite"], entry["parametrize"], entry["tests"], entry["failures"]) == ("incremental", "1", 6, 2)
@@ -0,0 +1,69 @@
+import json
+import shutil
+from contextlib import redirect_stdout
+from io import StringIO
+
+import junit_xml
+import pytest
+
+from src.junit_report import IncrementalSuiteReport, ReportSummaryScanner
+from src.junit_report.report_summary import main
+from tests import REPORT_DIR, BaseTest
+
+
+class TestReportSummary(BaseTest):
+    @classmethod
+    @pytest.fixture(autouse=True)
+    def cleanup(cls):
+        yield
+        shutil.rmtree(REPORT_DIR, ignore_errors=True)
+
+    @staticmethod
+    def write_report(name: str, failures: int = 0, skipped: int = 0, passed: int = 1):
+        REPORT_DIR.mkdir(parents=True, exist_ok=True)
+        cases = list()
+        for i in range(failures + skipped + passed):
+            case = junit_xml.TestCase(name=f"case_{i}", classname=name, elapsed_sec=0.5)
+            if i < failures:
+                case.add_failure_info(message="failure <testsuite tests='100'>")
+            elif i < failures + skipped:
+                case.add_skipped_info(message="skipped")
+            cases.append(case)
+        path = REPORT_DIR.joinpath(f"junit_{name}_report.xml")
+        path.write_text(junit_xml.to_xml_report_string([junit_xml.TestSuite(name, cases)]))
+        return path
+
+    def test_summarize_file(self):
+        summary = ReportSummaryScanner.summarize_file(self.write_report("A", failures=2, skipped=1, passed=3))
+        assert (summary.tests, summary.failures, summary.errors, summary.skipped) == (6, 2, 0, 1)
+        assert summary.time == 3
+
+        REPORT_DIR.joinpath("pytest.xml").write_text(
+            '<?xml version="1.0"?><testsuites><testsuite name="pytest" tests="2" failures="1" errors="0" '
+            'skipped="0" time="1.5"><testcase name="a"/><testcase name="b"><failure/></testcase></testsuite>'
+            '</testsuites>'
+        )
+        summary = ReportSummaryScanner.summarize_file(REPORT_DIR.joinpath("pytest.xml"))
+        assert (summary.tests, summary.failures, summary.time) == (2, 1, 1.5)
+
+        report = IncrementalSuiteReport(REPORT_DIR.joinpath("incremental.xml"), "incremental")
+        report.append([junit_xml.TestCase(name="a", elapsed_sec=1), junit_xml.TestCase(name="b", elapsed_sec=1)])
+        assert ReportSummaryScanner.summarize_file(report.path).tests == 2
+
+        REPORT_DIR.joinpath("empty.xml").write_text("")
+        REPORT_DIR.joinpath("broken.xml").write_text("<testcases>")
+        assert ReportSummaryScanner.summarize_file(REPORT_DIR.joinpath("empty.xml")).invalid == 1
+        assert ReportSummaryScanner.summarize_file(REPORT_DIR.joinpath("broken.xml")).invalid == 1
+
+    def test_summarize(self):
+        for i in range(10):
+            self.write_report(f"suite_{i}", failures=i % 2)
+
+        paths = ReportSummaryScanner.get_report_paths([REPORT_DIR])
+        summary = ReportSummaryScanner(workers=2, chunk_size=2).summarize(paths)
+        assert (summary.files, summary.tests, summary.failures) == (10, 15, 5)
+
+        output = StringIO()
+        with redirect_stdout(output):
+            assert main([str(REPORT_DIR), "--fail-on-failures", "--workers", "1"]) == 1
+        assert json.loads(output.getvalue())["tests"] == 15
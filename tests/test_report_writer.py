@@ -0,0 +1,62 @@
+import os
+import shutil
+
+import pytest
+
+from src.junit_report import ReportWriter
+from tests import REPORT_DIR
+
+
+class TestReportWriter:
+    @classmethod
+    @pytest.fixture(autouse=True)
+    def cleanup(cls):
+        REPORT_DIR.mkdir(exist_ok=True)
+        yield
+        shutil.rmtree(REPORT_DIR, ignore_errors=True)
+
+    def test_skip_unchanged_content(self):
+        path = REPORT_DIR.joinpath("report.xml")
+        writer = ReportWriter()
+
+        assert writer.write(path, "<testsuites/>")
+        assert not writer.write(path, "<testsuites/>")
+        assert not ReportWriter().write(path, "<testsuites/>")
+        assert writer.write(path, "<testsuites></testsuites>")
+
+        with open(path) as f:
+            assert f.read() == "<testsuites></testsuites>"
+        assert os.listdir(REPORT_DIR) == ["report.xml"]
+
+    def test_write_after_external_change(self):
+        path = REPORT_DIR.joinpath("report.xml")
+        writer = ReportWriter()
+
+        assert writer.write(path, "<testsuites/>")
+        with open(path, "w") as f:
+            f.write("modified")
+
+        assert writer.write(path, "<testsuites/>")
+        with open(path) as f:
+            assert f.read() == "<testsuites/>"
+
+    def test_failed_write_keeps_target(self):
+        path = REPORT_DIR.joinpath("report.xml")
+        writer = ReportWriter()
+        writer.write(path, "<testsuites/>")
+
+        with pytest.raises(ValueError):
+            with writer.atomic_open(path) as f:
+                f.write(b"<testsu")
+                raise ValueError()
+
+        with open(path) as f:
+            assert f.read() == "<testsuites/>"
+        assert os.listdir(REPORT_DIR) == ["report.xml"]
+
+    def test_fsync_env_var(self, monkeypatch):
+        assert not ReportWriter().fsync
+        monkeypatch.setenv(ReportWriter.FSYNC_KEY, "true")
+        assert ReportWriter().fsync
+        assert not ReportWriter(fsync=False).fsync
+        assert ReportWriter().write(REPORT_DIR.joinpath("report.xml"), "<testsuites/>")
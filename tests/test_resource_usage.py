@@ -0,0 +1,55 @@
+import shutil
+
+import pytest
+import xmltodict
+
+from src.junit_report import JunitTestCase, JunitTestSuite
+from src.junit_report.resource_usage import CaseResourceUsage, resource
+from tests import REPORT_DIR, BaseTest
+
+
+class TestResourceUsage(BaseTest):
+    @classmethod
+    @pytest.fixture(autouse=True)
+    def cleanup(cls):
+        yield
+        shutil.rmtree(REPORT_DIR, ignore_errors=True)
+
+    def test_disabled_by_default(self):
+        usage = CaseResourceUsage()
+        assert not usage.enabled
+
+    def test_trace_memory(self):
+        usage = CaseResourceUsage(trace_memory=True)
+        usage.start()
+        data = [bytearray(1024) for _ in range(1024)]
+        assert usage.stop()[CaseResourceUsage.TRACEMALLOC_PEAK] >= 1024
+        assert data
+
+    @pytest.mark.skipif(resource is None, reason="resource module is not available")
+    def test_case_resource_usage_properties(self):
+        class A:
+            REPORT_PATH = REPORT_DIR.joinpath("junit_A_test_suite_report.xml")
+
+            @JunitTestCase(resource_usage=True)
+            def some_case(self):
+                sum(range(10000))
+
+            @JunitTestSuite(REPORT_DIR)
+            def test_suite(self):
+                self.some_case()
+
+        A().test_suite()
+
+        with open(A.REPORT_PATH) as f:
+            xml_results = xmltodict.parse(f.read())
+
+        case = self.assert_xml_report_results(xml_results, testsuite_tests=1, testsuite_name="A_test_suite").pop()
+        properties = self.get_properties(case)
+        prefix = CaseResourceUsage.PROPERTY_PREFIX
+        assert float(properties[f"{prefix}.{CaseResourceUsage.CPU_TIME}"]) >= 0
+        assert int(properties[f"{prefix}.{CaseResourceUsage.MAX_RSS}"]) > 0
+        for name in CaseResourceUsage.RUSAGE_FIELDS.values():
+            assert int(properties[f"{prefix}.{name}"]) >= 0
+
+        self.delete_test_suite(A.test_suite.__wrapped__)
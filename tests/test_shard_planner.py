@@ -0,0 +1,65 @@
+import json
+import shutil
+from contextlib import redirect_stdout
+from io import StringIO
+
+import pytest
+import junit_xml
+
+from src.junit_report import HistoryStore, ShardPlanner
+from src.junit_report.shard_planner import main
+from tests import REPORT_DIR, BaseTest
+
+
+class TestShardPlanner(BaseTest):
+    @classmethod
+    @pytest.fixture(autouse=True)
+    def cleanup(cls):
+        yield
+        shutil.rmtree(REPORT_DIR, ignore_errors=True)
+
+    @staticmethod
+    def write_report(report_dir, suite_name: str, durations):
+        report_dir.mkdir(parents=True, exist_ok=True)
+        cases = [junit_xml.TestCase(name=f"case_{i}", classname=suite_name, elapsed_sec=duration)
+                 for i, duration in enumerate(durations)]
+        report_dir.joinpath(f"junit_{suite_name}_report.xml").write_text(
+            junit_xml.to_xml_report_string([junit_xml.TestSuite(suite_name, cases)])
+        )
+
+    def test_plan(self):
+        planner = ShardPlanner({"a": 8, "b": 7, "c": 6, "d": 5, "e": 4})
+        plan = planner.plan(2)
+
+        assert [shard.suites for shard in plan] == [["a", "d", "e"], ["b", "c"]]
+        assert [shard.duration for shard in plan] == [17, 13]
+
+        plan = planner.plan(3, suites=["a", "b", "new"])
+        assert sorted(suite for shard in plan for suite in shard.suites) == ["a", "b", "new"]
+        assert sorted(shard.duration for shard in plan) == [6, 7, 8]
+
+        with pytest.raises(ValueError):
+            planner.plan(0)
+
+    def test_from_reports(self):
+        first_run, second_run = REPORT_DIR.joinpath("run_1"), REPORT_DIR.joinpath("run_2")
+        self.write_report(first_run, "slow", [3, 3])
+        self.write_report(first_run, "fast", [1])
+        self.write_report(second_run, "slow", [2, 2])
+
+        planner = ShardPlanner.from_reports([first_run, second_run])
+        assert planner.durations == {"slow": 5, "fast": 1}
+
+        history = HistoryStore(REPORT_DIR.joinpath("history.db"))
+        history.ingest_reports(first_run)
+        history.ingest_reports(second_run)
+        assert ShardPlanner.from_history(history).durations == {"slow": 5, "fast": 1}
+        assert ShardPlanner.from_history(history, runs=1).durations == {"slow": 4}
+
+        output = StringIO()
+        with redirect_stdout(output):
+            assert main(["--shards", "2", "--reports", str(first_run), str(second_run),
+                         "--output-dir", str(REPORT_DIR.joinpath("shards"))]) == 0
+
+        assert [shard["suites"] for shard in json.loads(output.getvalue())] == [["slow"], ["fast"]]
+        assert REPORT_DIR.joinpath("shards", "shard_1.txt").read_text() == "fast\n"
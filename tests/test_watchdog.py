@@ -0,0 +1,115 @@
+import shutil
+import threading
+import time
+
+import pytest
+import xmltodict
+
+from src.junit_report import JunitTestCase, JunitTestSuite
+from src.junit_report.utils import CaseRecord
+from src.junit_report.watchdog import HangWatchdog
+from tests import REPORT_DIR, BaseTest
+
+
+class TestHangWatchdog(BaseTest):
+    @classmethod
+    @pytest.fixture(autouse=True)
+    def cleanup(cls):
+        yield
+        shutil.rmtree(REPORT_DIR, ignore_errors=True)
+
+    def test_partial_report_of_hanging_case(self):
+        report_path = REPORT_DIR.joinpath("junit_A_test_suite_report.xml")
+        partial_reports = list()
+
+        class A:
+            @JunitTestSuite(REPORT_DIR, hang_timeout=0.2)
+            def test_suite(self):
+                self.test_case()
+                self.hanging_case()
+
+            @JunitTestCase()
+            def test_case(self):
+                pass
+
+            @JunitTestCase()
+            def hanging_case(self):
+                deadline = time.monotonic() + 10
+                while not report_path.exists() and time.monotonic() < deadline:
+                    time.sleep(0.05)
+                partial_reports.append(xmltodict.parse(report_path.read_text()))
+
+        A().test_suite()
+        cases = self.assert_xml_report_results(partial_reports[0], testsuite_tests=2, testsuite_name="A_test_suite",
+                                               errors=1)
+        assert cases[0]["@name"] == "test_case" and cases[1]["@name"] == "hanging_case"
+        assert cases[1]["error"]["@type"] == "CaseHang"
+        assert "in hanging_case" in cases[1]["error"]["#text"] and "MainThread" in cases[1]["error"]["#text"]
+
+        self.assert_xml_report_results(xmltodict.parse(report_path.read_text()), testsuite_tests=2,
+                                       testsuite_name="A_test_suite")
+        assert HangWatchdog._active == 0 and not HangWatchdog._running_cases
+        self.delete_test_suite(A.test_suite.__wrapped__)
+
+    def test_timeout_from_env(self, monkeypatch):
+        assert HangWatchdog.get_timeout() is None
+        monkeypatch.setenv(HangWatchdog.HANG_TIMEOUT_KEY, "30")
+        assert HangWatchdog.get_timeout() == 30
+        assert HangWatchdog.get_timeout(5) == 5
+        monkeypatch.setenv(HangWatchdog.HANG_TIMEOUT_KEY, "5m")
+        assert HangWatchdog.get_timeout() is None
+        assert JunitTestSuite(REPORT_DIR)._watchdog is None
+
+    def test_hanging_case_reported_once(self):
+        calls = list()
+        watchdog = HangWatchdog(0.05, lambda cases, stacks: calls.append([case.name for case, _ in cases]))
+        watchdog.start()
+        try:
+            case = CaseRecord(name="stuck")
+            HangWatchdog.case_started(case)
+            threading.Event().wait(0.5)
+            HangWatchdog.case_finished(case)
+        finally:
+            watchdog.stop()
+        assert calls == [["stuck"]]
+
+    def test_concurrent_suites(self):
+        release = threading.Event()
+        other_report_path = REPORT_DIR.joinpath("junit_B_test_suite_report.xml")
+        other_partial = list()
+
+        class A:
+            @JunitTestSuite(REPORT_DIR, hang_timeout=0.1)
+            def test_suite(self):
+                self.hanging_case()
+
+            @JunitTestCase()
+            def hanging_case(self):
+                release.wait(10)
+
+        class B:
+            @JunitTestSuite(REPORT_DIR, hang_timeout=0.1)
+            def test_suite(self):
+                self.test_case()
+                release.wait(10)
+                other_partial.append(other_report_path.exists())
+
+            @JunitTestCase()
+            def test_case(self):
+                pass
+
+        threads = [threading.Thread(target=suite_class().test_suite) for suite_class in (B, A)]
+        for thread in threads:
+            thread.start()
+            time.sleep(0.02)  # the case of A starts while the watchdog of B is running
+        time.sleep(0.5)
+        release.set()
+        for thread in threads:
+            thread.join()
+
+        # the hanging case of A is not reported by the watchdog of B
+        assert other_partial == [False]
+        self.assert_xml_report_results(xmltodict.parse(other_report_path.read_text()), testsuite_tests=1,
+                                       testsuite_name="B_test_suite")
+        self.delete_test_suite(A.test_suite.__wrapped__)
+        self.delete_test_suite(B.test_suite.__wrapped__)